@@ -1,17 +1,27 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import sys
 import os
+import io
+import json
+import logging
+import time
 
 # Try to import the processor - handle both possible locations
 try:
     from sg_job_data_processor import JobDataProcessor
+    from sg_job_result_cache import ResultCache
+    from sg_job_duckdb_pool import DEFAULT_POOL_SIZE, DuckDBPool
+    from sg_job_export import EXPORT_FORMATS, EXPORT_MIME_TYPES
+    from sg_job_sketches import DEFAULT_CAPACITY, DEFAULT_K
 except ImportError:
     # If in different directory, add path
     sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
     from sg_job_data_processor import JobDataProcessor
+    from sg_job_result_cache import ResultCache
+    from sg_job_duckdb_pool import DEFAULT_POOL_SIZE, DuckDBPool
+    from sg_job_export import EXPORT_FORMATS, EXPORT_MIME_TYPES
+    from sg_job_sketches import DEFAULT_CAPACITY, DEFAULT_K
 
 from datetime import datetime
 
@@ -21,17 +31,81 @@ st.set_page_config(page_title="SG Job Market Intelligence", layout="wide")
 # Load data
 @st.cache_resource
 def load_data():
+    # SG_JOBS_ENGINE=duckdb keeps the data inside DuckDB and only fetches query results
+    engine = os.environ.get("SG_JOBS_ENGINE", "pandas")
+    # SG_JOBS_COMPACT=1 stores the processed frame compactly (pandas engine)
+    compact = os.environ.get("SG_JOBS_COMPACT", "0") == "1"
+    # SG_JOBS_LAZY=1 defers derived columns and indexes until a query needs them (pandas engine)
+    lazy = os.environ.get("SG_JOBS_LAZY", "0") == "1"
+    # SG_JOBS_CHUNKSIZE=<rows> streams the CSV in chunks, for hosts short on memory (pandas engine)
+    chunksize = int(os.environ.get("SG_JOBS_CHUNKSIZE", "0")) or None
+    # SG_JOBS_WORKERS=<n> spreads the loading stages over n processes (pandas engine)
+    pipeline_workers = int(os.environ.get("SG_JOBS_WORKERS", "1"))
+    # SG_JOBS_SKETCH_K / SG_JOBS_SKETCH_CAPACITY size the percentile and top-N sketches (pandas engine)
+    sketches = dict(sketch_k=int(os.environ.get("SG_JOBS_SKETCH_K", DEFAULT_K)),
+                    sketch_capacity=int(os.environ.get("SG_JOBS_SKETCH_CAPACITY", DEFAULT_CAPACITY)))
+    # Processed data is snapshotted here and reused while the source is unchanged
+    cache_dir = os.environ.get("SG_JOBS_CACHE_DIR", os.path.join("data", "cache"))
+    # Results of repeated filter combinations are kept in memory, shared by all sessions
+    # (SG_JOBS_RESULT_CACHE_MB=0 turns this off)
+    cache = ResultCache(max_mb=float(os.environ.get("SG_JOBS_RESULT_CACHE_MB", "256")))
     # Prefer using DuckDB database if available
     db_path = os.path.join("data", "sg_jobs.duckdb")
     if os.path.exists(db_path):
-        return JobDataProcessor(db_path)
+        pool = None
+        if engine == "duckdb":
+            # Read-only cursors shared by all sessions; several replicas can serve the same file.
+            # SG_JOBS_DUCKDB_POOL caps concurrent queries, SG_JOBS_DUCKDB_THREADS/SG_JOBS_DUCKDB_MEMORY
+            # (e.g. 2GB) are DuckDB's thread and memory budget for this process
+            pool = DuckDBPool(db_path, size=int(os.environ.get("SG_JOBS_DUCKDB_POOL", DEFAULT_POOL_SIZE)),
+                              threads=int(os.environ.get("SG_JOBS_DUCKDB_THREADS", "0")) or None,
+                              memory_limit=os.environ.get("SG_JOBS_DUCKDB_MEMORY") or None)
+        return JobDataProcessor(db_path, engine=engine, compact=compact, cache_dir=cache_dir, cache=cache,
+                                lazy=lazy, pipeline_workers=pipeline_workers, pool=pool, **sketches)
     # Fallback to CSV if DuckDB not present
     csv_path = "SGJobData.csv"
-    return JobDataProcessor(csv_path)
+    return JobDataProcessor(csv_path, engine=engine, compact=compact, cache_dir=cache_dir, cache=cache,
+                            lazy=lazy, chunksize=chunksize, pipeline_workers=pipeline_workers, **sketches)
+
+@st.cache_resource
+def enable_profile_log():
+    # SG_JOBS_PROFILE_LOG=1 logs every timed span (tabs, queries, filters) as a JSON line on stderr
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    profile_logger = logging.getLogger("sg_jobs.profile")
+    profile_logger.addHandler(handler)
+    profile_logger.setLevel(logging.INFO)
+
+if os.environ.get("SG_JOBS_PROFILE_LOG", "0") == "1":
+    enable_profile_log()
+
+def histogram_chart(hist, title, x_label):
+    # The processor bins the data; the chart only gets one bar per bin
+    fig = go.Figure(go.Bar(x=(hist['bin_start'] + hist['bin_end']) / 2, y=hist['count'],
+                           width=hist['bin_end'] - hist['bin_start'],
+                           customdata=hist[['bin_start', 'bin_end']],
+                           hovertemplate="%{customdata[0]:,.0f}-%{customdata[1]:,.0f}<br>%{y:,} jobs<extra></extra>"))
+    fig.update_layout(title=title, xaxis_title=x_label, yaxis_title="Jobs", bargap=0, showlegend=False)
+    return fig
+
+@st.cache_resource
+def refresh_clock():
+    # When the shared processor last took in new postings, across all sessions
+    return {"at": time.monotonic()}
+
+def refresh_data(processor):
+    # SG_JOBS_REFRESH_S=<seconds> takes in postings added to the data file at most that often,
+    # without reloading it (see JobDataProcessor.refresh)
+    interval_s = float(os.environ.get("SG_JOBS_REFRESH_S", "0"))
+    clock = refresh_clock()
+    if interval_s and time.monotonic() - clock["at"] >= interval_s:
+        clock["at"] = time.monotonic()
+        processor.refresh()
 
 try:
     processor = load_data()
-    df = processor.df
+    refresh_data(processor)
+    filter_options = processor.get_filter_options()
 except Exception as e:
     st.error(f"Error loading data: {e}")
     st.info("Please ensure SGJobData.csv is in the correct location: ntu-data-science-ai/lesson_1_6/SGJobData.csv")
@@ -48,43 +122,58 @@ Discover in-demand roles, salary benchmarks, and emerging opportunities.
 st.sidebar.header("🔍 Filters")
 selected_industries = st.sidebar.multiselect(
     "Industries",
-    options=sorted(df['main_category'].unique()),
+    options=filter_options['industries'],
     default=[]
 )
 
 salary_range = st.sidebar.slider(
     "Salary Range (Monthly SGD)",
     min_value=0,
-    max_value=int(df['salary_maximum'].max()),
-    value=(0, int(df['salary_maximum'].quantile(0.9))),
+    max_value=int(filter_options['salary_max']),
+    value=(0, int(filter_options['salary_q90'])),
     step=500
 )
 
 selected_positions = st.sidebar.multiselect(
     "Position Level",
-    options=sorted(df['positionLevels'].unique()),
+    options=filter_options['positions'],
     default=[]
 )
 
 employment_type = st.sidebar.multiselect(
     "Employment Type",
-    options=sorted(df['employmentTypes'].unique()),
+    options=filter_options['employment_types'],
     default=['Permanent', 'Full Time']
 )
 
 # Apply filters
-filtered_df = df.copy()
-if selected_industries:
-    filtered_df = filtered_df[filtered_df['main_category'].str.contains('|'.join(selected_industries), case=False, na=False)]
-if selected_positions:
-    filtered_df = filtered_df[filtered_df['positionLevels'].isin(selected_positions)]
-if salary_range:
-    filtered_df = filtered_df[
-        (filtered_df['average_salary'] >= salary_range[0]) &
-        (filtered_df['average_salary'] <= salary_range[1])
-    ]
-if employment_type:
-    filtered_df = filtered_df[filtered_df['employmentTypes'].isin(employment_type)]
+filters = dict(
+    industries=selected_industries,
+    salary_range=salary_range,
+    position=selected_positions,
+    employment=employment_type
+)
+# Timings below are tagged with the filter combination they ran for
+profiler = processor.profiler
+filter_tag = json.dumps(filters, sort_keys=True)
+
+def export_filtered(format, filters):
+    # Streams the filtered rows into the download in record batches (see JobDataProcessor.export)
+    sink = io.BytesIO()
+    processor.export(sink, format=format, compression='zstd', **filters)
+    return sink.getvalue()
+
+# Export of the filtered postings; the file is only written when the button is clicked
+with st.sidebar.expander("⬇️ Export filtered jobs"):
+    export_format = st.radio("Format", options=list(EXPORT_FORMATS), horizontal=True,
+                             format_func={'parquet': "Parquet", 'arrow': "Arrow IPC"}.get)
+    st.download_button(
+        "Download",
+        data=lambda format=export_format, filters=dict(filters): export_filtered(format, filters),
+        file_name=f"sg_jobs{EXPORT_FORMATS[export_format]}",
+        mime=EXPORT_MIME_TYPES[export_format],
+        on_click="ignore"
+    )
 
 # Create tabs
 tab1, tab2, tab3, tab4, tab5 = st.tabs(
@@ -92,24 +181,36 @@ tab1, tab2, tab3, tab4, tab5 = st.tabs(
 )
 
 # ===== TAB 1: MARKET OVERVIEW =====
-with tab1:
+# The headline metrics are shown before the rest of the dashboard is computed
+with tab1, profiler.span("app:overview", filters=filter_tag):
     col1, col2, col3, col4 = st.columns(4)
 
+    overview = processor.get_market_overview(**filters)
     with col1:
-        st.metric("Total Jobs Posted", f"{len(filtered_df):,}")
+        st.metric("Total Jobs Posted", f"{overview['total_jobs']:,}")
     with col2:
-        median_sal = filtered_df['average_salary'].median()
+        median_sal = overview['median_salary']
         st.metric("Median Salary", f"${median_sal:,.0f}" if not pd.isna(median_sal) else "N/A")
     with col3:
-        avg_apps = filtered_df['metadata_totalNumberJobApplication'].mean()
+        avg_apps = overview['avg_applications']
         st.metric("Avg Applications/Job", f"{avg_apps:.1f}" if not pd.isna(avg_apps) else "N/A")
     with col4:
-        st.metric("Total Vacancies", f"{filtered_df['numberOfVacancies'].sum():,}")
+        st.metric("Total Vacancies", f"{overview['total_vacancies']:,.0f}")
+
+# Plotting is imported once the headline metrics are up, so they don't wait for it
+import plotly.express as px
+import plotly.graph_objects as go
+
+# Every tab's aggregates for the current filters, computed in one pass
+with profiler.span("app:dashboard", filters=filter_tag):
+    dashboard = processor.get_dashboard(**filters, top_roles=20, top_companies=10, top_industries=15,
+                                        top_skills=25, top_skill_salaries=10, salary_bins=50)
 
+with tab1, profiler.span("tab:market_overview", filters=filter_tag):
     # Employment type distribution
     col1, col2 = st.columns(2)
     with col1:
-        emp_dist = filtered_df['employmentTypes'].value_counts()
+        emp_dist = dashboard['employment_counts']
         if len(emp_dist) > 0:
             fig_emp = px.pie(values=emp_dist.values, names=emp_dist.index, title="Employment Type Distribution")
             st.plotly_chart(fig_emp, use_container_width=True)
@@ -118,7 +219,7 @@ with tab1:
 
     with col2:
         # Top companies
-        top_companies = filtered_df['postedCompany_name'].value_counts().head(10)
+        top_companies = dashboard['top_companies']
         if len(top_companies) > 0:
             fig_comp = px.bar(y=top_companies.index, x=top_companies.values, orientation='h',
                              title="Top 10 Hiring Companies", labels={'x': 'Number of Jobs', 'y': 'Company'})
@@ -128,17 +229,16 @@ with tab1:
             st.info("No company data available")
 
     # Salary distribution
-    if len(filtered_df) > 0 and filtered_df['average_salary'].notna().sum() > 0:
-        fig_salary = px.histogram(filtered_df, x='average_salary', nbins=50,
-                                 title="Salary Distribution", labels={'average_salary': 'Salary (SGD)', 'count': 'Jobs'})
-        fig_salary.update_layout(showlegend=False)
+    salary_hist = dashboard['salary_histogram']
+    if len(salary_hist) > 0:
+        fig_salary = histogram_chart(salary_hist, "Salary Distribution", "Salary (SGD)")
         st.plotly_chart(fig_salary, use_container_width=True)
 
 # ===== TAB 2: ROLE INTELLIGENCE =====
-with tab2:
+with tab2, profiler.span("tab:role_intelligence", filters=filter_tag):
     st.subheader("Top In-Demand Roles")
 
-    role_stats = processor.get_top_roles(top_n=20)
+    role_stats = dashboard['top_roles']
     if len(role_stats) > 0:
         role_stats_reset = role_stats.reset_index()
         role_stats_reset.columns = ['Role', 'Salary Min', 'Count', 'Salary Max', 'Applications', 'Views', 'Competition', 'Min Exp']
@@ -163,33 +263,57 @@ with tab2:
         # Role salary benchmark
         st.subheader("Role Salary Benchmark")
         role_search = st.selectbox("Select a role to see salary details", role_stats_reset['Role'].head(20).tolist())
-        role_data = filtered_df[filtered_df['title'] == role_search]
+        role_data = processor.get_role_benchmark(role_search, bins=20, **filters)
 
-        if len(role_data) > 0:
+        if role_data['jobs'] > 0:
             col1, col2, col3, col4 = st.columns(4)
             with col1:
-                st.metric("Avg Salary", f"${role_data['average_salary'].mean():,.0f}")
+                st.metric("Avg Salary", f"${role_data['avg_salary']:,.0f}")
             with col2:
-                st.metric("Min-Max Range", f"${role_data['salary_minimum'].mean():,.0f}-${role_data['salary_maximum'].mean():,.0f}")
+                st.metric("Min-Max Range", f"${role_data['salary_min']:,.0f}-${role_data['salary_max']:,.0f}")
             with col3:
-                st.metric("Jobs Posted", len(role_data))
+                st.metric("Jobs Posted", role_data['jobs'])
             with col4:
-                avg_app = role_data['metadata_totalNumberJobApplication'].mean()
-                st.metric("Avg Applications", f"{avg_app:.1f}")
+                st.metric("Avg Applications", f"{role_data['avg_applications']:.1f}")
 
             # Salary distribution for selected role
-            if role_data['average_salary'].notna().sum() > 0:
-                fig_role_salary = px.histogram(role_data, x='average_salary', nbins=20,
-                                              title=f"Salary Distribution - {role_search}")
+            if len(role_data['histogram']) > 0:
+                fig_role_salary = histogram_chart(role_data['histogram'], f"Salary Distribution - {role_search}",
+                                                  "average_salary")
                 st.plotly_chart(fig_role_salary, use_container_width=True)
     else:
         st.info("No role data available for the selected filters")
 
+    st.subheader("Find Similar Jobs")
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        similar_title = st.text_input("Any job title", placeholder="e.g. senior data engineer")
+    with col2:
+        expected_salary = st.number_input("Expected salary ($, 0 = any)", min_value=0, value=0, step=500)
+    if similar_title.strip():
+        similar = processor.get_similar_jobs(similar_title, top_n=20, salary=expected_salary or None, **filters)
+        spread = similar['salary']
+        if spread['count'] > 0:
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Median Salary", f"${spread['median']:,.0f}")
+            with col2:
+                st.metric("Middle Half", f"${spread['p25']:,.0f}-${spread['p75']:,.0f}")
+            with col3:
+                st.metric("Min-Max Range", f"${spread['min']:,.0f}-${spread['max']:,.0f}")
+            with col4:
+                st.metric("Similar Jobs", len(similar['jobs']))
+        if len(similar['jobs']) > 0:
+            st.dataframe(similar['jobs'].drop(columns=['metadata_jobPostId']), use_container_width=True,
+                         hide_index=True)
+        else:
+            st.info("No similar jobs found for the selected filters")
+
 # ===== TAB 3: INDUSTRY TRENDS =====
-with tab3:
+with tab3, profiler.span("tab:industry_trends", filters=filter_tag):
     st.subheader("Industry Statistics")
 
-    industry_stats = processor.get_industry_stats()
+    industry_stats = dashboard['industry_stats']
     if len(industry_stats) > 0:
         industry_stats_reset = industry_stats.reset_index()
         industry_stats_reset.columns = ['Industry', 'Jobs', 'Salary Min', 'Salary Max', 'Vacancies', 'Competition', 'Min Exp']
@@ -212,7 +336,7 @@ with tab3:
 
         # Employment type by industry
         st.subheader("Employment Type Distribution by Industry")
-        emp_by_ind = pd.crosstab(df['main_category'], df['employmentTypes'])
+        emp_by_ind = dashboard['employment_by_industry']
         if len(emp_by_ind) > 0:
             fig_emp_ind = px.bar(emp_by_ind.head(10), title="Employment Types by Top Industries",
                                 labels={'value': 'Count', 'main_category': 'Industry'})
@@ -220,11 +344,31 @@ with tab3:
     else:
         st.info("No industry data available")
 
+    # Posting trends over time, across all postings rather than the sidebar filters
+    st.subheader("Posting Trends")
+    st.caption("Weekly postings over the whole dataset, by posting date")
+    top_industries = list(industry_stats.index[:5]) if len(industry_stats) > 0 else []
+    weekly = processor.get_trends('main_category', freq='W', keys=top_industries)
+    if len(weekly) > 0:
+        fig_trend = px.line(weekly.reset_index(), x='period', y='postings', color='main_category',
+                            title="Weekly Postings - Top Industries",
+                            labels={'period': 'Week', 'postings': 'Postings', 'main_category': 'Industry'})
+        st.plotly_chart(fig_trend, use_container_width=True)
+
+    emerging = processor.get_emerging_roles(top_n=10, window_days=28)
+    if len(emerging) > 0:
+        st.subheader("Emerging Roles (last 4 weeks vs the 4 before)")
+        emerging_reset = emerging.reset_index()[['role', 'postings', 'previous_postings', 'postings_growth',
+                                                 'vacancies', 'avg_salary']]
+        emerging_reset.columns = ['Role', 'Postings', 'Previous Postings', 'Growth', 'Vacancies', 'Avg Salary']
+        emerging_reset['Growth'] = emerging_reset['Growth'].map(lambda g: f"{g:+.0%}" if pd.notna(g) else "new")
+        st.dataframe(emerging_reset.round(0), use_container_width=True, hide_index=True)
+
 # ===== TAB 4: SKILLS ANALYSIS =====
-with tab4:
+with tab4, profiler.span("tab:skills_analysis", filters=filter_tag):
     st.subheader("In-Demand Skills & Keywords")
 
-    skills = processor.get_skill_keywords(top_n=25)
+    skills = dashboard['skills']
     if len(skills) > 0:
         skills_df = pd.DataFrame(list(skills.items()), columns=['Skill', 'Frequency'])
         skills_df = skills_df.sort_values('Frequency', ascending=False)
@@ -240,7 +384,7 @@ with tab4:
 
         # Experience requirement distribution
         st.subheader("Experience Requirements Distribution")
-        exp_dist = filtered_df['exp_category'].value_counts().sort_index()
+        exp_dist = dashboard['experience_counts']
         if len(exp_dist) > 0:
             fig_exp = px.bar(x=exp_dist.index.astype(str), y=exp_dist.values,
                              labels={'x': 'Experience Level', 'y': 'Number of Jobs'},
@@ -249,20 +393,11 @@ with tab4:
 
         # Skills by salary (top skills and their average salary)
         st.subheader("Average Salary by Top Skills")
-        top_skills_list = list(skills.keys())[:10]
-        salary_by_skill = []
-
-        for skill in top_skills_list:
-            skill_jobs = filtered_df[filtered_df['title'].str.contains(skill, case=False, na=False)]
-            if len(skill_jobs) > 0:
-                salary_by_skill.append({
-                    'Skill': skill,
-                    'Avg Salary': skill_jobs['average_salary'].mean(),
-                    'Count': len(skill_jobs)
-                })
+        salary_by_skill = dashboard['skill_salary'].reset_index()
+        salary_by_skill.columns = ['Skill', 'Count', 'Avg Salary']
 
         if len(salary_by_skill):
-            skill_salary_df = pd.DataFrame(salary_by_skill).sort_values('Avg Salary', ascending=False)
+            skill_salary_df = salary_by_skill.sort_values('Avg Salary', ascending=False)
             fig_skill_sal = px.bar(skill_salary_df, x='Avg Salary', y='Skill', orientation='h',
                                   title="Average Salary by Top Skills")
             st.plotly_chart(fig_skill_sal, use_container_width=True)
@@ -270,10 +405,10 @@ with tab4:
         st.info("No skill data available")
 
 # ===== TAB 5: SALARY INSIGHTS =====
-with tab5:
+with tab5, profiler.span("tab:salary_insights", filters=filter_tag):
     st.subheader("Salary by Position Level")
 
-    pos_stats = processor.get_salary_by_position()
+    pos_stats = dashboard['salary_by_position']
     if len(pos_stats) > 0:
         pos_stats_reset = pos_stats.reset_index()
         pos_stats_reset.columns = ['Position', 'Salary Min Avg', 'Salary Min Median', 'Count', 'Salary Max Avg', 'Salary Max Median', 'Avg Salary']
@@ -288,11 +423,18 @@ with tab5:
         st.subheader("Position Level Salary Benchmarks")
         st.dataframe(pos_stats_reset, use_container_width=True, hide_index=True)
 
+    # Salary percentiles by position level, for the current filters
+    st.subheader("Salary Percentiles by Position Level")
+    pos_percentiles = dashboard['salary_percentiles']
+    pos_percentiles = pos_percentiles[pos_percentiles['count'] >= 10]
+    if len(pos_percentiles) > 0:
+        pos_percentiles_reset = pos_percentiles.round(0).reset_index()
+        pos_percentiles_reset.columns = ['Position', 'P25', 'Median', 'P75', 'P90', 'Count']
+        st.dataframe(pos_percentiles_reset, use_container_width=True, hide_index=True)
+
     # Salary by experience level
     st.subheader("Salary by Experience Requirement")
-    exp_salary = filtered_df.groupby('exp_category').agg({
-        'average_salary': ['mean', 'median', 'min', 'max', 'count']
-    }).round(0)
+    exp_salary = dashboard['salary_by_experience'].round(0)
     exp_salary.columns = ['Mean', 'Median', 'Min', 'Max', 'Count']
     exp_salary = exp_salary[exp_salary['Count'] >= 5]
 
@@ -306,17 +448,26 @@ with tab5:
 
     # Salary trends by industry
     st.subheader("Salary Range by Industry")
-    ind_salary = df.groupby('main_category').agg({
-        'average_salary': 'mean',
-        'salary_minimum': 'mean',
-        'salary_maximum': 'mean'
-    }).round(0).sort_values('average_salary', ascending=False).head(15)
+    ind_salary = dashboard['salary_by_industry']
 
     if len(ind_salary) > 0:
         fig_ind_sal_dist = px.bar(ind_salary.reset_index().head(15), x='average_salary', y='main_category', orientation='h',
                                   title="Average Salary by Industry (Top 15)")
         st.plotly_chart(fig_ind_sal_dist, use_container_width=True)
 
+# Performance panel (SG_JOBS_DEBUG=1): span timings since startup, slowest p95 first
+if os.environ.get("SG_JOBS_DEBUG", "0") == "1":
+    with st.sidebar.expander("⏱️ Performance"):
+        st.dataframe(profiler.summary().round(1), use_container_width=True)
+        cache_stats = processor.cache.stats()
+        st.caption(f"Result cache: {cache_stats['hits']:,} hits, {cache_stats['misses']:,} misses, "
+                   f"{cache_stats['entries']} entries ({cache_stats['mb']:.1f} MB)")
+        recent = pd.DataFrame(profiler.recent(20))
+        if len(recent) > 0:
+            st.caption("Latest spans")
+            st.dataframe(recent.reindex(columns=["name", "parent", "wall_ms", "cpu_ms", "filters"]).round(1),
+                         use_container_width=True, hide_index=True)
+
 # Footer
 st.markdown("---")
 st.markdown(f"""
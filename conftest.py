@@ -0,0 +1,3 @@
+# scripts/ holds command-line tools, some named test_*.py (test_load_duckdb.py loads data/sg_jobs.duckdb when
+# imported); the test suite lives in tests/
+collect_ignore = ['scripts']
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Load-test the HTTP query service (sg_job_service) in-process, against a local data file
+
+Starts the service on a free local port and drives it with --clients
+keep-alive connections, each sending --requests queries drawn from a mix of
+the dashboard's queries over a few filter combinations (so identical queries
+are in flight together, as with many users on the default view). Every
+response is checked: the script exits with status 1 if any query fails or if
+the throughput is below --min-rps.
+
+Usage:
+    python scripts/bench_service.py --data data/sg_jobs.duckdb [--engine duckdb] [--clients 50] [--requests 40]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+# Make the project modules importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sg_job_data_processor import ENGINES, JobDataProcessor
+from sg_job_service import DEFAULT_WORKERS, QueryServer, QueryService
+
+
+def query_mix(options):
+    """(method, params) pairs a dashboard-like consumer sends"""
+    salary_top = int(options['salary_q90']) // 500 * 500
+    filter_sets = [
+        dict(salary_range=[0, salary_top], employment=['Permanent', 'Full Time']),
+        dict(industries=options['industries'][:1], salary_range=[0, salary_top]),
+        dict(position=options['positions'][:2]),
+        dict(),
+    ]
+    mix = [('get_filter_options', {})]
+    for filters in filter_sets:
+        mix += [
+            ('get_market_overview', filters),
+            ('get_top_roles', dict(top_n=10, **filters)),
+            ('get_industry_stats', filters),
+            ('get_salary_percentiles', dict(group_by='positionLevels', **filters)),
+            ('get_salary_histogram', dict(bins=50, **filters)),
+            ('get_top_companies', dict(top_n=10, **filters)),
+        ]
+    return mix + [('get_emerging_roles', dict(top_n=10)), ('get_trends', dict(dimension='main_category'))]
+
+
+async def client(port, queries, n_requests, latencies, failures, seed):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        for _ in range(n_requests):
+            method, params = rng.choice(queries)
+            body = json.dumps({'method': method, 'params': params}).encode()
+            started = time.perf_counter()
+            writer.write(b'POST /query HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+                         b'Content-Length: %d\r\n\r\n%s' % (len(body), body))
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':')[1])
+            payload = await reader.readexactly(length)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                failures.append((method, params, status, payload[:200]))
+    finally:
+        writer.close()
+
+
+async def run(processor, clients, n_requests, workers):
+    service = QueryService(processor, workers=workers)
+    server = QueryServer(service)
+    _, port = await server.start('127.0.0.1', 0)
+    queries = query_mix(processor.get_filter_options())
+    latencies, failures = [], []
+    started = time.perf_counter()
+    await asyncio.gather(*(client(port, queries, n_requests, latencies, failures, seed)
+                           for seed in range(clients)))
+    elapsed = time.perf_counter() - started
+    await server.close()
+    service.close()
+    return elapsed, latencies, failures, service.stats()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the HTTP query service against a local data file")
+    parser.add_argument("--data", default=os.path.join("data", "sg_jobs.duckdb"), help="CSV or .duckdb file")
+    parser.add_argument("--engine", choices=ENGINES, default="duckdb")
+    parser.add_argument("--clients", type=int, default=50, help="concurrent keep-alive connections")
+    parser.add_argument("--requests", type=int, default=40, help="queries per connection")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="service query threads")
+    parser.add_argument("--min-rps", type=float, default=0, help="fail below this many requests per second")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.data):
+        print(f"Data file not found: {args.data}")
+        return 1
+    processor = JobDataProcessor(args.data, engine=args.engine)
+    try:
+        elapsed, latencies, failures, stats = asyncio.run(run(processor, args.clients, args.requests, args.workers))
+    finally:
+        processor.close()
+
+    latencies.sort()
+    rps = len(latencies) / elapsed
+    print(f"{len(latencies)} requests from {args.clients} connections in {elapsed:.2f}s: {rps:,.0f} req/s")
+    print(f"latency p50 {statistics.median(latencies) * 1000:.1f} ms, "
+          f"p95 {latencies[int(0.95 * (len(latencies) - 1))] * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms")
+    print(f"computed {stats['queries'] - stats.get('coalesced', 0)}, coalesced {stats.get('coalesced', 0)}, "
+          f"batches {stats.get('batches', 0)}, result cache hit rate {stats['result_cache']['hit_rate']:.0%}")
+    for method, params, status, payload in failures[:5]:
+        print(f"FAILED {status} {method} {params}: {payload.decode(errors='replace')}")
+    if failures or rps < args.min_rps:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
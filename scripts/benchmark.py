@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""Benchmark JobDataProcessor on real or synthetic data
+
+Measures wall time and peak memory of:
+- the pandas pipeline stages: reading the source, clean_data,
+  extract_categories, calculate_metrics, canonicalize_titles and
+  build_indexes, and the time from
+  a cold start to the dashboard's headline numbers, eager and lazy,
+  loading a CSV in chunks (chunksize) instead of whole, loading with the
+  preprocessing spread over --pipeline-workers processes, and appending the
+  last APPEND_ROWS postings to a processor loaded with the rest (append)
+- every get_* query, per engine
+- the dashboard's filter path: what app.py computes when a sidebar filter
+  changes (get_dashboard), for a few filter combinations, computed afresh
+  and again when answered from the result cache
+
+Wall times are the median of --repeat untraced runs. Peak memory is the high
+water mark of Python/numpy allocations (tracemalloc) during one extra run, so
+memory DuckDB holds internally is not included.
+
+Results are written as JSON. Given --baseline (an earlier results file), a
+measurement that is more than --tolerance slower or larger than its baseline,
+and worse by at least --min-delta-s / --min-delta-mb, is reported as a
+regression and the script exits with status 1.
+
+Usage:
+    python scripts/benchmark.py --rows 100k [--engine pandas duckdb] [--repeat 5] [--output bench.json]
+    python scripts/benchmark.py --data SGJobData.csv --baseline bench.json [--tolerance 0.25]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+# Make the project modules importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_synthetic_jobs import default_path, generate, parse_rows
+from sg_job_data_processor import ENGINES, JobDataProcessor
+from sg_job_result_cache import ResultCache
+
+# Rows per chunk for the chunked CSV load
+CHUNKSIZE = 100_000
+# New postings appended incrementally by the append stage
+APPEND_ROWS = 1000
+
+# get_* queries and their arguments as app.py calls them
+QUERIES = {
+    'get_dashboard': lambda p: p.get_dashboard(),
+    'get_market_overview': lambda p: p.get_market_overview(),
+    'get_filter_options': lambda p: p.get_filter_options(),
+    'get_top_roles': lambda p: p.get_top_roles(top_n=20),
+    'get_industry_stats': lambda p: p.get_industry_stats(),
+    'get_employment_by_industry': lambda p: p.get_employment_by_industry(),
+    'get_salary_by_position': lambda p: p.get_salary_by_position(),
+    'get_salary_by_industry': lambda p: p.get_salary_by_industry(top_n=15),
+    'get_salary_by_experience': lambda p: p.get_salary_by_experience(),
+    'get_salary_percentiles': lambda p: p.get_salary_percentiles(group_by='positionLevels'),
+    'get_top_companies': lambda p: p.get_top_companies(top_n=10),
+    'get_top_titles': lambda p: p.get_top_titles(top_n=10),
+    'get_skill_keywords': lambda p: p.get_skill_keywords(top_n=25),
+    'get_trends': lambda p: p.get_trends('main_category', freq='W'),
+    'get_emerging_roles': lambda p: p.get_emerging_roles(top_n=10),
+    'get_similar_jobs': lambda p: p.get_similar_jobs('senior software engineer', top_n=20),
+}
+
+
+def measure(fn, repeat=1, memory=True):
+    """Median/min wall seconds of `repeat` runs of fn, plus peak traced MB of one more run"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    result = {'wall_s': statistics.median(times), 'wall_min_s': min(times), 'runs': repeat}
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            result['peak_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def filter_scenarios(processor):
+    """Sidebar states to replay, built from the dataset's own filter options"""
+    options = processor.get_filter_options()
+    salary_top = int(options['salary_q90']) // 500 * 500
+    industries = [i for i in ('Information Technology', 'Engineering') if i in options['industries']]
+    industries = industries or options['industries'][:1]
+    positions = [p for p in ('Executive', 'Manager') if p in options['positions']] or options['positions'][:2]
+    employment = [e for e in ('Permanent', 'Full Time') if e in options['employment_types']]
+    return {
+        # app.py's initial state
+        'default': dict(salary_range=(0, salary_top), employment=employment),
+        'industry': dict(industries=industries[:1], salary_range=(0, salary_top), employment=employment),
+        'narrow': dict(industries=industries, salary_range=(3000, 8000), position=positions,
+                       employment=employment[:1]),
+        'unfiltered': dict(),
+    }
+
+
+def app_filter_path(processor, filters):
+    """Everything app.py computes on a rerun after a sidebar change"""
+    dashboard = processor.get_dashboard(**filters, salary_bins=50)
+    top_roles = dashboard['top_roles']
+    if len(top_roles) > 0:
+        processor.get_role_benchmark(top_roles.index[0], bins=20, **filters)
+
+
+def first_overview(source, filters, lazy):
+    """Cold start up to the overview metrics app.py shows first"""
+    processor = JobDataProcessor(source, lazy=lazy, cache=ResultCache(max_entries=0))
+    processor.get_market_overview(**filters)
+
+
+def bench_stages(source, repeat, memory):
+    """Time the pandas pipeline stage by stage"""
+    raw = None
+    results = []
+
+    def read():
+        nonlocal raw
+        raw = JobDataProcessor._read_source(source)
+
+    results.append(('read', measure(read, repeat, memory)))
+
+    # A processor over a small slice provides the instance the stages run on
+    processor = JobDataProcessor(raw.head(100), cache=ResultCache(max_entries=0))
+    stages = ['clean_data', 'extract_categories', 'calculate_metrics', 'canonicalize_titles', 'build_indexes']
+    timings = {stage: [] for stage in stages}
+    peaks = {}
+    for run in range(repeat + (1 if memory else 0)):
+        traced = run == repeat
+        processor.df = raw.copy()
+        for stage in stages:
+            if traced:
+                tracemalloc.start()
+            started = time.perf_counter()
+            getattr(processor, stage)()
+            elapsed = time.perf_counter() - started
+            if traced:
+                peaks[stage] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+                tracemalloc.stop()
+            else:
+                timings[stage].append(elapsed)
+    for stage in stages:
+        result = {'wall_s': statistics.median(timings[stage]), 'wall_min_s': min(timings[stage]), 'runs': repeat}
+        if memory:
+            result['peak_mb'] = peaks[stage]
+        results.append((stage, result))
+    return results, len(raw)
+
+
+def bench_append(source, repeat, memory):
+    """Time append() of the source's last APPEND_ROWS postings to a processor loaded with the rest"""
+    raw = JobDataProcessor._read_source(source)
+    added = raw.iloc[-APPEND_ROWS:]
+    processors = []
+
+    def setup():
+        processor = JobDataProcessor(raw.iloc[:-APPEND_ROWS], cache=ResultCache(max_entries=0))
+        processor.trends
+        processors.append(processor)
+
+    for _ in range(repeat + (1 if memory else 0)):
+        setup()
+    return measure(lambda: processors.pop().append(added), repeat, memory)
+
+
+def ensure_duckdb(csv_path):
+    """DuckDB file migrated from `csv_path` (built next to it if missing or stale), plus the migration time"""
+    import migrate_to_duckdb
+
+    db_path = os.path.splitext(csv_path)[0] + '.duckdb'
+    if os.path.exists(db_path) and os.path.getmtime(db_path) >= os.path.getmtime(csv_path):
+        return db_path, None
+    started = time.perf_counter()
+    migrate_to_duckdb.main(['--csv', csv_path, '--db', db_path, '--rebuild'])
+    return db_path, time.perf_counter() - started
+
+
+def run(source, engines, repeat, memory, pipeline_workers=1):
+    results = []
+
+    def record(engine, group, name, result):
+        results.append({'key': f'{engine}/{group}/{name}', 'engine': engine, 'group': group, 'name': name,
+                        **{k: round(v, 6) if isinstance(v, float) else v for k, v in result.items()}})
+        print(f"{engine:>7} {group:>11} {name:<28} {result['wall_s'] * 1000:10.1f} ms"
+              + (f"  {result['peak_mb']:8.1f} MB" if 'peak_mb' in result else ''))
+
+    n_rows = None
+    for engine in engines:
+        engine_source = source
+        if engine == 'duckdb' and not source.lower().endswith('.duckdb'):
+            engine_source, migrate_s = ensure_duckdb(source)
+            if migrate_s is not None:
+                record(engine, 'stage', 'migrate', {'wall_s': migrate_s, 'wall_min_s': migrate_s, 'runs': 1})
+
+        if engine == 'pandas':
+            stage_results, n_rows = bench_stages(engine_source, repeat, memory)
+            for name, result in stage_results:
+                record(engine, 'stage', name, result)
+            record(engine, 'stage', 'append', bench_append(engine_source, repeat, memory))
+
+        processor = None
+
+        def load():
+            nonlocal processor
+            # Without the result cache, so repeated runs measure the computation
+            processor = JobDataProcessor(engine_source, engine=engine, cache=ResultCache(max_entries=0))
+
+        record(engine, 'stage', 'load', measure(load, 1, memory))
+        if engine == 'pandas' and pipeline_workers > 1:
+            record(engine, 'stage', 'load_partitioned', measure(
+                lambda: JobDataProcessor(engine_source, pipeline_workers=pipeline_workers,
+                                         cache=ResultCache(max_entries=0)),
+                1, memory
+            ))
+        if engine == 'pandas' and engine_source.lower().endswith('.csv'):
+            record(engine, 'stage', 'load_chunked', measure(
+                lambda: JobDataProcessor(engine_source, chunksize=CHUNKSIZE, cache=ResultCache(max_entries=0)),
+                1, memory
+            ))
+        for name, query in QUERIES.items():
+            record(engine, 'query', name, measure(lambda: query(processor), repeat, memory))
+        scenarios = filter_scenarios(processor)
+        if engine == 'pandas':
+            for lazy in (False, True):
+                record(engine, 'stage', 'first_overview_lazy' if lazy else 'first_overview',
+                       measure(lambda: first_overview(engine_source, scenarios['default'], lazy), 1, memory))
+        for name, filters in scenarios.items():
+            record(engine, 'filter_path', name, measure(lambda: app_filter_path(processor, filters), repeat, memory))
+        # Revisiting a filter combination the cache already holds
+        processor.cache = ResultCache()
+        for name, filters in scenarios.items():
+            app_filter_path(processor, filters)
+            record(engine, 'cached', name, measure(lambda: app_filter_path(processor, filters), repeat, memory))
+        if n_rows is None:
+            n_rows = processor.get_market_overview()['total_jobs']
+        processor.close()
+    return results, n_rows
+
+
+def compare(results, baseline, tolerance, min_delta_s, min_delta_mb):
+    """Measurements worse than their baseline counterpart beyond the allowed slack"""
+    previous = {entry['key']: entry for entry in baseline['results']}
+    regressions = []
+    for entry in results:
+        before = previous.get(entry['key'])
+        if before is None:
+            continue
+        for metric, min_delta in (('wall_s', min_delta_s), ('peak_mb', min_delta_mb)):
+            if metric not in entry or metric not in before:
+                continue
+            limit = before[metric] * (1 + tolerance)
+            if entry[metric] > limit and entry[metric] - before[metric] >= min_delta:
+                regressions.append({'key': entry['key'], 'metric': metric, 'baseline': before[metric],
+                                    'current': entry[metric], 'ratio': entry[metric] / max(before[metric], 1e-12)})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark JobDataProcessor stages, queries and the app filter path")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--data", help="CSV or .duckdb file to benchmark on")
+    source.add_argument("--rows", default="100k",
+                        help="benchmark on synthetic data of this size (100k, 1m, 10m or a number); "
+                             "generated under data/synthetic/ on first use")
+    parser.add_argument("--engine", nargs="+", choices=ENGINES, default=list(ENGINES), help="engines to benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per measurement")
+    parser.add_argument("--pipeline-workers", type=int, default=os.cpu_count() or 1,
+                        help="processes for the partitioned load (1 skips it)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced peak-memory runs")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown/growth")
+    parser.add_argument("--min-delta-s", type=float, default=0.005, help="ignore slowdowns smaller than this")
+    parser.add_argument("--min-delta-mb", type=float, default=1.0, help="ignore memory growth smaller than this")
+    args = parser.parse_args(argv)
+
+    if args.data:
+        data = args.data
+    else:
+        rows = parse_rows(args.rows)
+        data = default_path(rows)
+        if not os.path.exists(data):
+            print(f"Generating {rows:,} synthetic rows into {data}")
+            generate(rows, data)
+    if not os.path.exists(data):
+        print(f"Data file not found: {data}")
+        return 1
+    results, n_rows = run(data, args.engine, args.repeat, not args.no_memory, args.pipeline_workers)
+    report = {
+        'meta': {
+            'source': data,
+            'rows': int(n_rows),
+            'engines': args.engine,
+            'repeat': args.repeat,
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'pipeline_workers': args.pipeline_workers,
+        },
+        'results': results,
+    }
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_s, args.min_delta_mb)
+        report['regressions'] = regressions
+        for regression in regressions:
+            print(f"REGRESSION {regression['key']} {regression['metric']}: "
+                  f"{regression['baseline']:.4g} -> {regression['current']:.4g} ({regression['ratio']:.2f}x)")
+        if baseline['meta'].get('rows') != report['meta']['rows']:
+            print(f"Warning: baseline ran on {baseline['meta'].get('rows')} rows, this run on {n_rows}.")
+        print(f"{len(regressions)} regression(s) against {args.baseline} (tolerance {args.tolerance:.0%})")
+        status = 1 if regressions else 0
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Export the postings matching the dashboard's filters to a Parquet or Arrow IPC file
+
+Loads the dataset the way app.py does (same source, engine and SG_JOBS_*
+settings, reusing the snapshot in the cache directory), selects the rows
+matching the given filter_data criteria and streams them to --output in
+record batches (JobDataProcessor.export), so memory stays at about one
+batch however many rows match. The format follows the output's extension
+(.parquet or .arrow) unless --format says otherwise. The file is written
+under a temporary name and renamed once complete.
+
+Usage:
+    python scripts/export_jobs.py --output it_jobs.parquet --industries "Information Technology" \\
+        [--salary-range 3000 9000] [--columns metadata_jobPostId title role average_salary] [--compression zstd]
+    python scripts/export_jobs.py --output all_jobs.arrow [--data data/sg_jobs.duckdb --engine duckdb]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Make the project modules importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sg_job_data_processor import ENGINES, JobDataProcessor
+from sg_job_export import COMPRESSIONS, DEFAULT_BATCH_ROWS, EXPORT_FORMATS
+from sg_job_result_cache import ResultCache
+
+# app.py's data sources, in order of preference
+DB_PATH = os.path.join("data", "sg_jobs.duckdb")
+CSV_PATH = "SGJobData.csv"
+
+
+def export_format(output, requested=None):
+    """The format to write: `requested`, else the one whose extension `output` has"""
+    if requested:
+        return requested
+    extension = os.path.splitext(output)[1].lower()
+    for name, format_extension in EXPORT_FORMATS.items():
+        if extension == format_extension:
+            return name
+    raise ValueError(f"can't tell the format of {output!r} from its extension; pass --format")
+
+
+def main(argv=None):
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description="Export filtered postings to Parquet or Arrow IPC")
+    parser.add_argument("--output", required=True, help="file to write (.parquet or .arrow)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="default: from the output's extension")
+    parser.add_argument("--compression", help="codec; parquet: " + ", ".join(COMPRESSIONS['parquet'])
+                        + "; arrow: " + ", ".join(COMPRESSIONS['arrow']) + " (default: the first)")
+    parser.add_argument("--columns", nargs="+", help="columns to export (default: all)")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS, help="rows written at a time")
+    parser.add_argument("--roles", nargs="+", help="role labels or titles")
+    parser.add_argument("--industries", nargs="+")
+    parser.add_argument("--salary-range", nargs=2, type=float, metavar=("MIN", "MAX"))
+    parser.add_argument("--exp-level", nargs="+")
+    parser.add_argument("--position", nargs="+")
+    parser.add_argument("--employment", nargs="+")
+    parser.add_argument("--data", default=DB_PATH if os.path.exists(DB_PATH) else CSV_PATH,
+                        help="CSV or .duckdb file (default: the one app.py would load)")
+    parser.add_argument("--engine", choices=ENGINES, default=env("SG_JOBS_ENGINE", "pandas"))
+    parser.add_argument("--cache-dir", default=env("SG_JOBS_CACHE_DIR", os.path.join("data", "cache")),
+                        help="where the snapshot is reused from (app.py: SG_JOBS_CACHE_DIR)")
+    parser.add_argument("--compact", action="store_true", default=env("SG_JOBS_COMPACT", "0") == "1")
+    args = parser.parse_args(argv)
+
+    try:
+        format = export_format(args.output, args.format)
+    except ValueError as error:
+        print(error)
+        return 1
+    if not os.path.exists(args.data):
+        print(f"Data file not found: {args.data}")
+        return 1
+    started = time.perf_counter()
+    processor = JobDataProcessor(args.data, engine=args.engine, compact=args.compact, cache_dir=args.cache_dir,
+                                 cache=ResultCache(max_entries=0))
+    print(f"Loaded {args.data} in {time.perf_counter() - started:.1f}s")
+
+    filters = dict(roles=args.roles, industries=args.industries, salary_range=args.salary_range,
+                   exp_level=args.exp_level, position=args.position, employment=args.employment)
+    partial = f"{args.output}.partial"
+    started = time.perf_counter()
+    try:
+        rows = processor.export(partial, format=format, columns=args.columns, compression=args.compression,
+                                batch_rows=args.batch_rows, **filters)
+        os.replace(partial, args.output)
+    except (ValueError, KeyError) as error:
+        print(f"Export failed: {error}")
+        return 1
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+        processor.close()
+    print(f"Wrote {rows:,} rows to {args.output} ({os.path.getsize(args.output) / 2 ** 20:.1f} MB) "
+          f"in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
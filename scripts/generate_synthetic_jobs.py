@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""Generate a synthetic job-postings dump shaped like SGJobData.csv
+
+Rows carry every raw `sg_jobs` column (see RAW_SCHEMA in migrate_to_duckdb.py):
+MyCareersFuture-style `categories` JSON, long-tailed titles and companies,
+position-dependent log-normal salaries, experience requirements and posting
+dates. The output is deterministic for a given --rows/--seed and is written in
+chunks, so 10M rows don't need 10M rows of memory.
+
+Usage:
+    python scripts/generate_synthetic_jobs.py --rows 1m [--out data/synthetic/sg_jobs_1m.csv] [--seed 0]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+SIZES = {"100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+OUT_DIR = os.path.join("data", "synthetic")
+CHUNK_ROWS = 500_000
+
+CATEGORIES = [
+    "Accounting / Auditing / Taxation", "Admin / Secretarial", "Advertising / Media",
+    "Architecture / Interior Design", "Banking and Finance", "Building and Construction", "Consulting",
+    "Customer Service", "Design", "Education and Training", "Engineering", "Environment / Health",
+    "Events / Promotions", "F&B", "General Management", "General Work", "Healthcare / Pharmaceutical",
+    "Hospitality", "Human Resources", "Information Technology", "Insurance", "Legal",
+    "Logistics / Supply Chain", "Manufacturing", "Marketing / Public Relations", "Medical / Therapy Services",
+    "Others", "Personal Care / Beauty", "Precision Engineering", "Professional Services",
+    "Public / Civil Service", "Purchasing / Merchandising", "Real Estate / Property Management",
+    "Repair and Maintenance", "Risk Management", "Sales / Retail", "Sciences / Laboratory / R&D",
+    "Security and Investigation", "Social Services", "Telecommunications", "Travel / Tourism", "Wholesale Trade",
+]
+# Relative pay of a category, applied on top of the position level's salary
+CATEGORY_PAY = {
+    "Information Technology": 1.3, "Banking and Finance": 1.35, "Legal": 1.25, "Consulting": 1.2,
+    "Risk Management": 1.3, "Engineering": 1.1, "Sciences / Laboratory / R&D": 1.1, "Insurance": 1.1,
+    "F&B": 0.75, "Hospitality": 0.8, "General Work": 0.7, "Personal Care / Beauty": 0.8,
+    "Admin / Secretarial": 0.85, "Customer Service": 0.85, "Sales / Retail": 0.9,
+}
+
+# position level -> (share of postings, median monthly salary, typical years of experience)
+POSITION_LEVELS = {
+    "Fresh/entry level": (0.08, 2800, 0),
+    "Non-executive": (0.16, 2400, 1),
+    "Junior Executive": (0.10, 3300, 1),
+    "Executive": (0.20, 4200, 2),
+    "Senior Executive": (0.12, 5200, 4),
+    "Professional": (0.14, 6200, 4),
+    "Manager": (0.11, 7600, 6),
+    "Middle Management": (0.05, 9500, 8),
+    "Senior Management": (0.04, 13000, 12),
+}
+EMPLOYMENT_TYPES = {
+    "Permanent": 0.46, "Full Time": 0.30, "Contract": 0.12, "Part Time": 0.04, "Temporary": 0.03,
+    "Internship/Attachment": 0.02, "Flexi work": 0.02, "Freelance": 0.01,
+}
+
+TITLE_PREFIXES = ["", "", "", "Senior ", "Junior ", "Assistant ", "Lead ", "Principal ", "Sr. ", "Associate "]
+TITLE_ROLES = [
+    "Software Engineer", "Data Analyst", "Data Scientist", "Data Engineer", "Accountant", "Auditor",
+    "Sales Executive", "Sales Manager", "Marketing Executive", "Marketing Manager", "Project Manager",
+    "Product Manager", "Business Analyst", "Admin Assistant", "Administrative Executive", "HR Executive",
+    "Recruiter", "Registered Nurse", "Staff Nurse", "Pharmacist", "Teacher", "Tutor", "Chef", "Cook",
+    "Service Crew", "Waiter", "Barista", "Cashier", "Retail Assistant", "Store Manager", "Driver",
+    "Warehouse Assistant", "Logistics Coordinator", "Procurement Executive", "Buyer", "Mechanical Engineer",
+    "Electrical Engineer", "Civil Engineer", "Quantity Surveyor", "Site Supervisor", "Technician",
+    "Maintenance Technician", "QA Engineer", "Test Engineer", "DevOps Engineer", "Cloud Engineer",
+    "Network Engineer", "System Administrator", "Security Analyst", "IT Support Engineer",
+    "Full Stack Developer", "Frontend Developer", "Backend Developer", "Java Developer", "Python Developer",
+    ".NET Developer", "SAP Consultant", "Salesforce Consultant", "Financial Analyst", "Relationship Manager",
+    "Compliance Officer", "Legal Counsel", "Customer Service Officer", "Call Centre Agent", "Security Officer",
+    "Cleaner", "Housekeeper", "Receptionist", "Operations Executive", "Operations Manager",
+    "General Manager", "Research Engineer", "Lab Technician", "Graphic Designer", "UX Designer",
+    "Interior Designer", "Property Agent", "Insurance Agent", "Finance Manager", "Audit Associate",
+    "Tax Associate", "Machine Learning Engineer", "AI Engineer", "Business Development Manager",
+]
+TITLE_SUFFIXES = [
+    "", "", "", "", " (Java)", " (Python)", " - AWS", " - Azure", " (Contract)", " / Excel", " (SQL)",
+    " (Tableau)", " - Power BI", " (React)", " (Node.js)", " (Kubernetes)", " - Finance", " - HR",
+    " (Immediate)", " (1 Year Contract)",
+]
+COMPANY_WORDS = [
+    "Asia", "Pacific", "Lion", "Merlion", "Orchid", "Harbour", "Summit", "Global", "Prime", "Unity",
+    "Zenith", "Apex", "Nova", "Vertex", "Crescent", "Raffles", "Marina", "Jurong", "Tampines", "Straits",
+]
+COMPANY_KINDS = [
+    "TECHNOLOGIES", "SOLUTIONS", "ENGINEERING", "HOLDINGS", "CONSULTING", "LOGISTICS", "HEALTHCARE",
+    "RESOURCES", "SERVICES", "TRADING", "CAPITAL", "FOODS", "SYSTEMS", "PARTNERS",
+]
+COMPANY_FORMS = ["PTE. LTD.", "PTE LTD", "LLP", "LIMITED"]
+
+
+def parse_rows(value):
+    """'100k', '1m', '10m' or a plain row count"""
+    value = value.strip().lower()
+    if value in SIZES:
+        return SIZES[value]
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    return int(float(value[:-1] if multiplier > 1 else value) * multiplier)
+
+
+def zipf_choice(rng, n_values, size, exponent=1.1):
+    """Ranks in [0, n_values) drawn with Zipf-like popularity (rank 0 most common)"""
+    weights = 1.0 / np.arange(1, n_values + 1) ** exponent
+    return rng.choice(n_values, size=size, p=weights / weights.sum())
+
+
+def build_catalogues(rng):
+    """Titles, companies and category payloads that rows draw from"""
+    titles = np.array([prefix + role + suffix
+                       for role in TITLE_ROLES for prefix in TITLE_PREFIXES for suffix in TITLE_SUFFIXES])
+    titles = np.unique(titles)
+    rng.shuffle(titles)
+
+    companies = np.array([f"{a} {b} {kind} {form}" for a in COMPANY_WORDS for b in COMPANY_WORDS if a != b
+                          for kind in COMPANY_KINDS for form in COMPANY_FORMS[:2]])
+    rng.shuffle(companies)
+
+    # Category combinations: mostly one category, some two or three
+    combos = [[c] for c in range(len(CATEGORIES))]
+    for size, count in ((2, 400), (3, 150)):
+        combos += [sorted(rng.choice(len(CATEGORIES), size=size, replace=False)) for _ in range(count)]
+    payloads = np.array([json.dumps([{"id": int(c) + 1, "category": CATEGORIES[c]} for c in combo])
+                         for combo in combos])
+    combo_pay = np.array([np.mean([CATEGORY_PAY.get(CATEGORIES[c], 1.0) for c in combo]) for combo in combos])
+    return titles, companies, payloads, combo_pay
+
+
+def generate_chunk(rng, start, n, catalogues):
+    """One chunk of `n` synthetic postings, numbered from `start`"""
+    titles, companies, payloads, combo_pay = catalogues
+    levels = list(POSITION_LEVELS)
+    shares = np.array([POSITION_LEVELS[level][0] for level in levels])
+    level_idx = rng.choice(len(levels), size=n, p=shares / shares.sum())
+    median_pay = np.array([POSITION_LEVELS[level][1] for level in levels])[level_idx]
+    typical_exp = np.array([POSITION_LEVELS[level][2] for level in levels])[level_idx]
+
+    combo_idx = zipf_choice(rng, len(payloads), n, exponent=0.9)
+    salary_min = np.round(median_pay * combo_pay[combo_idx] * rng.lognormal(0, 0.3, n) / 100) * 100
+    salary_max = np.round(salary_min * rng.uniform(1.1, 1.7, n) / 100) * 100
+    no_salary = rng.random(n) < 0.01
+    salary_min[no_salary] = np.nan
+    salary_max[no_salary] = np.nan
+
+    experience = np.clip(typical_exp + rng.integers(-2, 4, n), 0, 20).astype(float)
+    experience[rng.random(n) < 0.05] = np.nan
+
+    posted = np.datetime64("2023-01-01") + rng.integers(0, 730, n).astype("timedelta64[D]")
+    original = posted - rng.choice([0, 0, 0, 7, 14, 30], n).astype("timedelta64[D]")
+    vacancies = np.where(rng.random(n) < 0.8, 1, rng.integers(2, 11, n))
+    views = rng.negative_binomial(2, 0.01, n)
+    applications = rng.binomial(views, 0.08)
+
+    employment = list(EMPLOYMENT_TYPES)
+    employment_p = np.array(list(EMPLOYMENT_TYPES.values()))
+    ids = np.arange(start, start + n)
+
+    return pd.DataFrame({
+        "categories": payloads[combo_idx],
+        "employmentTypes": np.array(employment)[rng.choice(len(employment), size=n, p=employment_p / employment_p.sum())],
+        "metadata_expiryDate": posted + np.timedelta64(30, "D"),
+        "metadata_isPostedOnBehalf": rng.random(n) < 0.15,
+        "metadata_jobPostId": np.char.add("MCF-SYN-", np.char.zfill(ids.astype(str), 9)),
+        "metadata_newPostingDate": posted,
+        "metadata_originalPostingDate": original,
+        "metadata_repostCount": rng.choice([0, 0, 0, 1, 2], n),
+        "metadata_totalNumberJobApplication": applications,
+        "metadata_totalNumberOfView": views,
+        "minimumYearsExperience": experience,
+        "numberOfVacancies": vacancies,
+        "occupationId": "",
+        "positionLevels": np.array(levels)[level_idx],
+        "postedCompany_name": companies[zipf_choice(rng, len(companies), n, exponent=1.05)],
+        "salary_maximum": salary_max,
+        "salary_minimum": salary_min,
+        "salary_type": "Monthly",
+        "status_id": np.where(rng.random(n) < 0.7, "0", "1"),
+        "status_jobStatus": np.where(rng.random(n) < 0.7, "Open", "Closed"),
+        "title": titles[zipf_choice(rng, len(titles), n)],
+        "average_salary": (salary_min + salary_max) / 2,
+    })
+
+
+def generate(rows, out, seed=0, chunk_rows=CHUNK_ROWS):
+    """Write `rows` synthetic postings to the CSV at `out`"""
+    rng = np.random.default_rng(seed)
+    catalogues = build_catalogues(rng)
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    tmp_out = f"{out}.{os.getpid()}.tmp"
+    with open(tmp_out, "w", newline="") as f:
+        for start in range(0, rows, chunk_rows):
+            chunk = generate_chunk(rng, start, min(chunk_rows, rows - start), catalogues)
+            chunk.to_csv(f, header=start == 0, index=False)
+    os.replace(tmp_out, out)
+
+
+def default_path(rows):
+    label = next((name for name, size in SIZES.items() if size == rows), str(rows))
+    return os.path.join(OUT_DIR, f"sg_jobs_{label}.csv")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic SGJobData.csv-shaped dump")
+    parser.add_argument("--rows", default="100k", help="row count: 100k, 1m, 10m or a number")
+    parser.add_argument("--out", help=f"output CSV (default: {OUT_DIR}/sg_jobs_<rows>.csv)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args(argv)
+
+    rows = parse_rows(args.rows)
+    out = args.out or default_path(rows)
+    started = time.perf_counter()
+    generate(rows, out, seed=args.seed)
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {rows:,} rows to {out} in {elapsed:.1f}s ({os.path.getsize(out) / 2 ** 20:,.0f} MB)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,37 @@
 #!/usr/bin/env python3
 """Migrate SGJobData.csv into a DuckDB database file at data/sg_jobs.duckdb
 
+The CSV is read with an explicit schema (no type auto-detection), cleaned and
+enriched with the same SQL the dashboard's duckdb engine uses, and merged into
+table `sg_jobs` by job key (metadata_jobPostId). Re-running it with a newer
+dump therefore refreshes the database in place:
+
+- upsert (default): new postings are inserted, known ones are replaced
+- append: only postings whose key is not in the table yet are inserted
+
+The merge runs on a copy of the database, written as a new generation file
+next to --db (data/sg_jobs.<n>.duckdb), which is then published by pointing
+--db (a symlink) at it atomically. Dashboards reading the database keep
+serving from the previous generation while the migration runs and switch to
+the new one within a second of it being published, so no reader ever holds
+up the migration or sees a half-written table. --in-place instead writes to
+the current file directly, which needs every reader to be stopped.
+
+average_salary, engagement_score, exp_category, main_category and the parsed
+category_list are materialized as columns, so readers don't recompute them.
+After every merge the titles of the whole table are clustered into canonical
+roles again (sg_job_titles), and the `role` column of the rows whose role
+changed is rewritten.
+
 Usage:
-    python scripts/migrate_to_duckdb.py
+    python scripts/migrate_to_duckdb.py [--csv SGJobData.csv] [--db data/sg_jobs.duckdb]
+                                        [--mode upsert|append] [--rebuild] [--in-place] [--keep 3]
 """
+import argparse
 import os
+import shutil
 import sys
+import time
 
 try:
     import duckdb
@@ -13,26 +39,200 @@ except Exception as e:
     print("duckdb package is required. Install with: pip install duckdb")
     raise
 
+# Make the project modules importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sg_job_data_processor import DUCKDB_JOBS_SQL, ROLE_COLUMN, assign_roles
+from sg_job_duckdb_pool import (DEFAULT_KEEP_GENERATIONS, current_generation, new_generation_path,
+                                publish_generation)
+
 CSV = "SGJobData.csv"
 DB_DIR = "data"
 DB_PATH = os.path.join(DB_DIR, "sg_jobs.duckdb")
 
-def main():
-    if not os.path.exists(CSV):
-        print(f"CSV file not found: {CSV}")
+JOB_KEY = "metadata_jobPostId"
+
+# Column types of the source CSV; every column is read as text and cast to these
+RAW_SCHEMA = {
+    "categories": "VARCHAR",
+    "employmentTypes": "VARCHAR",
+    "metadata_expiryDate": "DATE",
+    "metadata_isPostedOnBehalf": "BOOLEAN",
+    "metadata_jobPostId": "VARCHAR",
+    "metadata_newPostingDate": "DATE",
+    "metadata_originalPostingDate": "DATE",
+    "metadata_repostCount": "INTEGER",
+    "metadata_totalNumberJobApplication": "INTEGER",
+    "metadata_totalNumberOfView": "INTEGER",
+    "minimumYearsExperience": "DOUBLE",
+    "numberOfVacancies": "INTEGER",
+    "occupationId": "VARCHAR",
+    "positionLevels": "VARCHAR",
+    "postedCompany_name": "VARCHAR",
+    "salary_maximum": "DOUBLE",
+    "salary_minimum": "DOUBLE",
+    "salary_type": "VARCHAR",
+    "status_id": "VARCHAR",
+    "status_jobStatus": "VARCHAR",
+    "title": "VARCHAR",
+    "average_salary": "DOUBLE",
+}
+
+# Columns derived by DUCKDB_JOBS_SQL and stored alongside the raw ones
+DERIVED_SCHEMA = {
+    "category_list": "VARCHAR[]",
+    "main_category": "VARCHAR",
+    "engagement_score": "DOUBLE",
+    "exp_category": "VARCHAR",
+}
+
+# Canonical role of each title, assigned over the whole table after every merge (assign_roles)
+ROLE_SCHEMA = {ROLE_COLUMN: "VARCHAR"}
+
+
+def create_table(conn, rebuild=False):
+    """Create `sg_jobs` with the explicit schema, or check an existing table matches it"""
+    if rebuild:
+        conn.execute("DROP TABLE IF EXISTS sg_jobs")
+    schema = {**RAW_SCHEMA, **DERIVED_SCHEMA, **ROLE_SCHEMA}
+    columns = ",\n    ".join(f'"{col}" {col_type}' for col, col_type in schema.items())
+    conn.execute(f"CREATE TABLE IF NOT EXISTS sg_jobs (\n    {columns},\n    PRIMARY KEY ({JOB_KEY})\n)")
+
+    existing = {row[0] for row in conn.execute("DESCRIBE sg_jobs").fetchall()}
+    missing = [col for col in {**RAW_SCHEMA, **DERIVED_SCHEMA} if col not in existing]
+    if missing:
+        print(f"Existing sg_jobs table predates the current schema (missing: {', '.join(missing)}).")
+        print("Re-run with --rebuild to recreate it.")
+        sys.exit(1)
+    # Older tables gain the role column here, before any row changes: added after the merge
+    # in the same transaction, it makes the commit fail
+    for col, col_type in ROLE_SCHEMA.items():
+        if col not in existing:
+            conn.execute(f'ALTER TABLE sg_jobs ADD COLUMN "{col}" {col_type}')
+
+
+def stage_csv(conn, csv_path):
+    """Load the CSV into typed temp table `staged_jobs`, one row per job key"""
+    escaped = csv_path.replace("'", "''")
+    conn.execute(f"CREATE OR REPLACE TEMP VIEW raw_csv AS SELECT * FROM read_csv('{escaped}', header = true, all_varchar = true)")
+    present = {row[0] for row in conn.execute("DESCRIBE raw_csv").fetchall()}
+    if JOB_KEY not in present:
+        print(f"CSV has no {JOB_KEY} column; cannot merge by job key.")
+        sys.exit(1)
+    absent = [col for col in RAW_SCHEMA if col not in present]
+    if absent:
+        print(f"Warning: CSV lacks columns {', '.join(absent)}; they will be NULL.")
+
+    casts = ",\n    ".join(
+        f'TRY_CAST("{col}" AS {col_type}) AS "{col}"' if col in present else f'CAST(NULL AS {col_type}) AS "{col}"'
+        for col, col_type in RAW_SCHEMA.items()
+    )
+    # Keep the most recent posting when a dump repeats a key
+    conn.execute(f"""
+        CREATE OR REPLACE TEMP TABLE staged_jobs AS
+        SELECT {casts}
+        FROM raw_csv
+        WHERE {JOB_KEY} IS NOT NULL
+        QUALIFY row_number() OVER (
+            PARTITION BY {JOB_KEY} ORDER BY TRY_CAST(metadata_newPostingDate AS DATE) DESC NULLS LAST
+        ) = 1
+    """)
+    total = conn.execute("SELECT COUNT(*) FROM raw_csv").fetchone()[0]
+    staged = conn.execute("SELECT COUNT(*) FROM staged_jobs").fetchone()[0]
+    return total, staged
+
+
+def merge_jobs(conn, mode):
+    """Merge the staged rows into `sg_jobs`; returns (inserted, replaced)"""
+    known = conn.execute(
+        f"SELECT COUNT(*) FROM staged_jobs s JOIN sg_jobs j USING ({JOB_KEY})"
+    ).fetchone()[0]
+    staged = conn.execute("SELECT COUNT(*) FROM staged_jobs").fetchone()[0]
+
+    jobs_sql = DUCKDB_JOBS_SQL.format(source="staged_jobs")
+    if mode == "upsert":
+        conn.execute(f"INSERT OR REPLACE INTO sg_jobs BY NAME {jobs_sql}")
+        return staged - known, known
+    conn.execute(f"INSERT OR IGNORE INTO sg_jobs BY NAME {jobs_sql}")
+    return staged - known, 0
+
+
+def start_generation(db_path, rebuild=False):
+    """A new generation file for the database at `db_path`, starting as a copy of the current one"""
+    generation = new_generation_path(db_path)
+    if os.path.exists(db_path) and not rebuild:
+        current = current_generation(db_path)
+        shutil.copyfile(current, generation)
+        if os.path.exists(f"{current}.wal"):
+            shutil.copyfile(f"{current}.wal", f"{generation}.wal")
+    return generation
+
+
+def discard_generation(generation):
+    for leftover in (generation, f"{generation}.wal"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load SGJobData.csv into DuckDB")
+    parser.add_argument("--csv", default=CSV, help="source CSV dump")
+    parser.add_argument("--db", default=DB_PATH, help="target DuckDB file")
+    parser.add_argument("--mode", choices=["upsert", "append"], default="upsert",
+                        help="replace known postings (upsert) or only add new ones (append)")
+    parser.add_argument("--rebuild", action="store_true", help="drop and recreate sg_jobs first")
+    parser.add_argument("--in-place", action="store_true",
+                        help="modify --db directly instead of publishing a new generation (stop the readers first)")
+    parser.add_argument("--keep", type=int, default=DEFAULT_KEEP_GENERATIONS,
+                        help="generation files to keep, the new one included")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.csv):
+        print(f"CSV file not found: {args.csv}")
         sys.exit(1)
 
-    os.makedirs(DB_DIR, exist_ok=True)
+    os.makedirs(os.path.dirname(args.db) or ".", exist_ok=True)
 
+    # Readers keep the current generation open read-only; the merge goes to a new one
+    target = args.db if args.in_place else start_generation(args.db, rebuild=args.rebuild)
     # Connect to DuckDB file (will create if missing)
-    conn = duckdb.connect(DB_PATH)
+    conn = duckdb.connect(target)
     try:
-        # Create table from CSV; use read_csv_auto for best type inference
-        print(f"Importing {CSV} into {DB_PATH} (table: sg_jobs)")
-        conn.execute("CREATE TABLE IF NOT EXISTS sg_jobs AS SELECT * FROM read_csv_auto(?)", [CSV])
-        print("Import complete.")
+        print(f"Importing {args.csv} into {target} (table: sg_jobs, mode: {args.mode})")
+        started = time.perf_counter()
+        conn.execute("BEGIN TRANSACTION")
+        try:
+            create_table(conn, rebuild=args.rebuild)
+            total, staged = stage_csv(conn, args.csv)
+            staged_at = time.perf_counter()
+            inserted, replaced = merge_jobs(conn, args.mode)
+            merged_at = time.perf_counter()
+            title_roles = assign_roles(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            conn.close()
+            if not args.in_place:
+                discard_generation(target)
+            raise
+        finished = time.perf_counter()
+
+        elapsed = finished - started
+        print(f"Read {total:,} rows ({total - staged:,} without key or duplicated) "
+              f"in {staged_at - started:.1f}s ({total / max(staged_at - started, 1e-9):,.0f} rows/s)")
+        print(f"Merged {staged:,} postings: {inserted:,} new, {replaced:,} replaced "
+              f"in {merged_at - staged_at:.1f}s ({staged / max(merged_at - staged_at, 1e-9):,.0f} rows/s)")
+        print(f"Clustered {len(title_roles.titles):,} titles into {len(title_roles):,} roles "
+              f"in {finished - merged_at:.1f}s")
+        rows = conn.execute("SELECT COUNT(*) FROM sg_jobs").fetchone()[0]
+        print(f"Import complete: sg_jobs has {rows:,} rows ({total / max(elapsed, 1e-9):,.0f} rows/s overall).")
+        # Folded into the file, so the published generation is complete without its WAL
+        conn.execute("CHECKPOINT")
     finally:
         conn.close()
+    if not args.in_place:
+        deleted = publish_generation(args.db, target, keep=args.keep)
+        print(f"Published {target} as {args.db}" + (f" (deleted {len(deleted)} old generations)" if deleted else ""))
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Serve JobDataProcessor's queries as an HTTP/JSON API (see sg_job_service)
+
+Usage:
+    python scripts/serve_api.py [--data data/sg_jobs.duckdb] [--engine duckdb] [--host 127.0.0.1] [--port 8600]
+                                [--workers 4] [--duckdb-threads 2] [--duckdb-memory 2GB] [--cache-dir data/cache]
+                                [--refresh-s 60]
+
+    curl -s localhost:8600/query -d '{"method": "get_top_roles", "params": {"top_n": 5}}'
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+# Make the project modules importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sg_job_data_processor import ENGINES, JobDataProcessor
+from sg_job_duckdb_pool import DuckDBPool
+from sg_job_service import DEFAULT_BATCH_WINDOW_S, DEFAULT_MAX_PENDING, DEFAULT_PORT, DEFAULT_WORKERS, serve
+
+DB_PATH = os.path.join("data", "sg_jobs.duckdb")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the dashboard's queries over HTTP/JSON")
+    parser.add_argument("--data", default=DB_PATH, help="CSV or .duckdb file")
+    parser.add_argument("--engine", choices=ENGINES, default="duckdb")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="threads running queries")
+    parser.add_argument("--batch-window-ms", type=float, default=DEFAULT_BATCH_WINDOW_S * 1000,
+                        help="how long queued queries wait to be handed to the workers together")
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                        help="distinct queries waiting before new ones get 503")
+    parser.add_argument("--duckdb-threads", type=int, help="DuckDB threads for this process (duckdb engine)")
+    parser.add_argument("--duckdb-memory", help="DuckDB memory limit for this process, e.g. 2GB (duckdb engine)")
+    parser.add_argument("--cache-dir", help="snapshot directory (pandas engine)")
+    parser.add_argument("--refresh-s", type=float,
+                        help="take in postings added to the data file this often, in seconds (see "
+                             "JobDataProcessor.refresh)")
+    args = parser.parse_args(argv)
+    # The service reports start, stop and failed refreshes through the sg_jobs.service logger
+    service_logger = logging.getLogger("sg_jobs.service")
+    service_logger.setLevel(logging.INFO)
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    service_logger.addHandler(handler)
+
+    if not os.path.exists(args.data):
+        print(f"Data file not found: {args.data}")
+        return 1
+    pool = None
+    if args.engine == "duckdb" and args.data.lower().endswith(".duckdb"):
+        # One cursor per query thread, read-only so several servers can share the file
+        pool = DuckDBPool(args.data, size=args.workers, threads=args.duckdb_threads, memory_limit=args.duckdb_memory)
+    processor = JobDataProcessor(args.data, engine=args.engine, cache_dir=args.cache_dir, pool=pool)
+    try:
+        asyncio.run(serve(processor, args.host, args.port, workers=args.workers,
+                          batch_window_s=args.batch_window_ms / 1000, max_pending=args.max_pending,
+                          refresh_s=args.refresh_s))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        processor.close()
+        if pool is not None:
+            pool.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
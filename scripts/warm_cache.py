@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Prepare the dashboard's data ahead of time, so the first visitor after a deploy doesn't wait
+
+Loads the dataset the way app.py does (same source, engine and SG_JOBS_*
+settings), which processes it and writes the Parquet snapshot if there is
+none yet, builds the indexes, then runs the queries app.py runs for its
+initial filters (and optionally for each of the largest industries picked
+alone), builds the similar-jobs index, and saves the indexes, trend rollups
+and query results next to the snapshot (JobDataProcessor.save_state). The Streamlit process started
+afterwards loads all of it instead of recomputing it.
+
+Only the pandas engine keeps a snapshot; with the duckdb engine the queries
+just run once, warming the database file in the OS page cache.
+
+Usage:
+    python scripts/warm_cache.py [--data SGJobData.csv] [--industries 5] && streamlit run app.py
+"""
+import argparse
+import os
+import sys
+import time
+
+# Make the project modules importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sg_job_data_processor import ENGINES, JobDataProcessor
+from sg_job_result_cache import ResultCache
+from sg_job_sketches import DEFAULT_CAPACITY, DEFAULT_K
+
+# app.py's data sources, in order of preference
+DB_PATH = os.path.join("data", "sg_jobs.duckdb")
+CSV_PATH = "SGJobData.csv"
+
+
+def app_filters(options, industries=()):
+    """app.py's initial sidebar filters, with `industries` selected"""
+    return dict(
+        industries=list(industries),
+        salary_range=(0, int(options['salary_q90'])),
+        position=[],
+        employment=['Permanent', 'Full Time'],
+    )
+
+
+def warm(processor, filters):
+    """Run the queries app.py runs for one filter combination, with the same arguments"""
+    processor.get_market_overview(**filters)
+    dashboard = processor.get_dashboard(**filters, top_roles=20, top_companies=10, top_industries=15,
+                                        top_skills=25, top_skill_salaries=10, salary_bins=50)
+    top_roles = dashboard['top_roles']
+    if len(top_roles) > 0:
+        # The role benchmark's selectbox starts on the first role
+        processor.get_role_benchmark(top_roles.index[0], bins=20, **filters)
+    top_industries = list(dashboard['industry_stats'].index[:5]) if len(dashboard['industry_stats']) > 0 else []
+    processor.get_trends('main_category', freq='W', keys=top_industries)
+    processor.get_emerging_roles(top_n=10, window_days=28)
+    # Loading built it, except in lazy mode; built ahead so the first "Find Similar Jobs" search doesn't wait
+    processor.similar_jobs
+    return dashboard
+
+
+def main(argv=None):
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description="Build the dashboard's snapshot, indexes and common query results")
+    parser.add_argument("--data", default=DB_PATH if os.path.exists(DB_PATH) else CSV_PATH,
+                        help="CSV or .duckdb file (default: the one app.py would load)")
+    parser.add_argument("--engine", choices=ENGINES, default=env("SG_JOBS_ENGINE", "pandas"))
+    parser.add_argument("--cache-dir", default=env("SG_JOBS_CACHE_DIR", os.path.join("data", "cache")),
+                        help="where the snapshot and saved state go (app.py: SG_JOBS_CACHE_DIR)")
+    parser.add_argument("--compact", action="store_true", default=env("SG_JOBS_COMPACT", "0") == "1")
+    parser.add_argument("--lazy", action="store_true", default=env("SG_JOBS_LAZY", "0") == "1")
+    parser.add_argument("--chunksize", type=int, default=int(env("SG_JOBS_CHUNKSIZE", "0")) or None)
+    parser.add_argument("--pipeline-workers", type=int, default=int(env("SG_JOBS_WORKERS", "1")))
+    parser.add_argument("--sketch-k", type=int, default=int(env("SG_JOBS_SKETCH_K", DEFAULT_K)))
+    parser.add_argument("--sketch-capacity", type=int, default=int(env("SG_JOBS_SKETCH_CAPACITY", DEFAULT_CAPACITY)))
+    parser.add_argument("--industries", type=int, default=0,
+                        help="also warm each of this many largest industries selected on its own")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.data):
+        print(f"Data file not found: {args.data}")
+        return 1
+    started = time.perf_counter()
+    cache = ResultCache(max_mb=float(env("SG_JOBS_RESULT_CACHE_MB", "256")))
+    # app.py doesn't stream .duckdb sources in chunks
+    chunksize = None if args.data.lower().endswith('.duckdb') else args.chunksize
+    processor = JobDataProcessor(args.data, engine=args.engine, compact=args.compact, cache_dir=args.cache_dir,
+                                 cache=cache, lazy=args.lazy, chunksize=chunksize,
+                                 pipeline_workers=args.pipeline_workers, sketch_k=args.sketch_k,
+                                 sketch_capacity=args.sketch_capacity)
+    if processor.engine == 'pandas':
+        # Built before any query, so building them doesn't clear the results warmed below
+        processor.ensure_indexes()
+    print(f"Loaded {args.data} in {time.perf_counter() - started:.1f}s")
+
+    options = processor.get_filter_options()
+    dashboard = warm(processor, app_filters(options))
+    # The sidebar lists single industries; jobs in several are tallied under their combination
+    sidebar_industries = set(options['industries'])
+    largest = [name for name in dashboard['industry_stats'].index if name in sidebar_industries]
+    for industry in largest[:args.industries]:
+        warm(processor, app_filters(options, [industry]))
+    print(f"Warmed {len(processor.cache)} query results in {time.perf_counter() - started:.1f}s")
+
+    if processor.engine == 'pandas':
+        processor.save_state()
+        print(f"Saved the indexes and results under {args.cache_dir}")
+    processor.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
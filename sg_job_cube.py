@@ -0,0 +1,378 @@
+import numpy as np
+import pandas as pd
+
+# Dimensions of the job cells: every job counts once, in the cell of its position,
+# employment type, experience band and salary bucket
+DIMENSIONS = ['positionLevels', 'employmentTypes', 'exp_category', 'salary_bucket']
+# Dimensions of the industry cells: a job counts once per industry it lists (job_categories),
+# so industries are single categories rather than main_category's combinations of them.
+# Salaries are left out, which would multiply the cells by the salary buckets.
+INDUSTRY_DIMENSIONS = ['industry', 'positionLevels', 'employmentTypes', 'exp_category']
+MEASURES = [
+    'average_salary', 'salary_minimum', 'salary_maximum', 'numberOfVacancies',
+    'metadata_totalNumberJobApplication', 'metadata_totalNumberOfView',
+    'engagement_score', 'minimumYearsExperience'
+]
+STATS = ['n', 'sum', 'sumsq', 'min', 'max']
+# Non-numeric columns whose non-missing values are counted per cell
+COUNTED = ['title']
+# Frame columns build() reads
+COLUMNS = DIMENSIONS[:-1] + MEASURES + COUNTED
+
+# Width of a salary bucket; matches the dashboard's salary slider step
+SALARY_STEP = 500
+
+# Up to this many possible group-by combinations, groups are found by counting rather than sorting
+DENSE_GROUPS = 1 << 22
+
+
+def salary_bucket_keys(salary, step=SALARY_STEP):
+    """Bucket key per salary: even keys hold exact multiples of `step`, odd keys the gaps between.
+
+    Keeping the multiples in their own buckets lets any inclusive range with
+    multiple-of-step bounds, like the slider's, be answered exactly. NaN -> -1.
+    """
+    salary = np.asarray(salary, dtype=float)
+    known = ~np.isnan(salary)
+    steps = np.floor(np.where(known, salary, 0) / step)
+    keys = 2 * steps + (np.where(known, salary, 0) != steps * step)
+    return np.where(known, keys, -1).astype(np.int64)
+
+
+def group_ids(codes, sizes):
+    """Flat ids of the groups present and each element's group number, from per-dimension codes (0..size-1)"""
+    flat = np.ravel_multi_index(codes, sizes)
+    if np.prod(sizes, dtype=float) <= DENSE_GROUPS:
+        # Few enough combinations to find the present ones by counting instead of sorting
+        present = np.bincount(flat, minlength=int(np.prod(sizes))) > 0
+        return np.flatnonzero(present), (np.cumsum(present) - 1)[flat]
+    return np.unique(flat, return_inverse=True)
+
+
+def measure_totals(inverse, n_groups, values):
+    """STATS of `values` (NaN ignored) per group, where inverse gives each value's group"""
+    values = np.asarray(values, dtype=float)
+    known = ~np.isnan(values)
+    filled = np.where(known, values, 0.0)
+    low, high = np.full(n_groups, np.nan), np.full(n_groups, np.nan)
+    np.fmin.at(low, inverse, values)
+    np.fmax.at(high, inverse, values)
+    return {
+        'n': np.bincount(inverse, weights=known, minlength=n_groups),
+        'sum': np.bincount(inverse, weights=filled, minlength=n_groups),
+        'sumsq': np.bincount(inverse, weights=filled * filled, minlength=n_groups),
+        'min': low,
+        'max': high,
+    }
+
+
+def rollup_frame(jobs, counted, totals, group_by=(), index_values=None):
+    """The rollup() frame from per-group job counts, COUNTED counts and measure STATS
+
+    Like pandas groupby, groups whose key is missing are left out.
+    """
+    result = {'jobs': np.asarray(jobs).astype(np.int64)}
+    for col, counts in counted.items():
+        result[f'{col}_count'] = np.asarray(counts).astype(np.int64)
+    for measure, stats in totals.items():
+        n, total, sumsq = stats['n'], stats['sum'], stats['sumsq']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(n > 0, total / n, np.nan)
+            var = np.where(n > 1, (sumsq - total * mean) / (n - 1), np.nan)
+        result[f'{measure}_count'] = n.astype(np.int64)
+        result[f'{measure}_sum'] = total
+        result[f'{measure}_mean'] = mean
+        result[f'{measure}_std'] = np.sqrt(np.clip(var, 0, None))
+        result[f'{measure}_min'] = stats['min']
+        result[f'{measure}_max'] = stats['max']
+
+    if not group_by:
+        return pd.DataFrame(result)
+    keyed = ~np.logical_or.reduce([pd.isna(values) for values in index_values])
+    if not keyed.all():
+        result = {col: values[keyed] for col, values in result.items()}
+        index_values = [values[keyed] for values in index_values]
+    if len(group_by) == 1:
+        index = pd.Index(index_values[0], name=group_by[0])
+    else:
+        index = pd.MultiIndex.from_arrays(index_values, names=list(group_by))
+    return pd.DataFrame(result, index=index)
+
+
+def salary_bands(salary, step=SALARY_STEP):
+    """Lower bound of each salary's `step`-wide band, NaN for missing salaries"""
+    salary = np.asarray(salary, dtype=float)
+    return np.floor(salary / step) * step
+
+
+def rollup_rows(df, rows, group_by=(), measures=None, keys=None, salary_step=SALARY_STEP):
+    """JobCube.rollup of the rows of `df` at positions `rows`, aggregated directly
+
+    For criteria the cube doesn't cover. keys optionally holds precomputed
+    group codes and labels per column (sg_job_selection.group_keys); other
+    group-by columns are factorized over the rows, and salary_bucket groups
+    by salary band as the cube does.
+    """
+    group_by = list(group_by)
+    measures = MEASURES if measures is None else list(measures)
+    rows = np.asarray(rows)
+    group_codes, group_labels = [], []
+    for dim in group_by:
+        if keys is not None and dim in keys:
+            codes, labels = keys[dim]
+            codes = codes[rows]
+        elif dim == 'salary_bucket':
+            codes, labels = pd.factorize(salary_bands(df['average_salary'].to_numpy()[rows], salary_step),
+                                         use_na_sentinel=True)
+        else:
+            codes, labels = pd.factorize(df[dim].to_numpy()[rows], use_na_sentinel=True)
+        group_codes.append(np.asarray(codes, dtype=np.int64))
+        group_labels.append(np.asarray(labels, dtype=object))
+    if group_by:
+        # Rows missing a group key belong to no group
+        keep = np.logical_and.reduce([codes >= 0 for codes in group_codes])
+        rows, group_codes = rows[keep], [codes[keep] for codes in group_codes]
+        sizes = [max(len(labels), 1) for labels in group_labels]
+        ids, inverse = group_ids(group_codes, sizes)
+        index_values = [labels[codes] for codes, labels in zip(np.unravel_index(ids, sizes), group_labels)]
+        n_groups = len(ids)
+    else:
+        inverse, index_values, n_groups = np.zeros(len(rows), dtype=np.int64), None, 1
+
+    jobs = np.bincount(inverse, minlength=n_groups)
+    counted = {col: np.bincount(inverse, weights=df[col].notna().to_numpy()[rows], minlength=n_groups)
+               for col in COUNTED}
+    totals = {measure: measure_totals(inverse, n_groups, df[measure].to_numpy()[rows]) for measure in measures}
+    return rollup_frame(jobs, counted, totals, group_by, index_values)
+
+
+class CubeCells:
+    """One table of pre-aggregated cells: dimension labels, job count, COUNTED counts and STATS per measure"""
+
+    def __init__(self, cells, dimensions):
+        self.cells = cells.reset_index(drop=True)
+        self.dimensions = list(dimensions)
+        for dim in self.dimensions:
+            if dim != 'salary_bucket':
+                self.cells[dim] = self.cells[dim].astype('category')
+
+        self._codes = {}
+        self._labels = {}
+        for dim in self.dimensions:
+            codes, labels = pd.factorize(self.cells[dim], use_na_sentinel=False)
+            self._codes[dim] = codes
+            self._labels[dim] = np.asarray(labels, dtype=np.int64 if dim == 'salary_bucket' else object)
+        # One row per cell: the additive totals (jobs, COUNTED counts, then n/sum/sumsq of every
+        # measure) and the measures' minima and maxima, so a rollup reduces all measures at once
+        additive = ['jobs'] + [f'{col}_count' for col in COUNTED]
+        additive += [f'{measure}_{stat}' for measure in MEASURES for stat in ('n', 'sum', 'sumsq')]
+        self._sums = self.cells[additive].to_numpy(dtype=float)
+        self._mins = self.cells[[f'{measure}_min' for measure in MEASURES]].to_numpy(dtype=float)
+        self._maxs = self.cells[[f'{measure}_max' for measure in MEASURES]].to_numpy(dtype=float)
+
+    def __getstate__(self):
+        # The per-cell arrays are read from the cells again rather than pickled a second time
+        return {'cells': self.cells, 'dimensions': self.dimensions}
+
+    def __setstate__(self, state):
+        self.__init__(state['cells'], state['dimensions'])
+
+    @classmethod
+    def build(cls, keys, values, counted, dimensions):
+        """Aggregate rows into cells
+
+        keys maps each dimension to the rows' labels, values each measure to
+        the rows' values and counted each COUNTED column to whether the row
+        has one.
+        """
+        codes = [pd.factorize(keys[dim], use_na_sentinel=False) for dim in dimensions]
+        sizes = [max(len(labels), 1) for _, labels in codes]
+        if len(codes[0][0]):
+            ids, inverse = group_ids([np.asarray(c, dtype=np.int64) for c, _ in codes], sizes)
+        else:
+            ids, inverse = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        n_cells = len(ids)
+
+        cells = {}
+        for dim, (_, labels), dim_codes in zip(dimensions, codes, np.unravel_index(ids, sizes)):
+            cells[dim] = np.asarray(labels, dtype=np.int64 if dim == 'salary_bucket' else object)[dim_codes]
+        cells['jobs'] = np.bincount(inverse, minlength=n_cells)
+        for col in COUNTED:
+            cells[f'{col}_count'] = np.bincount(inverse, weights=counted[col], minlength=n_cells)
+        for measure in MEASURES:
+            for stat, totals in measure_totals(inverse, n_cells, values[measure]).items():
+                cells[f'{measure}_{stat}'] = totals
+        return cls(pd.DataFrame(cells), dimensions)
+
+    def merge(self, other):
+        """Combine with cells over other rows"""
+        combined = pd.concat([self.cells, other.cells], ignore_index=True)
+        aggregations = {'jobs': 'sum', **{f'{col}_count': 'sum' for col in COUNTED}}
+        for measure in MEASURES:
+            for stat in STATS:
+                aggregations[f'{measure}_{stat}'] = {'min': 'min', 'max': 'max'}.get(stat, 'sum')
+        cells = combined.groupby(self.dimensions, dropna=False, observed=True, sort=False).agg(aggregations)
+        return CubeCells(cells.reset_index(), self.dimensions)
+
+    def label_mask(self, dim, values):
+        """Cells whose `dim` label is one of `values`"""
+        lookup = np.fromiter((label in values for label in self._labels[dim]), dtype=bool,
+                             count=len(self._labels[dim]))
+        return lookup[self._codes[dim]]
+
+    def labels(self, dim):
+        return self._labels[dim]
+
+    def salary_mask(self, low, high):
+        """Cells whose salary bucket key is within [low, high]"""
+        keys = self._labels['salary_bucket'][self._codes['salary_bucket']]
+        return (keys >= low) & (keys <= high)
+
+    def rollup(self, mask, group_by, measures, salary_step):
+        """rollup_frame of the cells in `mask`, grouped by `group_by` dimensions"""
+        selected = np.flatnonzero(mask)
+        positions = [MEASURES.index(measure) for measure in measures]
+        columns = list(range(1 + len(COUNTED)))
+        columns += [1 + len(COUNTED) + 3 * position + stat for position in positions for stat in range(3)]
+        sums = self._sums[selected][:, columns]
+        mins, maxs = self._mins[selected][:, positions], self._maxs[selected][:, positions]
+        if group_by:
+            group_codes, group_labels = [], []
+            for dim in group_by:
+                codes, labels = self._codes[dim][selected], self._labels[dim]
+                if dim == 'salary_bucket':
+                    bands = np.where(labels >= 0, labels // 2 * salary_step, np.nan)
+                    codes, labels = pd.factorize(bands[codes], use_na_sentinel=False)
+                    labels = np.asarray(labels, dtype=object)
+                group_codes.append(codes)
+                group_labels.append(labels)
+            sizes = [max(len(labels), 1) for labels in group_labels]
+            # Cells sorted by group, so every group's cells reduce as one contiguous run
+            flat = np.ravel_multi_index(group_codes, sizes)
+            order = np.argsort(flat, kind='stable')
+            flat = flat[order]
+            starts = np.flatnonzero(np.diff(flat, prepend=-1))
+            index_values = [labels[codes] for codes, labels in zip(np.unravel_index(flat[starts], sizes), group_labels)]
+            if len(starts):
+                sums = np.add.reduceat(sums[order], starts)
+                mins, maxs = np.fmin.reduceat(mins[order], starts), np.fmax.reduceat(maxs[order], starts)
+        else:
+            index_values = None
+            sums = sums.sum(axis=0, keepdims=True)
+            if len(selected):
+                mins, maxs = np.fmin.reduce(mins, keepdims=True), np.fmax.reduce(maxs, keepdims=True)
+            else:
+                mins = maxs = np.full((1, len(positions)), np.nan)
+
+        counted = {col: sums[:, 1 + i] for i, col in enumerate(COUNTED)}
+        totals = {}
+        for i, measure in enumerate(measures):
+            n, total, sumsq = sums[:, 1 + len(COUNTED) + 3 * i:4 + len(COUNTED) + 3 * i].T
+            totals[measure] = {'n': n, 'sum': total, 'sumsq': sumsq, 'min': mins[:, i], 'max': maxs[:, i]}
+        return rollup_frame(sums[:, 0], counted, totals, group_by, index_values)
+
+    def memory_usage(self):
+        """Bytes held by the cells"""
+        return int(self.cells.memory_usage(deep=True).sum())
+
+
+class JobCube:
+    """Pre-aggregated cells over the dashboard's filter and group-by dimensions.
+
+    Two tables of cells, both far fewer than the jobs:
+    - `cells` over DIMENSIONS count every job once and answer any criteria
+      without industries (salary bounds on the bucket grid)
+    - `industry_cells` over INDUSTRY_DIMENSIONS count a job once per industry
+      it lists and answer criteria naming one industry, without a salary range
+
+    Each cell holds the job count, the non-missing count of the COUNTED
+    columns and count/sum/sum of squares/min/max of every measure, which are
+    all mergeable: the covered filter + group-by combinations roll up from
+    the cells without touching the rows, and two cubes (e.g. built over
+    separate partitions) merge into one. Criteria neither table covers
+    (roles, several industries, an industry with a salary range, grouping by
+    main_category's combinations) are left to rollup_rows over the selection.
+    """
+
+    def __init__(self, cells, industry_cells, salary_step=SALARY_STEP):
+        self.cells = cells
+        self.industry_cells = industry_cells
+        self.salary_step = salary_step
+        self._industries = set(industry_cells.labels('industry'))
+
+    @classmethod
+    def build(cls, df, job_categories=None, salary_step=SALARY_STEP):
+        """Aggregate a processed frame (and its job_categories, for the industry cells) into cube cells"""
+        keys = {dim: df[dim] for dim in DIMENSIONS[:-1]}
+        keys['salary_bucket'] = salary_bucket_keys(df['average_salary'], salary_step)
+        values = {measure: df[measure].to_numpy() for measure in MEASURES}
+        counted = {col: df[col].notna().to_numpy() for col in COUNTED}
+        cells = CubeCells.build(keys, values, counted, DIMENSIONS)
+
+        if job_categories is None:
+            job_categories = pd.DataFrame({'job_row': np.empty(0, dtype=np.int64), 'category': []})
+        # Industries are matched case-insensitively, like FilterIndex's; a job counts once per industry
+        categories = job_categories['category'].astype('category')
+        industry_codes, industries = pd.factorize(pd.Index([str(value).lower() for value in categories.cat.categories]))
+        category_codes = categories.cat.codes.to_numpy()
+        listed = category_codes >= 0
+        pairs = pd.DataFrame({
+            'job_row': job_categories['job_row'].to_numpy()[listed],
+            'industry': np.append(industry_codes, -1)[category_codes[listed]],
+        }).drop_duplicates()
+        rows = pairs['job_row'].to_numpy()
+        industry_keys = {'industry': np.asarray(industries, dtype=object)[pairs['industry'].to_numpy()]}
+        industry_keys.update({dim: df[dim].take(rows) for dim in INDUSTRY_DIMENSIONS[1:]})
+        industry_cells = CubeCells.build(
+            industry_keys, {measure: values[measure][rows] for measure in MEASURES},
+            {col: counted[col][rows] for col in COUNTED}, INDUSTRY_DIMENSIONS
+        )
+        return cls(cells, industry_cells, salary_step)
+
+    def merge(self, other):
+        """Combine with a cube built over other rows"""
+        if other.salary_step != self.salary_step:
+            raise ValueError('cannot merge cubes with different salary steps')
+        return JobCube(self.cells.merge(other.cells), self.industry_cells.merge(other.industry_cells),
+                       self.salary_step)
+
+    def supports(self, group_by=(), roles=None, industries=None, salary_range=None, **filters):
+        """Whether rollup() can answer these filter_data criteria and grouping from the cells"""
+        if roles or 'main_category' in group_by:
+            return False
+        if industries:
+            named = {industry.lower() for industry in industries} & self._industries
+            return len(named) <= 1 and not salary_range and 'salary_bucket' not in group_by
+        if salary_range:
+            return all(float(bound) % self.salary_step == 0 for bound in salary_range)
+        return True
+
+    def rollup(self, group_by=(), measures=None, roles=None, industries=None, salary_range=None, exp_level=None,
+               position=None, employment=None):
+        """Aggregate the cells matching the filter_data criteria, grouped by `group_by` dimensions
+
+        Returns a frame with `jobs`, `{col}_count` per COUNTED column and, per measure, count/sum/mean/std/min/max
+        (NaN-ignoring, like pandas), or None when the criteria need row-level
+        data (see supports()). Grouping by salary_bucket yields the lower bound
+        of each salary band.
+        """
+        group_by = list(group_by)
+        if not self.supports(group_by, roles=roles, industries=industries, salary_range=salary_range):
+            return None
+        measures = MEASURES if measures is None else list(measures)
+        table = self.industry_cells if industries else self.cells
+        mask = np.ones(len(table.cells), dtype=bool)
+        if industries:
+            mask &= table.label_mask('industry', {industry.lower() for industry in industries})
+        for dim, values in (('exp_category', exp_level), ('positionLevels', position),
+                            ('employmentTypes', employment)):
+            if values:
+                mask &= table.label_mask(dim, set(values))
+        if salary_range:
+            low, high = (2 * int(float(bound) // self.salary_step) for bound in salary_range)
+            mask &= table.salary_mask(low, high)
+        return table.rollup(mask, group_by, measures, self.salary_step)
+
+    def memory_usage(self):
+        """Bytes held by the cube cells"""
+        return self.cells.memory_usage() + self.industry_cells.memory_usage()
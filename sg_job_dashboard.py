@@ -5,9 +5,34 @@ from collections import Counter
 from datetime import datetime
 import re
 
+# Columns the processor reads; the text ones are kept as strings rather than inferred
+SOURCE_COLUMNS = [
+    'title', 'categories', 'employmentTypes', 'positionLevels', 'postedCompany_name', 'salary_minimum',
+    'salary_maximum', 'average_salary', 'metadata_newPostingDate', 'metadata_totalNumberJobApplication',
+    'metadata_totalNumberOfView', 'numberOfVacancies', 'minimumYearsExperience'
+]
+TEXT_COLUMNS = ['title', 'categories', 'employmentTypes', 'positionLevels', 'postedCompany_name']
+
+
 class JobDataProcessor:
-    def __init__(self, csv_path):
-        """Initialize processor and load data"""
+    def __init__(self, csv_path, chunksize=None):
+        """Initialize processor and load data
+
+        chunksize streams the CSV in chunks of that many rows: each chunk is
+        cleaned and derived on its own and its raw `categories` JSON dropped
+        before the next is read, so the whole raw file is never in memory.
+        """
+        if chunksize:
+            processed = []
+            for chunk in pd.read_csv(csv_path, usecols=lambda col: col in SOURCE_COLUMNS,
+                                     dtype={col: str for col in TEXT_COLUMNS}, chunksize=chunksize):
+                self.df = chunk
+                self.clean_data()
+                self.extract_categories()
+                self.calculate_metrics()
+                processed.append(self.df.drop(columns=['categories']))
+            self.df = pd.concat(processed, ignore_index=True)
+            return
         self.df = pd.read_csv(csv_path)
         self.clean_data()
         self.extract_categories()
@@ -1,45 +1,617 @@
 import pandas as pd
 import numpy as np
 import json
-from collections import Counter
-from datetime import datetime
-import re
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pandas.api.types import union_categoricals
+import threading
+from functools import partial
+from itertools import repeat
+
+from sg_job_cube import JobCube
+from sg_job_duckdb_pool import DuckDBPool, connect_read_only
+from sg_job_export import DEFAULT_BATCH_ROWS, check_export, frame_batches, write_batches
+from sg_job_filter_index import FilterIndex
+from sg_job_partitions import (csv_partitions, csv_row_bytes, csv_watermark, from_ipc, read_csv_appended,
+                               read_csv_partition, to_ipc)
+from sg_job_profiler import Profiler, profiled
+from sg_job_result_cache import ResultCache, cached
+from sg_job_rwlock import ReadWriteLock
+from sg_job_selection import (HISTOGRAM_MEASURES, ROLE_STATS, DuckDBSelection, PandasSelection, extend_group_keys,
+                              group_keys)
+from sg_job_sketches import (DEFAULT_CAPACITY, DEFAULT_K, HEAVY_HITTER_COLUMNS, PARTITION_DIMENSIONS, QUANTILE_MEASURES,
+                             JobSketches, quantiles)
+from sg_job_similar import SIMILAR_COLUMNS, SimilarJobs, salary_spread, top_positions
+from sg_job_skills import SkillMatcher
+from sg_job_snapshot import derived_key, load_snapshot, load_state, save_snapshot, save_state, snapshot_key
+from sg_job_titles import TitleRoles
+from sg_job_trends import COLUMNS as TREND_COLUMNS, DEFAULT_WINDOW_DAYS, TrendRollups
+
+logger = logging.getLogger('sg_jobs.processor')
+
+ENGINES = ('pandas', 'duckdb')
+
+# Files whose code shapes the processed frame; editing them invalidates snapshots
+PIPELINE_CODE_FILES = [
+    os.path.abspath(__file__),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sg_job_titles.py'),
+]
+# Files whose code shapes the indexes and query results save_state() persists with a snapshot
+STATE_CODE_FILES = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), f'{module}.py')
+    for module in ('sg_job_cube', 'sg_job_filter_index', 'sg_job_result_cache', 'sg_job_selection',
+                   'sg_job_similar', 'sg_job_sketches', 'sg_job_skills', 'sg_job_trends')
+]
+
+EXP_BINS = [-1, 0, 2, 5, 10, 100]
+EXP_LABELS = ['Entry Level', 'Junior (0-2y)', 'Mid (2-5y)', 'Senior (5-10y)', 'Expert (10y+)']
+
+# Default salary benchmarks of get_salary_percentiles
+SALARY_PERCENTILES = [0.25, 0.5, 0.75, 0.9]
+
+# The clean_data -> extract_categories -> calculate_metrics pipeline expressed
+# as SQL, so the duckdb engine aggregates exactly what the pandas engine would.
+# scripts/migrate_to_duckdb.py runs it once at import time to materialize the
+# derived columns (MATERIALIZED_COLUMNS) in the database.
+DUCKDB_JOBS_SQL = """
+SELECT *,
+    array_to_string(category_list, ', ') AS main_category,
+    (metadata_totalNumberJobApplication + metadata_totalNumberOfView)
+        / GREATEST(numberOfVacancies, 1) AS engagement_score,
+    CASE
+        WHEN minimumYearsExperience > -1 AND minimumYearsExperience <= 0 THEN 'Entry Level'
+        WHEN minimumYearsExperience > 0 AND minimumYearsExperience <= 2 THEN 'Junior (0-2y)'
+        WHEN minimumYearsExperience > 2 AND minimumYearsExperience <= 5 THEN 'Mid (2-5y)'
+        WHEN minimumYearsExperience > 5 AND minimumYearsExperience <= 10 THEN 'Senior (5-10y)'
+        WHEN minimumYearsExperience > 10 AND minimumYearsExperience <= 100 THEN 'Expert (10y+)'
+    END AS exp_category
+FROM (
+    SELECT * REPLACE (
+        TRY_CAST(salary_minimum AS DOUBLE) AS salary_minimum,
+        TRY_CAST(salary_maximum AS DOUBLE) AS salary_maximum,
+        COALESCE(TRY_CAST(average_salary AS DOUBLE),
+                 (TRY_CAST(salary_minimum AS DOUBLE) + TRY_CAST(salary_maximum AS DOUBLE)) / 2) AS average_salary,
+        TRY_CAST(CAST(metadata_newPostingDate AS VARCHAR) AS TIMESTAMP) AS metadata_newPostingDate,
+        COALESCE(NULLIF(CAST(positionLevels AS VARCHAR), ''), 'Unknown') AS positionLevels,
+        COALESCE(NULLIF(CAST(employmentTypes AS VARCHAR), ''), 'Unknown') AS employmentTypes,
+        CAST(categories AS VARCHAR) AS categories,
+        COALESCE(TRY_CAST(metadata_totalNumberJobApplication AS DOUBLE), 0) AS metadata_totalNumberJobApplication,
+        COALESCE(TRY_CAST(metadata_totalNumberOfView AS DOUBLE), 0) AS metadata_totalNumberOfView,
+        COALESCE(TRY_CAST(numberOfVacancies AS DOUBLE), 1) AS numberOfVacancies,
+        TRY_CAST(minimumYearsExperience AS DOUBLE) AS minimumYearsExperience
+    ),
+    CASE
+        WHEN json_valid(CAST(categories AS VARCHAR)) AND json_type(CAST(categories AS VARCHAR)) = 'ARRAY'
+             AND json_array_length(CAST(categories AS VARCHAR)) > 0
+        THEN list_transform(
+            json_extract(CAST(categories AS VARCHAR), '$[*]'),
+            c -> COALESCE(json_extract_string(c, '$.category'), 'Others'))
+        ELSE ['Others']
+    END AS category_list
+    FROM {source}
+)
+"""
+
+# Derived columns DUCKDB_JOBS_SQL adds on top of the raw table
+MATERIALIZED_COLUMNS = ['category_list', 'main_category', 'engagement_score', 'exp_category']
+# Canonical role of each posting's title, clustered over the whole table by assign_roles
+ROLE_COLUMN = 'role'
+
+# Columns kept by compact(): everything the dashboard and the get_* methods read
+PROCESSED_COLUMNS = [
+    'metadata_jobPostId', 'title', 'role', 'postedCompany_name', 'positionLevels', 'employmentTypes',
+    'main_category', 'exp_category', 'salary_minimum', 'salary_maximum', 'average_salary',
+    'metadata_newPostingDate', 'metadata_totalNumberJobApplication', 'metadata_totalNumberOfView',
+    'numberOfVacancies', 'minimumYearsExperience', 'engagement_score'
+]
+# Derived columns and the methods computing them; lazy mode defers each until first needed
+DERIVED_COLUMNS = {
+    'main_category': 'extract_categories',
+    'engagement_score': '_add_engagement_score',
+    'exp_category': '_add_exp_category',
+    'role': 'canonicalize_titles',
+}
+# Raw columns the pipeline reads; lazy mode loads only these from the source
+SOURCE_COLUMNS = [col for col in PROCESSED_COLUMNS if col not in DERIVED_COLUMNS] + ['categories']
+COMPACT_CATEGORICAL_COLUMNS = ['title', 'postedCompany_name', 'positionLevels', 'employmentTypes']
+COMPACT_COUNT_COLUMNS = ['metadata_totalNumberJobApplication', 'metadata_totalNumberOfView', 'numberOfVacancies']
+COMPACT_FLOAT_COLUMNS = [
+    'salary_minimum', 'salary_maximum', 'average_salary', 'minimumYearsExperience', 'engagement_score'
+]
+
+# Text columns of the source CSV, read as strings rather than inferred chunk by chunk
+CSV_TEXT_COLUMNS = ['metadata_jobPostId', 'title', 'postedCompany_name', 'positionLevels', 'employmentTypes',
+                    'categories']
+
+# Partitions per worker process in the partitioned pipeline, so uneven ones balance out
+PARTITIONS_PER_WORKER = 4
+
+# Separator for category names while they travel as one string per payload
+CATEGORY_SEP = '\x1f'
+
+# Below this many distinct payloads a process pool costs more than it saves
+PARALLEL_PARSE_MIN_PAYLOADS = 20000
+
+
+def _parse_category_payloads(payloads):
+    """Parse raw `categories` JSON payloads into category names joined by CATEGORY_SEP"""
+    parsed_names = []
+    for payload in payloads:
+        try:
+            parsed = json.loads(payload) if isinstance(payload, str) else []
+            names = [cat.get('category', 'Others') for cat in parsed]
+            # Mirror the old join-based parsing: any non-string name sends the row to 'Others'
+            if not names or not all(isinstance(name, str) for name in names):
+                names = ['Others']
+        except (ValueError, TypeError, AttributeError):
+            names = ['Others']
+        parsed_names.append(CATEGORY_SEP.join(names))
+    return parsed_names
+
+
+def parse_categories(categories, workers=None):
+    """Bulk-parse a `categories` column into (main_category, job_categories), in `workers` processes"""
+    codes, payloads = pd.factorize(categories, use_na_sentinel=True)
+    payloads = np.asarray(payloads, dtype=object).tolist()
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(payloads) >= PARALLEL_PARSE_MIN_PAYLOADS:
+        chunk_size = -(-len(payloads) // workers)
+        chunks = [payloads[i:i + chunk_size] for i in range(0, len(payloads), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            encoded = [names for chunk in pool.map(_parse_category_payloads, chunks) for names in chunk]
+    else:
+        encoded = _parse_category_payloads(payloads)
+    return _build_category_tables(codes, encoded, categories.index)
+
+
+def split_categories(category_names):
+    """Build the parse_categories outputs from names already joined by CATEGORY_SEP"""
+    codes, encoded = pd.factorize(category_names, use_na_sentinel=True)
+    return _build_category_tables(codes, np.asarray(encoded, dtype=object).tolist(), category_names.index)
+
+
+def _build_category_tables(codes, encoded, index):
+    """main_category and job_categories from per-row codes into CATEGORY_SEP-joined name lists"""
+    # Missing payloads (code -1) are stored after the real ones
+    encoded = encoded + ['Others']
+    codes = np.where(codes < 0, len(encoded) - 1, codes)
+    parsed_names = [names.split(CATEGORY_SEP) if names else ['Others'] for names in encoded]
+
+    # main_category: one label per payload, gathered per row through the codes
+    joined, joined_codes = np.unique([', '.join(names) for names in parsed_names], return_inverse=True)
+    main_category = pd.Series(
+        pd.Categorical.from_codes(joined_codes[codes], categories=joined),
+        index=index, name='main_category'
+    )
+
+    # job_categories: CSR layout of distinct names per payload, expanded per row
+    payload_names = [list(dict.fromkeys(names)) for names in parsed_names]
+    vocabulary, name_codes = np.unique(
+        [name for names in payload_names for name in names], return_inverse=True
+    )
+    lengths = np.fromiter((len(names) for names in payload_names), dtype=np.int64, count=len(payload_names))
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+
+    row_lengths = lengths[codes]
+    total = int(row_lengths.sum())
+    row_starts = np.cumsum(row_lengths) - row_lengths
+    within = np.arange(total) - np.repeat(row_starts, row_lengths)
+    flat = np.repeat(offsets[codes], row_lengths) + within
+
+    job_categories = pd.DataFrame({
+        'job_row': np.repeat(np.arange(len(codes), dtype=np.int32), row_lengths),
+        'category': pd.Categorical.from_codes(name_codes[flat].astype(np.int32), categories=vocabulary)
+    })
+    return main_category, job_categories
+
+
+def _downcast_count(values):
+    """A count column in the smallest integer type holding it, or float32 if it isn't integral"""
+    if (values % 1 == 0).all():
+        return pd.to_numeric(values, downcast='unsigned' if (values >= 0).all() else 'integer')
+    return values.astype('float32')
+
+
+def concat_categorical(pieces):
+    """Concatenate categorical Series, uniting differing categories sorted as astype('category') sorts them"""
+    if all(piece.dtype == pieces[0].dtype for piece in pieces):
+        return pd.concat(pieces, ignore_index=True)
+    return pd.Series(union_categoricals(pieces, sort_categories=True), name=pieces[0].name)
+
+
+def _preprocess_partition(read, compact):
+    """Run the preprocessing pipeline over one partition in a worker process"""
+    stages = JobDataProcessor.__new__(JobDataProcessor)
+    stages.df, stages.workers, stages.profiler = read(), 1, Profiler(enabled=False)
+    stages.clean_data()
+    stages.extract_categories()
+    stages.calculate_metrics()
+    if compact:
+        stages.compact()
+    return to_ipc(stages.df), to_ipc(stages.job_categories)
+
+
+def concat_partitions(frames, category_tables, compact=False):
+    """Concatenate processed partitions, in order, into one frame and job_categories table"""
+    offsets = np.cumsum([0] + [len(frame) for frame in frames[:-1]])
+    pieces = {col: [frame[col] for frame in frames] for col in frames[0].columns}
+    frames.clear()
+    columns = {}
+    for col in list(pieces):
+        chunks = pieces.pop(col)
+        if isinstance(chunks[0].dtype, pd.CategoricalDtype):
+            columns[col] = concat_categorical(chunks)
+        else:
+            columns[col] = pd.concat(chunks, ignore_index=True)
+        if compact and col in COMPACT_COUNT_COLUMNS:
+            columns[col] = _downcast_count(columns[col])
+
+    job_categories = pd.DataFrame({
+        'job_row': np.concatenate([
+            table['job_row'].to_numpy() + np.int32(offset) for table, offset in zip(category_tables, offsets)
+        ]),
+        'category': concat_categorical([table['category'] for table in category_tables]).array
+    })
+    return pd.DataFrame(columns), job_categories
+
+
+def filter_criteria(roles=None, industries=None, salary_range=None, exp_level=None, position=None, employment=None):
+    """The filter_data criteria as keyword arguments"""
+    return dict(roles=roles, industries=industries, salary_range=salary_range, exp_level=exp_level,
+                position=position, employment=employment)
+
+
+def _import_duckdb():
+    """The duckdb module, or None if it isn't installed"""
+    try:
+        import duckdb
+    except Exception:
+        return None
+    return duckdb
+
+
+def _table_columns(conn):
+    return {row[0] for row in conn.execute('DESCRIBE sg_jobs').fetchall()}
+
+
+def _is_materialized(conn):
+    """Whether `sg_jobs` already carries the MATERIALIZED_COLUMNS"""
+    return set(MATERIALIZED_COLUMNS) <= _table_columns(conn)
+
+
+def assign_roles(conn):
+    """Cluster the titles of `sg_jobs` into canonical roles and store them in its ROLE_COLUMN"""
+    if ROLE_COLUMN not in _table_columns(conn):
+        conn.execute(f'ALTER TABLE sg_jobs ADD COLUMN {ROLE_COLUMN} VARCHAR')
+    titles = conn.execute('SELECT title, COUNT(*) AS n FROM sg_jobs WHERE title IS NOT NULL GROUP BY title').fetchdf()
+    title_roles = TitleRoles.build(titles['title'], titles['n'])
+    conn.register('title_role_pairs', title_roles.frame())
+    try:
+        conn.execute(f"""
+            UPDATE sg_jobs SET {ROLE_COLUMN} = pairs.role
+            FROM title_role_pairs pairs
+            WHERE sg_jobs.title = pairs.title AND sg_jobs.{ROLE_COLUMN} IS DISTINCT FROM pairs.role
+        """)
+    finally:
+        conn.unregister('title_role_pairs')
+    return title_roles
 
-# Optional duckdb support
-try:
-    import duckdb
-except Exception:
-    duckdb = None
 
 class JobDataProcessor:
-    def __init__(self, data_source):
+    def __init__(self, data_source, engine='pandas', workers=None, skills=None, compact=False, cache_dir=None,
+                 profiler=None, cache=None, lazy=False, chunksize=None, pipeline_workers=None, pool=None,
+                 sketch_k=DEFAULT_K, sketch_capacity=DEFAULT_CAPACITY):
         """Initialize processor and load data.
 
         data_source can be:
         - a path to a CSV file (string)
         - a path to a DuckDB file (string ending with .duckdb) containing table `sg_jobs`
         - a pandas DataFrame
+
+        engine: 'pandas' loads the data into `self.df`; 'duckdb' keeps it in DuckDB and queries it in SQL
+        workers: processes for bulk category parsing (default: all cores)
+        skills: replaces the default skill dictionary
+        compact: shrink the processed frame after loading (see compact())
+        cache_dir: where to snapshot the processed frame and its indexes (pandas engine, file sources)
+        profiler: times the loading stages and queries (default: a new Profiler)
+        cache: ResultCache of the get_* and rollup results (default: a new ResultCache)
+        lazy: defer the derived columns, compaction, snapshot and indexes until needed (pandas engine)
+        chunksize: stream CSV sources in chunks of that many rows (pandas engine; implies compact=True)
+        pipeline_workers: run the preprocessing over row partitions in that many processes (pandas engine)
+        pool: DuckDBPool of read-only cursors (duckdb engine, .duckdb sources)
+        sketch_k, sketch_capacity: size the KLL and Space-Saving sketches of `self.sketches` (pandas engine)
         """
+        if engine not in ENGINES:
+            raise ValueError(f"engine must be one of {ENGINES}, got {engine!r}")
+        self.engine = engine
+        self.workers = workers
+        self.profiler = profiler if profiler is not None else Profiler()
+        self.cache = cache if cache is not None else ResultCache()
+        self.df = None
+        self.job_categories = None
+        self.filter_index = None
+        self.cube = None
+        self.sketches = None
+        self._sketch_options = {'k': sketch_k, 'capacity': sketch_capacity}
+        self.group_keys = None
+        self.skill_matcher = SkillMatcher(skills)
+        self._skill_index = None
+        self._trends = None
+        self._similar_jobs = None
+        self._title_roles = None
+        self._pool = None
+        self._owns_pool = False
+        # Lazy mode: derived columns not computed yet, and work deferred until the indexes are built
+        self._deferred = {}
+        self._pending_compact = False
+        self._pending_snapshot = None
+        # (cache_dir, key) the indexes and cached results are saved under next to the snapshot
+        self._state_store = None
+        # What refresh() reads new postings from: the source path, the raw columns the frame was
+        # loaded from (None: all), whether it was compacted, and for CSV files where reading stopped
+        self._source = data_source if isinstance(data_source, str) else None
+        self._source_columns = None
+        self._compact = False
+        self._csv_watermark = None
+        self._prepare_lock = threading.RLock()
+        # Queries read the data and its indexes under it; append() swaps in the grown ones under it alone
+        self.state_lock = ReadWriteLock()
+        # Serializes append() and refresh()
+        self._append_lock = threading.RLock()
+
+        if engine == 'duckdb':
+            with self.profiler.span('connect'):
+                self._connect_duckdb(data_source, pool)
+            self._similar_jobs = self._build_similar_jobs()
+            return
+
+        chunked = bool(chunksize) and isinstance(data_source, str) and not data_source.lower().endswith('.duckdb')
+        compact = compact or chunked
+        partitioned = bool(pipeline_workers) and pipeline_workers > 1
+        self._compact = compact
+        self._source_columns = SOURCE_COLUMNS if compact or lazy else None
+        if isinstance(data_source, str) and not data_source.lower().endswith('.duckdb'):
+            # Taken before reading: records appended meanwhile are read again by refresh(),
+            # which skips postings already loaded
+            self._csv_watermark = csv_watermark(data_source)
+
+        # Processed frames of file sources can be reused across restarts
+        snapshot_id = None
+        if cache_dir and isinstance(data_source, str):
+            # Lazy mode reads only SOURCE_COLUMNS, which compact() would have narrowed to anyway
+            options = {'compact': compact, 'projected': True} if lazy and not compact else {'compact': compact}
+            with self.profiler.span('snapshot_key'):
+                snapshot_id = snapshot_key(data_source, code_files=PIPELINE_CODE_FILES, **options)
+                self._state_store = (cache_dir, derived_key(snapshot_id, STATE_CODE_FILES))
+        snapshot = None
+        if snapshot_id:
+            with self.profiler.span('load_snapshot'):
+                snapshot = load_snapshot(cache_dir, snapshot_id)
+
+        # The cube and sketches when chunked ingestion already built them, chunk by chunk
+        summaries = None
+        if snapshot is not None:
+            self.df, self.job_categories = snapshot
+        elif chunked:
+            with self.profiler.span('ingest_chunks', chunksize=chunksize):
+                if partitioned:
+                    self.df, self.job_categories, summaries = self._preprocess_partitioned(
+                        data_source, pipeline_workers, columns=SOURCE_COLUMNS, compact=True, max_rows=chunksize,
+                        summarize=not lazy
+                    )
+                else:
+                    self.df, self.job_categories, summaries = self._ingest_csv_chunks(data_source, chunksize,
+                                                                                      summarize=not lazy)
+            # Titles are clustered over all postings, not per chunk
+            self.canonicalize_titles()
+            if snapshot_id:
+                with self.profiler.span('save_snapshot'):
+                    save_snapshot(cache_dir, snapshot_id, self.df, self.job_categories)
+        elif lazy:
+            with self.profiler.span('read_source'):
+                self.df = self._read_source(data_source, columns=SOURCE_COLUMNS)
+            self.clean_data()
+            self._clean_counts()
+            self._deferred = dict(DERIVED_COLUMNS)
+            self._pending_compact = compact
+            self._pending_snapshot = (cache_dir, snapshot_id) if snapshot_id else None
+        else:
+            if partitioned:
+                with self.profiler.span('preprocess_partitioned', workers=pipeline_workers):
+                    self.df, self.job_categories, _ = self._preprocess_partitioned(
+                        data_source, pipeline_workers, compact=compact
+                    )
+            else:
+                with self.profiler.span('read_source'):
+                    self.df = self._read_source(data_source)
+                self.clean_data()
+                self.extract_categories()
+                self.calculate_metrics()
+                if compact:
+                    self.compact()
+            self.canonicalize_titles()
+            if snapshot_id:
+                with self.profiler.span('save_snapshot'):
+                    save_snapshot(cache_dir, snapshot_id, self.df, self.job_categories)
+        if lazy:
+            # A saved state is restored along with the rest of the deferred work
+            return
+        if snapshot is not None and self._restore_state():
+            return
+        self.build_indexes(summaries=summaries)
+        self.save_state()
+
+    @staticmethod
+    def _read_source(data_source, columns=None, since=None):
+        """Read the raw jobs table from a DataFrame, DuckDB file or CSV"""
         # If a DataFrame is provided, use it directly
         if isinstance(data_source, pd.DataFrame):
-            self.df = data_source.copy()
+            if columns:
+                return data_source[[col for col in data_source.columns if col in columns]].copy()
+            return data_source.copy()
         # If duckdb file provided, read from table `sg_jobs` using duckdb
-        elif isinstance(data_source, str) and data_source.lower().endswith('.duckdb'):
+        if isinstance(data_source, str) and data_source.lower().endswith('.duckdb'):
+            duckdb = _import_duckdb()
             if duckdb is None:
                 raise ImportError('duckdb package is required to read from a .duckdb file')
-            conn = duckdb.connect(database=data_source, read_only=False)
+            conn = connect_read_only(data_source)
             try:
+                where, params = '', []
+                if since is not None and not pd.isna(since):
+                    where = 'WHERE TRY_CAST(CAST(metadata_newPostingDate AS VARCHAR) AS TIMESTAMP) >= ?'
+                    params = [pd.Timestamp(since).to_pydatetime()]
+                select = '*'
+                if columns:
+                    available = set(conn.execute('SELECT * FROM sg_jobs LIMIT 0').fetchdf().columns)
+                    select = ', '.join(f'"{col}"' for col in columns if col in available)
+                if _is_materialized(conn):
+                    # Fetch the parsed category names instead of re-parsing the JSON
+                    if not columns:
+                        select = '* EXCLUDE (category_list)'
+                    return conn.execute(
+                        f'SELECT {select}, array_to_string(category_list, ?) AS category_names FROM sg_jobs {where}',
+                        [CATEGORY_SEP] + params
+                    ).fetchdf()
                 # Read entire table into a pandas DataFrame
-                self.df = conn.execute('SELECT * FROM sg_jobs').fetchdf()
+                return conn.execute(f'SELECT {select} FROM sg_jobs {where}', params).fetchdf()
             finally:
                 conn.close()
+        # Assume it's a CSV path
+        if columns:
+            return pd.read_csv(data_source, usecols=lambda col: col in columns)
+        return pd.read_csv(data_source)
+
+    def _ingest_csv_chunks(self, csv_path, chunksize, summarize=False):
+        """Read, process and compact a CSV `chunksize` rows at a time; returns (df, job_categories, summaries)"""
+        frames, category_tables, summaries = [], [], None
+        reader = pd.read_csv(csv_path, usecols=lambda col: col in SOURCE_COLUMNS,
+                             dtype={col: str for col in CSV_TEXT_COLUMNS}, chunksize=chunksize)
+        for chunk in reader:
+            self.df = chunk.reset_index(drop=True)
+            self.clean_data()
+            self.extract_categories()
+            self.calculate_metrics()
+            self.compact()
+            frames.append(self.df)
+            category_tables.append(self.job_categories)
+            if summarize:
+                summaries = self._summarize(self.df, self.job_categories, summaries)
+        self.df = None
+        if not frames:
+            raise ValueError(f'{csv_path} has no rows')
+        return (*concat_partitions(frames, category_tables, compact=True), summaries)
+
+    def _summarize(self, df, job_categories, summaries=None):
+        """(cube, sketches) of a processed partition, merged into `summaries`, those of the partitions before it"""
+        cube = JobCube.build(df, job_categories)
+        sketches = JobSketches.build(df, **self._sketch_options)
+        if summaries is not None:
+            cube, sketches = summaries[0].merge(cube), summaries[1].merge(sketches)
+        return cube, sketches
+
+    def _preprocess_partitioned(self, data_source, workers, columns=None, compact=False, max_rows=None,
+                                summarize=False):
+        """Run the preprocessing pipeline over row partitions in a pool of `workers` processes"""
+        n_partitions = workers * PARTITIONS_PER_WORKER
+        if isinstance(data_source, str) and not data_source.lower().endswith('.duckdb'):
+            max_bytes = max_rows * csv_row_bytes(data_source) if max_rows else None
+            header, ranges = csv_partitions(data_source, n_partitions, max_bytes=max_bytes)
+            text_dtypes = {col: str for col in CSV_TEXT_COLUMNS}
+            readers = [partial(read_csv_partition, data_source, header, start, end, columns=columns, dtype=text_dtypes)
+                       for start, end in ranges]
+        else:
+            raw = self._read_source(data_source, columns=columns)
+            if max_rows:
+                n_partitions = max(n_partitions, -(-len(raw) // max_rows))
+            bounds = np.linspace(0, len(raw), n_partitions + 1).astype(int)
+            readers = [partial(from_ipc, to_ipc(raw.iloc[start:end].reset_index(drop=True)))
+                       for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+            del raw
+        if not readers:
+            raise ValueError(f'{data_source} has no rows')
+
+        frames, category_tables, summaries = [], [], None
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for frame, job_categories in pool.map(_preprocess_partition, readers, repeat(compact)):
+                frames.append(from_ipc(frame))
+                category_tables.append(from_ipc(job_categories))
+                if summarize:
+                    summaries = self._summarize(frames[-1], category_tables[-1], summaries)
+        return (*concat_partitions(frames, category_tables, compact=compact), summaries)
+
+    def _connect_duckdb(self, data_source, pool=None):
+        """Open the DuckDB cursor pool backing the duckdb engine"""
+        duckdb = _import_duckdb()
+        if duckdb is None:
+            raise ImportError('duckdb package is required for the duckdb engine')
+        self._owns_pool = pool is None
+        if isinstance(data_source, str) and data_source.lower().endswith('.duckdb'):
+            # Read-only, so other processes (and the migration) can open the file too
+            self._pool = pool if pool is not None else DuckDBPool(data_source)
+            self._pool.on_swap.append(self._source_swapped)
         else:
-            # Assume it's a CSV path
-            self.df = pd.read_csv(data_source)
-        self.clean_data()
-        self.extract_categories()
-        self.calculate_metrics()
+            # Loaded once into an in-memory table, so queries don't re-parse the CSV and every
+            # pooled cursor sees it (a registered DataFrame is only visible to its own cursor)
+            conn = duckdb.connect()
+            if isinstance(data_source, pd.DataFrame):
+                conn.register('source_frame', data_source)
+                conn.execute('CREATE TABLE sg_jobs AS SELECT * FROM source_frame')
+                conn.unregister('source_frame')
+            else:
+                conn.execute('CREATE TABLE sg_jobs AS SELECT * FROM read_csv_auto(?)', [data_source])
+            with self.profiler.span('canonicalize_titles'):
+                self._title_roles = assign_roles(conn)
+            self._pool = DuckDBPool.over(conn)
+        self._jobs_sql = self._duckdb_jobs_sql()
+        self._postings = self._posting_count()
 
+    def _duckdb_jobs_sql(self):
+        """The query of the cleaned `jobs` relation over the pool's current database"""
+        with self._pool.cursor() as cursor:
+            columns = _table_columns(cursor)
+        if set(MATERIALIZED_COLUMNS) <= columns:
+            # Cleaned and derived columns were computed at import time
+            jobs_sql = 'SELECT * FROM sg_jobs'
+        else:
+            jobs_sql = DUCKDB_JOBS_SQL.format(source='sg_jobs')
+        if ROLE_COLUMN not in columns:
+            logger.warning('sg_jobs has no %s column; roles fall back to the raw titles until '
+                           'scripts/migrate_to_duckdb.py is run again', ROLE_COLUMN)
+            jobs_sql = f'SELECT *, title AS {ROLE_COLUMN} FROM ({jobs_sql})'
+        return jobs_sql
+
+    def _source_swapped(self, generation):
+        """Drop what was computed from the previous database generation"""
+        with self._prepare_lock:
+            self._jobs_sql = self._duckdb_jobs_sql()
+            self._trends = None
+            self._similar_jobs = None
+            self._title_roles = None
+            self.cache.clear()
+
+    def refresh_source(self):
+        """Move to a newer generation of the database file if one was published; returns True if it did"""
+        return self._pool is not None and self._pool.refresh()
+
+    def _query(self, sql, params=None):
+        """Run `sql` against the cleaned `jobs` relation and fetch the result"""
+        # Pooled cursors let concurrent Streamlit sessions query in parallel
+        with self._pool.cursor() as cursor:
+            return cursor.execute(f"WITH jobs AS ({self._jobs_sql}) {sql}", params or []).fetchdf()
+
+    def close(self):
+        """Release the DuckDB cursors (duckdb engine only)"""
+        if self._pool is not None:
+            if self._owns_pool:
+                self._pool.close()
+            elif self._source_swapped in self._pool.on_swap:
+                self._pool.on_swap.remove(self._source_swapped)
+            self._pool = None
+        self.cache.clear()
+
+    @profiled
     def clean_data(self):
         """Clean and prepare data"""
         # Handle salary
@@ -62,21 +634,24 @@ class JobDataProcessor:
         self.df['employmentTypes'] = self.df['employmentTypes'].fillna('Unknown')
         self.df.loc[self.df['employmentTypes'] == '', 'employmentTypes'] = 'Unknown'
 
+    @profiled
     def extract_categories(self):
         """Extract job categories from JSON"""
-        categories_list = []
-        for cats in self.df['categories']:
-            try:
-                parsed = json.loads(cats) if isinstance(cats, str) else []
-                cat_names = [cat.get('category', 'Others') for cat in parsed]
-                categories_list.append(', '.join(cat_names) if cat_names else 'Others')
-            except:
-                categories_list.append('Others')
-
-        self.df['main_category'] = pd.Series(categories_list, index=self.df.index)
+        if 'category_names' in self.df.columns:
+            self.df['main_category'], self.job_categories = split_categories(self.df.pop('category_names'))
+        else:
+            self.df['main_category'], self.job_categories = parse_categories(
+                self.df['categories'], workers=self.workers
+            )
 
+    @profiled
     def calculate_metrics(self):
         """Calculate competition and engagement metrics"""
+        self._clean_counts()
+        self._add_engagement_score()
+        self._add_exp_category()
+
+    def _clean_counts(self):
         # Handle NaN for competition metric
         self.df['metadata_totalNumberJobApplication'] = pd.to_numeric(
             self.df['metadata_totalNumberJobApplication'], errors='coerce'
@@ -88,113 +663,1038 @@ class JobDataProcessor:
             self.df['numberOfVacancies'], errors='coerce'
         ).fillna(1)
 
+    def _add_engagement_score(self):
         # Competition score: engagement per vacancy
         self.df['engagement_score'] = (
             self.df['metadata_totalNumberJobApplication'] +
             self.df['metadata_totalNumberOfView']
         ) / self.df['numberOfVacancies'].clip(lower=1)
 
+    def _add_exp_category(self):
         # Categorize experience level
         self.df['exp_category'] = pd.cut(
             self.df['minimumYearsExperience'],
-            bins=[-1, 0, 2, 5, 10, 100],
-            labels=['Entry Level', 'Junior (0-2y)', 'Mid (2-5y)', 'Senior (5-10y)', 'Expert (10y+)']
+            bins=EXP_BINS,
+            labels=EXP_LABELS
         )
 
-    def get_top_roles(self, top_n=20):
-        """Get top N roles by frequency"""
-        role_stats = self.df.groupby('title').agg({
-            'salary_minimum': ['mean', 'count'],
-            'salary_maximum': 'mean',
-            'metadata_totalNumberJobApplication': 'sum',
-            'metadata_totalNumberOfView': 'sum',
-            'engagement_score': 'mean',
-            'minimumYearsExperience': 'mean'
-        }).round(2)
+    @profiled
+    def canonicalize_titles(self):
+        """Cluster near-duplicate titles into canonical roles (see sg_job_titles.TitleRoles)"""
+        codes, titles = pd.factorize(self.df['title'], use_na_sentinel=True)
+        counts = np.bincount(codes[codes >= 0], minlength=len(titles))
+        self._title_roles = TitleRoles.build(np.asarray(titles, dtype=object), counts)
+        role_codes = np.where(codes >= 0, self._title_roles.roles[np.maximum(codes, 0)], -1)
+        self.df['role'] = pd.Categorical.from_codes(role_codes, categories=self._title_roles.labels)
+
+    @property
+    def title_roles(self):
+        """TitleRoles of the postings' titles: the canonical role of each, and the titles of each role"""
+        if self._title_roles is None:
+            with self._prepare_lock:
+                if self._title_roles is None:
+                    if self.engine == 'duckdb':
+                        pairs = self._query('SELECT title, ANY_VALUE(role) AS role FROM jobs '
+                                            'WHERE title IS NOT NULL GROUP BY title')
+                        self._title_roles = TitleRoles.from_pairs(pairs['title'], pairs['role'])
+                    else:
+                        self.ensure_columns(['role'])
+                    if self._title_roles is None:
+                        # Loaded from a snapshot: the roles are stored, only their titles are gathered
+                        pairs = self.df[['title', 'role']].dropna().drop_duplicates('title')
+                        self._title_roles = TitleRoles.from_pairs(pairs['title'].to_numpy(dtype=object),
+                                                                  pairs['role'].to_numpy(dtype=object))
+        return self._title_roles
+
+    def ensure_columns(self, columns):
+        """Compute the derived columns among `columns` that lazy mode hasn't computed yet"""
+        if not any(col in self._deferred for col in columns):
+            return
+        with self._prepare_lock:
+            for col in columns:
+                method = self._deferred.get(col)
+                if method is not None:
+                    with self.profiler.span(f'derive:{col}'):
+                        getattr(self, method)()
+                    del self._deferred[col]
+
+    def ensure_indexes(self):
+        """Finish the work lazy mode deferred (derived columns, compaction, snapshot) and build the indexes"""
+        if self.filter_index is not None:
+            return
+        with self._prepare_lock:
+            if self.filter_index is not None:
+                return
+            self.ensure_columns(list(self._deferred))
+            if self._pending_compact:
+                self.compact()
+                self._pending_compact = False
+            if self._pending_snapshot:
+                cache_dir, snapshot_id = self._pending_snapshot
+                with self.profiler.span('save_snapshot'):
+                    save_snapshot(cache_dir, snapshot_id, self.df, self.job_categories)
+                self._pending_snapshot = None
+            if self._state_store is not None and self._restore_state():
+                return
+            self.build_indexes(similar=False)
+            self.save_state()
+
+    @profiled
+    def compact(self):
+        """Shrink the processed frame for long-lived dashboard processes"""
+        self.df = self.df.drop(columns=[col for col in self.df.columns if col not in PROCESSED_COLUMNS])
+        for col in COMPACT_CATEGORICAL_COLUMNS:
+            self.df[col] = self.df[col].astype('category')
+        for col in COMPACT_COUNT_COLUMNS:
+            self.df[col] = _downcast_count(self.df[col])
+        for col in COMPACT_FLOAT_COLUMNS:
+            self.df[col] = self.df[col].astype('float32')
+
+    def memory_report(self):
+        """Get the bytes held per column of `self.df`, plus the derived tables and indexes"""
+        usage = self.df.memory_usage(deep=True, index=False)
+        report = pd.DataFrame({
+            'dtype': self.df.dtypes.astype(str),
+            'bytes': usage
+        })
+        extras = {
+            'job_categories': (
+                'table', self.job_categories.memory_usage(deep=True).sum() if self.job_categories is not None else 0
+            ),
+            'filter_index': (
+                'index', self.filter_index.memory_usage() if self.filter_index is not None else 0
+            ),
+            'cube': ('cube', self.cube.memory_usage() if self.cube is not None else 0),
+            'sketches': ('sketch', self.sketches.memory_usage() if self.sketches is not None else 0),
+            'group_keys': (
+                'index', sum(codes.nbytes for codes, _ in self.group_keys.values()) if self.group_keys else 0
+            ),
+            'trends': ('rollup', self._trends.memory_usage() if self._trends is not None else 0),
+            'similar_jobs': ('index', self._similar_jobs.memory_usage() if self._similar_jobs is not None else 0),
+            'title_roles': ('index', self._title_roles.memory_usage() if self._title_roles is not None else 0),
+            'result_cache': ('cache', self.cache.memory_usage()),
+        }
+        for name, (kind, nbytes) in extras.items():
+            report.loc[name] = [kind, nbytes]
+        report['bytes'] = report['bytes'].astype('int64')
+        report['mb'] = (report['bytes'] / 2 ** 20).round(2)
+        report.loc['total'] = ['', report['bytes'].sum(), round(report['bytes'].sum() / 2 ** 20, 2)]
+        return report
+
+    @profiled
+    def build_indexes(self, similar=True, summaries=None):
+        """(Re)build the lookup structures derived from `self.df`"""
+        filter_index = FilterIndex(self.df, self.job_categories)
+        if summaries is None:
+            summaries = JobCube.build(self.df, self.job_categories), JobSketches.build(self.df, **self._sketch_options)
+        self.cube, self.sketches = summaries
+        self.group_keys = group_keys(self.df)
+        self._skill_index = None
+        self._trends = None
+        self._similar_jobs = self._build_similar_jobs() if similar else None
+        # Set last: ensure_indexes takes it as the sign that everything above is ready
+        self.filter_index = filter_index
+        # Cached results were computed from the previous data
+        self.cache.clear()
+
+    def save_state(self):
+        """Persist the indexes, trend rollups and cached results next to the dataset snapshot"""
+        if self._state_store is None or self.filter_index is None:
+            return
+        cache_dir, key = self._state_store
+        state = {
+            'filter_index': self.filter_index,
+            'cube': self.cube,
+            'sketches': self.sketches,
+            'group_keys': self.group_keys,
+            'trends': self._trends,
+            'skill_index': self._skill_index,
+            'similar_jobs': self._similar_jobs,
+            'results': self.cache.entries(),
+        }
+        with self.profiler.span('save_state'):
+            save_state(cache_dir, key, state)
+
+    def _restore_state(self):
+        """Take the indexes and cached results from a saved state; False when there is none"""
+        cache_dir, key = self._state_store
+        with self.profiler.span('load_state'):
+            state = load_state(cache_dir, key)
+        if state is None:
+            return False
+        self.cube = state['cube']
+        self.sketches = state['sketches']
+        if {'k': self.sketches.k, 'capacity': self.sketches.capacity} != self._sketch_options:
+            self.sketches = JobSketches.build(self.df, **self._sketch_options)
+        self.group_keys = state['group_keys']
+        self._trends = state['trends']
+        self._skill_index = state['skill_index']
+        self._similar_jobs = state['similar_jobs']
+        self.filter_index = state['filter_index']
+        self.cache.clear()
+        self.cache.preload(state['results'])
+        return True
+
+    @profiled
+    def append(self, rows):
+        """Add new postings to the loaded data, processing and indexing only them; returns how many were added"""
+        if self.engine == 'duckdb':
+            raise ValueError('append needs the pandas engine; add postings to the database with '
+                             'scripts/migrate_to_duckdb.py --mode append')
+        if not len(rows):
+            return 0
+        self.ensure_indexes()
+        with self._append_lock:
+            with self.profiler.span('process_rows', rows=len(rows)):
+                added, added_categories, title_roles = self._process_rows(rows)
+            with self.profiler.span('extend_indexes'):
+                df, job_categories = concat_partitions(
+                    [self.df, added.reindex(columns=self.df.columns)],
+                    [self.job_categories, added_categories], compact=self._compact
+                )
+                filter_index = self.filter_index.extend(added, added_categories)
+                cube = self.cube.merge(JobCube.build(added, added_categories))
+                sketches = self.sketches.merge(JobSketches.build(added, **self._sketch_options))
+                keys = extend_group_keys(self.group_keys, df, added)
+                skill_index = self._skill_index.extend(added['title']) if self._skill_index is not None else None
+                similar_jobs = self._similar_jobs.extend(added) if self._similar_jobs is not None else None
+            # No query sees part of the old state and part of the new
+            with self.state_lock.writing():
+                if self._trends is not None:
+                    self._trends.update(added)
+                self.df, self.job_categories, self._title_roles = df, job_categories, title_roles
+                self.cube, self.sketches, self.group_keys, self._skill_index = cube, sketches, keys, skill_index
+                self._similar_jobs = similar_jobs
+                self.filter_index = filter_index
+                self._state_store = None
+                self.cache.clear()
+        return len(added)
+
+    def _process_rows(self, rows):
+        """Run the loading pipeline over raw `rows` alone: their processed frame, job_categories and TitleRoles"""
+        stages = JobDataProcessor.__new__(JobDataProcessor)
+        stages.df, stages.workers, stages.profiler = rows.reset_index(drop=True), self.workers, Profiler(enabled=False)
+        stages.clean_data()
+        stages.extract_categories()
+        stages.calculate_metrics()
+        if self._compact:
+            stages.compact()
+        added = stages.df
+        codes, titles = pd.factorize(added['title'], use_na_sentinel=True)
+        counts = np.bincount(codes[codes >= 0], minlength=len(titles))
+        title_roles = self.title_roles.extend(np.asarray(titles, dtype=object), counts)
+        # Missing titles (code -1) pick the -1 appended last
+        role_codes = np.append(title_roles.codes(titles), -1)[codes]
+        # The frame's categories, plus any new roles, so the role column usually concatenates as is
+        categories = self.df['role'].cat.categories
+        new_roles = pd.Index(title_roles.labels[len(self.title_roles):], dtype=object)
+        if len(new_roles):
+            categories = categories.append(new_roles)
+        added['role'] = pd.Categorical(np.where(role_codes >= 0, title_roles.labels[np.maximum(role_codes, 0)], None),
+                                       categories=categories)
+        return added, stages.job_categories, title_roles
+
+    @profiled
+    def refresh(self):
+        """Take in the postings added to the source since it was read; returns how many were added"""
+        if self.engine == 'duckdb':
+            self._pool.refresh(force=True)
+            count = self._posting_count()
+            added, self._postings = count - self._postings, count
+            return added
+        if self._source is None:
+            return 0
+        with self._append_lock:
+            with self.profiler.span('read_new_rows'):
+                rows, watermark = self._read_new_rows()
+            added = self.append(rows)
+            if watermark is not None:
+                self._csv_watermark = watermark
+        return added
+
+    def _posting_count(self):
+        with self._pool.cursor() as cursor:
+            return cursor.execute('SELECT COUNT(*) FROM sg_jobs').fetchone()[0]
+
+    def _read_new_rows(self):
+        """Raw postings the source gained since it was read, and the CSV watermark after them (None for DuckDB)"""
+        source, columns = self._source, self._source_columns
+        watermark = None
+        if source.lower().endswith('.duckdb'):
+            rows = self._read_source(source, columns=columns, since=self.df['metadata_newPostingDate'].max())
+        else:
+            rows, watermark = read_csv_appended(source, self._csv_watermark, columns=columns,
+                                                dtype={col: str for col in CSV_TEXT_COLUMNS})
+            if rows is None:
+                logger.info('%s was rewritten rather than appended to; reading it whole', source)
+                watermark = csv_watermark(source)
+                rows = self._read_source(source, columns=columns)
+        if len(rows) and 'metadata_jobPostId' in rows.columns:
+            # The loaded ids are scanned for the few new ones rather than hashed whole
+            ids, loaded = rows['metadata_jobPostId'], self.df['metadata_jobPostId']
+            rows = rows[~ids.isin(loaded[loaded.isin(ids)])]
+        return rows, watermark
+
+    @profiled
+    @cached
+    def rollup(self, group_by=(), measures=None, roles=None, industries=None, salary_range=None, exp_level=None,
+               position=None, employment=None):
+        """Aggregate the jobs matching the filter_data criteria by `group_by` dimensions (pandas engine)"""
+        if self.engine == 'duckdb':
+            raise ValueError('rollup needs the pandas engine; the duckdb engine aggregates in SQL')
+        filters = filter_criteria(roles, industries, salary_range, exp_level, position, employment)
+        return self._select(filters).rollup(group_by, measures=measures)
+
+    def _select(self, filters, top_companies=10):
+        """The rows matching the filter_data criteria, which aggregates read from (see sg_job_selection)"""
+        if self.engine == 'duckdb':
+            return DuckDBSelection(self, filters, percentiles=sorted(set(SALARY_PERCENTILES) | {0.5}),
+                                   top_companies=top_companies)
+        self.ensure_indexes()
+        return PandasSelection(self, filters)
 
-        role_stats.columns = ['salary_min', 'count', 'salary_max', 'apps', 'views', 'competition', 'min_exp']
-        role_stats = role_stats[role_stats['count'] >= 3].sort_values('count', ascending=False)
+    @profiled
+    @cached
+    def get_dashboard(self, roles=None, industries=None, salary_range=None, exp_level=None, position=None,
+                      employment=None, top_roles=20, top_companies=10, top_industries=15, top_skills=25,
+                      top_skill_salaries=10, salary_bins=50, columns=None):
+        """Get every aggregate the dashboard shows for the filter_data criteria at once"""
+        filters = filter_criteria(roles, industries, salary_range, exp_level, position, employment)
+        selection = self._select(filters, top_companies=max(top_companies, 1))
+        dashboard = {}
+        parts = {
+            'salary_histogram': lambda: selection.histogram('average_salary', salary_bins),
+            'overview': lambda: self._market_overview(selection),
+            'employment_counts': lambda: self._job_counts(selection, 'employmentTypes'),
+            'top_companies': lambda: selection.top('postedCompany_name', top_companies),
+            'top_roles': lambda: self._top_roles(selection, top_roles),
+            'industry_stats': lambda: self._industry_stats(selection),
+            'employment_by_industry': lambda: self._employment_by_industry(selection),
+            'skills': lambda: self._skill_keywords(selection, top_skills),
+            'skill_salary': lambda: self._skill_salary(selection, list(dashboard['skills'])[:top_skill_salaries]),
+            'experience_counts': lambda: self._experience_counts(selection),
+            'salary_by_position': lambda: self._salary_by_position(selection),
+            'salary_percentiles': lambda: self._format_percentiles(
+                selection.quantiles('average_salary', SALARY_PERCENTILES, group_by='positionLevels'),
+                SALARY_PERCENTILES, 'positionLevels'
+            ),
+            'salary_by_experience': lambda: self._salary_by_experience(selection),
+            'salary_by_industry': lambda: self._salary_by_industry(selection, top_industries),
+        }
+        if columns:
+            parts['jobs'] = lambda: selection.frame(columns)
+        for name, part in parts.items():
+            with self.profiler.span(f'dashboard:{name}'):
+                dashboard[name] = part()
+        return dashboard
+
+    @profiled
+    @cached
+    def get_salary_histogram(self, bins=50, measure='average_salary', roles=None, industries=None, salary_range=None,
+                             exp_level=None, position=None, employment=None):
+        """Get a histogram of `measure` for the filter_data criteria in round-width bins"""
+        if measure not in HISTOGRAM_MEASURES:
+            raise ValueError(f"measure must be one of {HISTOGRAM_MEASURES}, got {measure!r}")
+        filters = filter_criteria(roles, industries, salary_range, exp_level, position, employment)
+        return self._select(filters).histogram(measure, bins)
+
+    @profiled
+    @cached
+    def get_role_benchmark(self, role, bins=20, industries=None, salary_range=None, exp_level=None, position=None,
+                           employment=None):
+        """Get salary and application statistics of one canonical role for the filter_data criteria"""
+        filters = filter_criteria([role], industries, salary_range, exp_level, position, employment)
+        selection = self._select(filters)
+        totals = selection.rollup(measures=[
+            'average_salary', 'salary_minimum', 'salary_maximum', 'metadata_totalNumberJobApplication'
+        ]).iloc[0]
+        return {
+            'jobs': int(totals['jobs']),
+            'avg_salary': totals['average_salary_mean'],
+            'salary_min': totals['salary_minimum_mean'],
+            'salary_max': totals['salary_maximum_mean'],
+            'avg_applications': totals['metadata_totalNumberJobApplication_mean'],
+            'histogram': selection.histogram('average_salary', bins),
+        }
+
+    @profiled
+    @cached
+    def get_similar_jobs(self, title=None, job_id=None, top_n=10, salary=None, experience=None, roles=None,
+                         industries=None, salary_range=None, exp_level=None, position=None, employment=None):
+        """Get the postings most similar to a job title or to a loaded posting, and their salary spread"""
+        filters = filter_criteria(roles, industries, salary_range, exp_level, position, employment)
+        category = exclude = None
+        if job_id is not None:
+            posting, exclude = self._posting(job_id)
+            title, category = posting['title'], posting['main_category']
+            salary = posting['average_salary'] if salary is None else salary
+            experience = posting['minimumYearsExperience'] if experience is None else experience
+        if title is None or not str(title).strip():
+            raise ValueError('get_similar_jobs needs a title or a job_id')
+        title = str(title)
+        category = None if pd.isna(category) else category
+        salary = None if salary is None or pd.isna(salary) else float(salary)
+        experience = None if experience is None or pd.isna(experience) else float(experience)
+
+        if self.engine == 'duckdb':
+            jobs = self._similar_duckdb(title, top_n, category, salary, experience, filters, job_id)
+        else:
+            rows = self.select_rows(**filters) if any(filters.values()) else None
+            positions, similarity = self.similar_jobs.search(title, top_n, category, salary, experience, rows=rows,
+                                                             exclude=exclude)
+            self.ensure_columns(SIMILAR_COLUMNS)
+            jobs = self.df.iloc[positions, self.df.columns.get_indexer(SIMILAR_COLUMNS)].reset_index(drop=True)
+            jobs['similarity'] = similarity.round(4)
+        return {'jobs': jobs, 'salary': salary_spread(jobs['average_salary'])}
+
+    def _posting(self, job_id):
+        """The posting with metadata_jobPostId `job_id` (at least SIMILAR_COLUMNS), and its row position (pandas)"""
+        if self.engine == 'duckdb':
+            found = self._query(f"SELECT {', '.join(SIMILAR_COLUMNS)} FROM jobs WHERE metadata_jobPostId = ? LIMIT 1",
+                                [str(job_id)])
+            position = None
+        else:
+            self.ensure_columns(SIMILAR_COLUMNS)
+            matches = np.flatnonzero((self.df['metadata_jobPostId'] == str(job_id)).to_numpy(dtype=bool,
+                                                                                           na_value=False))
+            found = self.df.iloc[matches[:1]]
+            position = int(matches[0]) if len(matches) else None
+        if not len(found):
+            raise KeyError(f'no posting with metadata_jobPostId {job_id!r}')
+        return found.iloc[0], position
 
-        return role_stats.head(top_n)
+    def _similar_duckdb(self, title, top_n, category, salary, experience, filters, exclude_id):
+        """get_similar_jobs' postings for the duckdb engine: fetch the nearest titles' postings, score them here"""
+        similar_jobs = self.similar_jobs
+        nearest, similarity = similar_jobs.nearest_titles(title)
+        if not len(nearest):
+            return pd.DataFrame(columns=SIMILAR_COLUMNS + ['similarity'])
+        where, params = self._where_duckdb(**filters)
+        conditions = ['list_contains(?, title)'] + ([where[len('WHERE '):]] if where else [])
+        params = [list(similar_jobs.titles[nearest])] + params
+        if exclude_id is not None:
+            conditions.append('metadata_jobPostId <> ?')
+            params.append(str(exclude_id))
+        # Scans keep the table's order, which ties are broken by as in the pandas engine
+        candidates = self._query(f"SELECT {', '.join(SIMILAR_COLUMNS)} FROM jobs WHERE {' AND '.join(conditions)}",
+                                 params)
+        scores = similar_jobs.score_frame(candidates, nearest, similarity, category, salary, experience)
+        top = top_positions(scores, np.arange(len(candidates)), top_n)
+        jobs = candidates.iloc[top].reset_index(drop=True)
+        jobs['similarity'] = scores[top].round(4)
+        return jobs
 
-    def get_industry_stats(self):
-        """Get statistics by industry"""
-        industry_stats = self.df.groupby('main_category').agg({
-            'title': 'count',
-            'salary_minimum': 'mean',
-            'salary_maximum': 'mean',
-            'numberOfVacancies': 'sum',
-            'engagement_score': 'mean',
-            'minimumYearsExperience': 'mean'
+    @profiled
+    @cached
+    def get_top_roles(self, top_n=20, roles=None, industries=None, salary_range=None, exp_level=None,
+                      position=None, employment=None):
+        """Get top N canonical roles by frequency for the filter_data criteria"""
+        filters = filter_criteria(roles, industries, salary_range, exp_level, position, employment)
+        if self.engine == 'duckdb':
+            where, params = self._where_duckdb(**filters)
+            role_stats = self._query(f"""
+                SELECT role,
+                    AVG(salary_minimum) AS salary_min,
+                    COUNT(salary_minimum) AS count,
+                    AVG(salary_maximum) AS salary_max,
+                    SUM(metadata_totalNumberJobApplication) AS apps,
+                    SUM(metadata_totalNumberOfView) AS views,
+                    AVG(engagement_score) AS competition,
+                    AVG(minimumYearsExperience) AS min_exp
+                FROM jobs
+                {f'{where} AND role IS NOT NULL' if where else 'WHERE role IS NOT NULL'}
+                GROUP BY role
+                HAVING COUNT(salary_minimum) >= 3
+                ORDER BY count DESC, role
+                LIMIT ?
+            """, params + [top_n])
+            return role_stats.set_index('role').round(2)
+
+        return self._top_roles(self._select(filters), top_n)
+
+    def _top_roles(self, selection, top_n):
+        role_stats = selection.role_stats()[ROLE_STATS].round(2)
+        role_stats = role_stats[role_stats['count'] >= 3]
+        # Most posted first, ties by role as in the duckdb engine
+        role_stats = role_stats.loc[role_stats['count'].nlargest(top_n, keep='all').index]
+        return role_stats.sort_index().sort_values('count', ascending=False, kind='stable').head(top_n)
+
+    @profiled
+    @cached
+    def get_industry_stats(self, roles=None, industries=None, salary_range=None, exp_level=None, position=None,
+                           employment=None):
+        """Get statistics by industry for the filter_data criteria"""
+        filters = filter_criteria(roles, industries, salary_range, exp_level, position, employment)
+        if self.engine == 'duckdb':
+            where, params = self._where_duckdb(**filters)
+            industry_stats = self._query(f"""
+                SELECT main_category,
+                    COUNT(title) AS jobs_count,
+                    AVG(salary_minimum) AS salary_min,
+                    AVG(salary_maximum) AS salary_max,
+                    SUM(numberOfVacancies) AS vacancies,
+                    AVG(engagement_score) AS competition,
+                    AVG(minimumYearsExperience) AS min_exp
+                FROM jobs {where}
+                GROUP BY main_category
+                ORDER BY jobs_count DESC, main_category
+            """, params)
+            return industry_stats.set_index('main_category').round(2)
+
+        return self._industry_stats(self._select(filters))
+
+    def _industry_stats(self, selection):
+        cells = selection.rollup(['main_category'], measures=[
+            'salary_minimum', 'salary_maximum', 'numberOfVacancies', 'engagement_score', 'minimumYearsExperience'
+        ])
+        industry_stats = pd.DataFrame({
+            'jobs_count': cells['title_count'],
+            'salary_min': cells['salary_minimum_mean'],
+            'salary_max': cells['salary_maximum_mean'],
+            'vacancies': cells['numberOfVacancies_sum'],
+            'competition': cells['engagement_score_mean'],
+            'min_exp': cells['minimumYearsExperience_mean']
         }).round(2)
 
-        industry_stats.columns = ['jobs_count', 'salary_min', 'salary_max', 'vacancies', 'competition', 'min_exp']
-        industry_stats = industry_stats.sort_values('jobs_count', ascending=False)
+        industry_stats = industry_stats.sort_index().sort_values('jobs_count', ascending=False, kind='stable')
         return industry_stats
 
-    def get_salary_by_position(self):
-        """Get salary statistics by position level"""
-        pos_stats = self.df.groupby('positionLevels').agg({
-            'salary_minimum': ['mean', 'median', 'count'],
-            'salary_maximum': ['mean', 'median'],
-            'average_salary': 'mean'
-        }).round(0)
-
-        pos_stats.columns = ['salary_min_avg', 'salary_min_median', 'count', 'salary_max_avg', 'salary_max_median', 'avg_salary']
-        pos_stats = pos_stats[pos_stats['count'] >= 10].sort_values('avg_salary', ascending=False)
-        return pos_stats
-
-    def get_skill_keywords(self, top_n=30):
-        """Extract skill keywords from job titles"""
-        # Common tech and skill keywords
-        tech_keywords = {
-            'Python', 'Java', 'JavaScript', 'SQL', 'C#', 'C++', 'PHP', 'React', 'Node.js',
-            'AWS', 'Azure', 'GCP', 'Docker', 'Kubernetes', 'Git', 'Linux', 'Windows',
-            'Data Science', 'Machine Learning', 'AI', 'Analytics', 'BI', 'SAP', 'Salesforce',
-            'Oracle', 'MySQL', 'MongoDB', '.NET', 'Angular', 'Vue', 'Django', 'Flask',
-            'Tableau', 'Power BI', 'Excel', 'VBA', 'R', 'Scala', 'Golang', 'Rust',
-            'DevOps', 'Cloud', 'Cybersecurity', 'Security', 'Network', 'System Admin',
-            'Manager', 'Lead', 'Engineer', 'Developer', 'Analyst', 'Consultant',
-            'Accountant', 'Auditor', 'Finance', 'Marketing', 'Sales', 'HR', 'Recruiter',
-            'Project Manager', 'Product Manager', 'Business Analyst', 'QA', 'Testing'
+    @profiled
+    @cached
+    def get_salary_by_position(self, roles=None, industries=None, salary_range=None, exp_level=None, position=None,
+                               employment=None):
+        """Get salary statistics by position level for the filter_data criteria"""
+        filters = filter_criteria(roles, industries, salary_range, exp_level, position, employment)
+        if self.engine == 'duckdb':
+            where, params = self._where_duckdb(**filters)
+            pos_stats = self._query(f"""
+                SELECT positionLevels,
+                    AVG(salary_minimum) AS salary_min_avg,
+                    QUANTILE_DISC(salary_minimum, 0.5) AS salary_min_median,
+                    COUNT(salary_minimum) AS count,
+                    AVG(salary_maximum) AS salary_max_avg,
+                    QUANTILE_DISC(salary_maximum, 0.5) AS salary_max_median,
+                    AVG(average_salary) AS avg_salary
+                FROM jobs {where}
+                GROUP BY positionLevels
+                HAVING COUNT(salary_minimum) >= 10
+                ORDER BY avg_salary DESC NULLS LAST, positionLevels
+            """, params)
+            return pos_stats.set_index('positionLevels').round(0)
+
+        return self._salary_by_position(self._select(filters))
+
+    def _salary_by_position(self, selection):
+        cells = selection.rollup(['positionLevels'], measures=['salary_minimum', 'salary_maximum', 'average_salary'])
+        medians = {
+            measure: selection.quantiles(measure, [0.5], group_by='positionLevels')[0.5].reindex(cells.index)
+            for measure in ('salary_minimum', 'salary_maximum')
+        }
+        pos_stats = pd.DataFrame({
+            'salary_min_avg': cells['salary_minimum_mean'],
+            'salary_min_median': medians['salary_minimum'],
+            'count': cells['salary_minimum_count'],
+            'salary_max_avg': cells['salary_maximum_mean'],
+            'salary_max_median': medians['salary_maximum'],
+            'avg_salary': cells['average_salary_mean']
+        })
+        pos_stats = pos_stats[pos_stats['count'] >= 10]
+        # Ordered before rounding, as in the duckdb engine
+        return pos_stats.sort_index().sort_values('avg_salary', ascending=False, kind='stable').round(0)
+
+    @profiled
+    @cached
+    def get_skill_keywords(self, top_n=30, roles=None, industries=None, salary_range=None, exp_level=None,
+                           position=None, employment=None):
+        """Extract skill keywords from the job titles matching the filter_data criteria"""
+        filters = filter_criteria(roles, industries, salary_range, exp_level, position, employment)
+        if self.engine == 'duckdb':
+            # Only the distinct titles (with their frequency) leave DuckDB
+            where, params = self._where_duckdb(**filters)
+            titles = self._query(f"""
+                SELECT title, COUNT(*) AS n FROM jobs
+                {f'{where} AND title IS NOT NULL' if where else 'WHERE title IS NOT NULL'}
+                GROUP BY title
+            """, params)
+            skill_counts = self.skill_matcher.build_index(titles['title']).skill_counts(weights=titles['n'])
+            return skill_counts.head(top_n).to_dict()
+
+        return self._skill_keywords(self._select(filters), top_n)
+
+    @staticmethod
+    def _skill_keywords(selection, top_n):
+        return selection.skill_counts().head(top_n).to_dict()
+
+    @property
+    def skill_index(self):
+        """Title x skill match index over `self.df`, built on first use"""
+        if self._skill_index is None:
+            self._skill_index = self.skill_matcher.build_index(self.df['title'])
+        return self._skill_index
+
+    @property
+    def trends(self):
+        """TrendRollups over the postings, built on first use"""
+        if self._trends is None:
+            with self._prepare_lock:
+                if self._trends is None:
+                    with self.profiler.span('build_trends'):
+                        self._trends = self._build_trends()
+        return self._trends
+
+    @property
+    def similar_jobs(self):
+        """SimilarJobs over the postings (over their titles only for the duckdb engine)"""
+        if self._similar_jobs is None:
+            with self._prepare_lock:
+                if self._similar_jobs is None:
+                    self._similar_jobs = self._build_similar_jobs()
+        return self._similar_jobs
+
+    def _build_similar_jobs(self):
+        with self.profiler.span('build_similar_jobs'):
+            if self.engine == 'duckdb':
+                counts = self._query('SELECT title, COUNT(*) AS postings FROM jobs '
+                                     'WHERE title IS NOT NULL GROUP BY title ORDER BY title')
+                return SimilarJobs(counts['title'], counts['postings'])
+            self.ensure_columns(['main_category'])
+            return SimilarJobs.build(self.df)
+
+    def _build_trends(self):
+        if self.engine == 'duckdb':
+            # Daily cells aggregated in SQL; the rollups regroup those rather than the rows
+            return TrendRollups(self._query("""
+                SELECT date_trunc('day', metadata_newPostingDate) AS period, title, role, main_category,
+                    COUNT(*) AS postings,
+                    COALESCE(SUM(numberOfVacancies), 0) AS vacancies,
+                    COALESCE(SUM(metadata_totalNumberJobApplication), 0) AS applications,
+                    COUNT(average_salary) AS salary_count,
+                    COALESCE(SUM(average_salary), 0) AS salary_sum
+                FROM jobs
+                WHERE metadata_newPostingDate IS NOT NULL
+                GROUP BY ALL
+            """))
+        self.ensure_columns(TREND_COLUMNS)
+        return TrendRollups.build(self.df)
+
+    @profiled
+    @cached
+    def get_trends(self, dimension=None, freq='W', keys=None, start=None, end=None):
+        """Get postings, vacancies, applications and avg_salary per day ('D') or week ('W')"""
+        return self.trends.series(dimension, freq, keys=keys, start=start, end=end)
+
+    @profiled
+    @cached
+    def get_growth(self, dimension='role', window_days=DEFAULT_WINDOW_DAYS, end=None):
+        """Get each role's activity over the last `window_days` days against the window before"""
+        return self.trends.growth(dimension, window_days, end=end)
+
+    @profiled
+    @cached
+    def get_emerging_roles(self, top_n=10, window_days=DEFAULT_WINDOW_DAYS, min_postings=5, end=None,
+                           dimension='role'):
+        """Get the roles gaining postings fastest over the last `window_days` days"""
+        return self.trends.emerging(dimension, window_days, min_postings=min_postings, top_n=top_n, end=end)
+
+    @profiled
+    def get_skill_salary(self, data, skills=None):
+        """Get job count and average salary per skill mentioned in the titles of `data`"""
+        skill_stats = self.skill_matcher.build_index(data['title']).skill_stats(data['average_salary'], skills=skills)
+        skill_stats.columns = ['count', 'avg_salary']
+        return skill_stats[skill_stats['count'] > 0]
+
+    @staticmethod
+    def _skill_salary(selection, skills):
+        skill_stats = selection.skill_stats(skills=skills)
+        skill_stats.columns = ['count', 'avg_salary']
+        return skill_stats[skill_stats['count'] > 0]
+
+    @profiled
+    @cached
+    def get_market_overview(self, roles=None, industries=None, salary_range=None, exp_level=None, position=None,
+                            employment=None):
+        """Get key market statistics for the filter_data criteria"""
+        filters = filter_criteria(roles, industries, salary_range, exp_level, position, employment)
+        if self.engine == 'duckdb':
+            where, params = self._where_duckdb(**filters)
+            overview = self._query(f"""
+                SELECT COUNT(*) AS total_jobs,
+                    QUANTILE_DISC(average_salary, 0.5) AS median_salary,
+                    AVG(average_salary) AS avg_salary,
+                    AVG(metadata_totalNumberJobApplication) AS avg_applications,
+                    AVG(metadata_totalNumberOfView) AS avg_views,
+                    COALESCE(SUM(numberOfVacancies), 0) AS total_vacancies
+                FROM jobs {where}
+            """, params).iloc[0]
+            top_company = self.get_top_companies(top_n=1, **filters)
+            return {
+                'total_jobs': int(overview['total_jobs']),
+                'median_salary': overview['median_salary'],
+                'avg_salary': overview['avg_salary'],
+                'top_company': top_company.index[0] if len(top_company) > 0 else 'N/A',
+                'avg_applications': overview['avg_applications'],
+                'avg_views': overview['avg_views'],
+                'total_vacancies': overview['total_vacancies']
+            }
+
+        if self.filter_index is None:
+            return self._scan_market_overview(filters)
+        return self._market_overview(self._select(filters))
+
+    def _scan_market_overview(self, filters):
+        """get_market_overview from one scan of the loaded columns, before lazy mode has built the indexes"""
+        df = self.df
+        selected = np.ones(len(df), dtype=bool)
+        if filters['roles']:
+            self.ensure_columns(['role'])
+            selected &= df['role'].isin(self.title_roles.resolve(filters['roles'])).to_numpy()
+        if filters['industries']:
+            # Matched case-insensitively, as FilterIndex does
+            self.ensure_columns(['main_category'])
+            wanted = {industry.lower() for industry in filters['industries']}
+            categories = self.job_categories['category']
+            matches = np.array([str(value).lower() in wanted for value in categories.cat.categories], dtype=bool)
+            in_industries = np.zeros(len(df), dtype=bool)
+            in_industries[self.job_categories['job_row'].to_numpy()[matches[categories.cat.codes.to_numpy()]]] = True
+            selected &= in_industries
+        if filters['salary_range']:
+            salary = df['average_salary'].to_numpy(dtype=float)
+            selected &= (salary >= filters['salary_range'][0]) & (salary <= filters['salary_range'][1])
+        for arg, col in FilterIndex.BITMAP_COLUMNS.items():
+            if filters[arg]:
+                self.ensure_columns([col])
+                selected &= df[col].isin(list(filters[arg])).to_numpy()
+
+        rows = np.flatnonzero(selected)
+        salary = df['average_salary'].to_numpy(dtype=float)[rows]
+        # Ties between companies go to the first listed, as in the indexed path
+        codes, labels = group_keys(df, ['postedCompany_name'])['postedCompany_name']
+        codes = codes[rows]
+        company_counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+        return {
+            'total_jobs': len(rows),
+            'median_salary': quantiles(salary, [0.5])[0],
+            'avg_salary': pd.Series(salary).mean(),
+            'top_company': labels[company_counts.argmax()] if company_counts.sum() > 0 else 'N/A',
+            'avg_applications': df['metadata_totalNumberJobApplication'].iloc[rows].mean(),
+            'avg_views': df['metadata_totalNumberOfView'].iloc[rows].mean(),
+            'total_vacancies': df['numberOfVacancies'].iloc[rows].sum()
+        }
+
+    @staticmethod
+    def _market_overview(selection):
+        totals = selection.rollup(measures=[
+            'average_salary', 'metadata_totalNumberJobApplication', 'metadata_totalNumberOfView', 'numberOfVacancies'
+        ]).iloc[0]
+        top_company = selection.top('postedCompany_name', 1)
+        return {
+            'total_jobs': int(totals['jobs']),
+            'median_salary': selection.quantiles('average_salary', [0.5])[0.5].iloc[0],
+            'avg_salary': totals['average_salary_mean'],
+            'top_company': top_company.index[0] if len(top_company) > 0 else 'N/A',
+            'avg_applications': totals['metadata_totalNumberJobApplication_mean'],
+            'avg_views': totals['metadata_totalNumberOfView_mean'],
+            'total_vacancies': totals['numberOfVacancies_sum']
         }
 
-        skill_counter = Counter()
-        for title in self.df['title'].dropna():
-            for keyword in tech_keywords:
-                if keyword.lower() in title.lower():
-                    skill_counter[keyword] += 1
+    @staticmethod
+    def _job_counts(selection, dim):
+        counts = selection.rollup([dim], measures=[])['jobs'].rename('count')
+        return counts[counts > 0].sort_values(ascending=False, kind='stable')
+
+    @staticmethod
+    def _experience_counts(selection):
+        counts = selection.rollup(['exp_category'], measures=[])['jobs'].rename('count')
+        counts.index = counts.index.astype(str)
+        counts = counts.reindex(EXP_LABELS, fill_value=0)
+        counts.index = pd.CategoricalIndex(EXP_LABELS, ordered=True, name='exp_category')
+        return counts
+
+    @profiled
+    @cached
+    def get_salary_percentiles(self, percentiles=SALARY_PERCENTILES, group_by=None, measure='average_salary',
+                               roles=None, industries=None, salary_range=None, exp_level=None, position=None,
+                               employment=None):
+        """Get salary percentiles (default p25/p50/p75/p90) and counts for the filter_data criteria"""
+        if measure not in QUANTILE_MEASURES:
+            raise ValueError(f"measure must be one of {QUANTILE_MEASURES}, got {measure!r}")
+        if group_by is not None and group_by not in PARTITION_DIMENSIONS[:-1]:
+            raise ValueError(f"group_by must be one of {PARTITION_DIMENSIONS[:-1]}, got {group_by!r}")
+        filters = filter_criteria(roles, industries, salary_range, exp_level, position, employment)
+        percentiles = list(percentiles)
+
+        if self.engine == 'duckdb':
+            where, params = self._where_duckdb(**filters)
+            stats = self._query(f"""
+                SELECT {f'{group_by} AS "group",' if group_by else ''}
+                    QUANTILE_DISC({measure}, ?) AS q,
+                    COUNT({measure}) AS count
+                FROM jobs {where}
+                {f'GROUP BY {group_by}' if group_by else ''}
+            """, [percentiles] + params)
+            if group_by:
+                stats = stats.dropna(subset=['group']).set_index('group').rename_axis(group_by)
+            stats = pd.concat([
+                pd.DataFrame(stats['q'].dropna().tolist(), index=stats['q'].dropna().index, columns=percentiles)
+                .reindex(stats.index),
+                stats[['count']]
+            ], axis=1)
+        else:
+            stats = self._select(filters).quantiles(measure, percentiles, group_by=group_by)
+        return self._format_percentiles(stats, percentiles, group_by)
+
+    @staticmethod
+    def _format_percentiles(stats, percentiles, group_by):
+        """get_salary_percentiles' result from a quantiles frame (q columns plus count)"""
+        stats = stats[stats['count'] > 0].rename(columns={q: f'p{round(q * 100)}' for q in percentiles})
+        stats['count'] = stats['count'].astype('int64')
+        if not group_by:
+            return stats.iloc[0].rename(None) if len(stats) else pd.Series(np.nan, index=stats.columns)
+        if group_by == 'exp_category':
+            stats = stats.reindex([label for label in EXP_LABELS if label in stats.index])
+            stats.index = pd.CategoricalIndex(stats.index, categories=EXP_LABELS, ordered=True, name=group_by)
+            return stats
+        return stats.sort_index()
+
+    @profiled
+    @cached
+    def get_top_companies(self, top_n=10, roles=None, industries=None, salary_range=None, exp_level=None,
+                          position=None, employment=None):
+        """Get the companies posting the most jobs for the filter_data criteria"""
+        return self._top_values('postedCompany_name', top_n,
+                                **filter_criteria(roles, industries, salary_range, exp_level, position, employment))
+
+    @profiled
+    @cached
+    def get_top_titles(self, top_n=10, roles=None, industries=None, salary_range=None, exp_level=None,
+                       position=None, employment=None):
+        """Get the most posted job titles for the filter_data criteria"""
+        return self._top_values('title', top_n,
+                                **filter_criteria(roles, industries, salary_range, exp_level, position, employment))
+
+    def _top_values(self, column, top_n, **filters):
+        """Most frequent values of a HEAVY_HITTER_COLUMNS column as a Series of counts"""
+        if column not in HEAVY_HITTER_COLUMNS:
+            raise ValueError(f"column must be one of {HEAVY_HITTER_COLUMNS}, got {column!r}")
+        if self.engine == 'duckdb':
+            where, params = self._where_duckdb(**filters)
+            conditions = f'{where} AND {column} IS NOT NULL' if where else f'WHERE {column} IS NOT NULL'
+            counts = self._query(f"""
+                SELECT {column}, COUNT(*) AS count FROM jobs {conditions}
+                GROUP BY {column}
+                ORDER BY count DESC, {column}
+                LIMIT ?
+            """, params + [top_n])
+            return counts.set_index(column)['count']
+
+        return self._select(filters).top(column, top_n)
+
+    @profiled
+    @cached
+    def get_filter_options(self):
+        """Get the values and bounds the dashboard sidebar filters offer"""
+        if self.engine == 'duckdb':
+            def distinct(col):
+                return self._query(f"SELECT DISTINCT {col} FROM jobs WHERE {col} IS NOT NULL ORDER BY 1")[col].tolist()
 
-        return dict(skill_counter.most_common(top_n))
+            industries = self._query("""
+                SELECT DISTINCT unnest(category_list) AS category FROM jobs ORDER BY 1
+            """)['category'].tolist()
 
-    def get_market_overview(self):
-        """Get key market statistics"""
+            bounds = self._query("""
+                SELECT MAX(salary_maximum) AS salary_max,
+                    QUANTILE_CONT(salary_maximum, 0.9) AS salary_q90
+                FROM jobs
+            """).iloc[0]
+            return {
+                'industries': industries,
+                'positions': distinct('positionLevels'),
+                'employment_types': distinct('employmentTypes'),
+                'salary_max': bounds['salary_max'],
+                'salary_q90': bounds['salary_q90']
+            }
+
+        self.ensure_columns(['main_category'])
         return {
-            'total_jobs': len(self.df),
-            'median_salary': self.df['average_salary'].median(),
-            'avg_salary': self.df['average_salary'].mean(),
-            'top_company': self.df['postedCompany_name'].value_counts().index[0] if len(self.df) > 0 else 'N/A',
-            'avg_applications': self.df['metadata_totalNumberJobApplication'].mean(),
-            'avg_views': self.df['metadata_totalNumberOfView'].mean(),
-            'total_vacancies': self.df['numberOfVacancies'].sum()
+            'industries': list(self.job_categories['category'].cat.categories),
+            'positions': sorted(self.df['positionLevels'].unique()),
+            'employment_types': sorted(self.df['employmentTypes'].unique()),
+            'salary_max': self.df['salary_maximum'].max(),
+            'salary_q90': self.df['salary_maximum'].quantile(0.9)
         }
 
-    def filter_data(self, roles=None, industries=None, salary_range=None, exp_level=None, position=None):
+    @profiled
+    @cached
+    def get_employment_by_industry(self, roles=None, industries=None, salary_range=None, exp_level=None,
+                                   position=None, employment=None):
+        """Get job counts by industry x employment type for the filter_data criteria"""
+        filters = filter_criteria(roles, industries, salary_range, exp_level, position, employment)
+        if self.engine == 'duckdb':
+            where, params = self._where_duckdb(**filters)
+            counts = self._query(f"""
+                SELECT main_category, employmentTypes, COUNT(*) AS n
+                FROM jobs {where}
+                GROUP BY main_category, employmentTypes
+            """, params)
+            crosstab = counts.pivot(index='main_category', columns='employmentTypes', values='n')
+            return crosstab.fillna(0).astype('int64').sort_index().sort_index(axis=1)
+
+        return self._employment_by_industry(self._select(filters))
+
+    @staticmethod
+    def _employment_by_industry(selection):
+        crosstab = selection.rollup(['main_category', 'employmentTypes'], measures=[])['jobs'].unstack(fill_value=0)
+        return crosstab.sort_index().sort_index(axis=1)
+
+    @profiled
+    @cached
+    def get_salary_by_industry(self, top_n=15, roles=None, industries=None, salary_range=None, exp_level=None,
+                               position=None, employment=None):
+        """Get average salaries by industry for the filter_data criteria, best paying first"""
+        filters = filter_criteria(roles, industries, salary_range, exp_level, position, employment)
+        if self.engine == 'duckdb':
+            where, params = self._where_duckdb(**filters)
+            ind_salary = self._query(f"""
+                SELECT main_category,
+                    AVG(average_salary) AS average_salary,
+                    AVG(salary_minimum) AS salary_minimum,
+                    AVG(salary_maximum) AS salary_maximum
+                FROM jobs {where}
+                GROUP BY main_category
+            """, params).set_index('main_category').round(0)
+            return ind_salary.sort_index().sort_values('average_salary', ascending=False, kind='stable').head(top_n)
+
+        return self._salary_by_industry(self._select(filters), top_n)
+
+    @staticmethod
+    def _salary_by_industry(selection, top_n):
+        measures = ['average_salary', 'salary_minimum', 'salary_maximum']
+        cells = selection.rollup(['main_category'], measures=measures)
+        ind_salary = pd.DataFrame({measure: cells[f'{measure}_mean'] for measure in measures}).round(0)
+        return ind_salary.sort_index().sort_values('average_salary', ascending=False, kind='stable').head(top_n)
+
+    @profiled
+    @cached
+    def get_salary_by_experience(self, roles=None, industries=None, salary_range=None, exp_level=None, position=None,
+                                 employment=None):
+        """Get average_salary mean/median/min/max and count by experience level for the filter_data criteria"""
+        if self.engine == 'duckdb':
+            where, params = self._where_duckdb(roles, industries, salary_range, exp_level, position, employment)
+            exp_salary = self._query(f"""
+                SELECT exp_category,
+                    AVG(average_salary) AS mean,
+                    QUANTILE_DISC(average_salary, 0.5) AS median,
+                    MIN(average_salary) AS min,
+                    MAX(average_salary) AS max,
+                    COUNT(average_salary) AS count
+                FROM jobs {where}
+                GROUP BY exp_category
+            """, params).set_index('exp_category').reindex(EXP_LABELS)
+            exp_salary.index = pd.CategoricalIndex(EXP_LABELS, ordered=True, name='exp_category')
+            return exp_salary.dropna(how='all')
+
+        filters = filter_criteria(roles, industries, salary_range, exp_level, position, employment)
+        return self._salary_by_experience(self._select(filters))
+
+    @staticmethod
+    def _salary_by_experience(selection):
+        cells = selection.rollup(['exp_category'], measures=['average_salary'])
+        cells.index = cells.index.astype(str)
+        cells = cells.reindex(EXP_LABELS)
+        medians = selection.quantiles('average_salary', [0.5], group_by='exp_category')[0.5]
+        medians.index = medians.index.astype(str)
+        exp_salary = pd.DataFrame({
+            'mean': cells['average_salary_mean'].to_numpy(),
+            'median': medians.reindex(EXP_LABELS).to_numpy(),
+            'min': cells['average_salary_min'].to_numpy(),
+            'max': cells['average_salary_max'].to_numpy(),
+            'count': cells['average_salary_count'].to_numpy()
+        }, index=pd.CategoricalIndex(EXP_LABELS, ordered=True, name='exp_category'))
+        return exp_salary.dropna(how='all')
+
+    @profiled
+    def filter_data(self, roles=None, industries=None, salary_range=None, exp_level=None, position=None,
+                    employment=None, columns=None):
         """Filter data based on criteria"""
-        filtered = self.df.copy()
+        if self.engine == 'duckdb':
+            return self._filter_duckdb(roles, industries, salary_range, exp_level, position, employment, columns)
 
+        with self.state_lock.reading():
+            rows = self.select_rows(roles, industries, salary_range, exp_level, position, employment)
+            if columns:
+                return self.df.iloc[rows, self.df.columns.get_indexer(list(columns))]
+            return self.df.take(rows)
+
+    @profiled
+    def export(self, sink, format='parquet', columns=None, compression=None, batch_rows=DEFAULT_BATCH_ROWS,
+               roles=None, industries=None, salary_range=None, exp_level=None, position=None, employment=None):
+        """Write the filter_data rows to `sink` as Parquet or an Arrow IPC file; returns the number of rows written"""
+        check_export(format, compression)
+        filters = filter_criteria(roles, industries, salary_range, exp_level, position, employment)
+        if self.engine == 'duckdb':
+            where, params = self._where_duckdb(**filters)
+            select = ', '.join(f'"{col}"' for col in columns) if columns else '* EXCLUDE (category_list)'
+            with self._pool.cursor() as cursor:
+                if columns:
+                    # The columns of the cleaned relation, which may derive some that sg_jobs doesn't store
+                    known = {row[0] for row in cursor.execute(f'DESCRIBE ({self._jobs_sql})').fetchall()}
+                    unknown = [col for col in columns if col not in known]
+                    if unknown:
+                        raise KeyError(f'no such columns: {unknown}')
+                reader = cursor.execute(f'WITH jobs AS ({self._jobs_sql}) SELECT {select} FROM jobs {where}',
+                                        params).fetch_record_batch(batch_rows)
+                return write_batches(reader.schema, reader, sink, format, compression)
+
+        # Rows of this frame: append() swaps in a new frame rather than growing it, so the batches can be
+        # written without holding up the next one
+        with self.state_lock.reading():
+            df, rows = self.df, self.select_rows(**filters)
+        columns = list(columns) if columns else list(df.columns)
+        unknown = [col for col in columns if col not in df.columns]
+        if unknown:
+            raise KeyError(f'no such columns: {unknown}')
+        schema, batches = frame_batches(df, rows, columns, batch_rows)
+        return write_batches(schema, batches, sink, format, compression)
+
+    def select_rows(self, roles=None, industries=None, salary_range=None, exp_level=None, position=None,
+                    employment=None):
+        """Row positions in `self.df` matching the filter_data criteria (pandas engine)"""
+        self.ensure_indexes()
+        with self.state_lock.reading():
+            return self.filter_index.select(
+                roles=self.title_roles.resolve(roles) if roles else roles, industries=industries,
+                salary_range=salary_range, exp_level=exp_level, position=position, employment=employment
+            )
+
+    def _filter_duckdb(self, roles, industries, salary_range, exp_level, position, employment, columns):
+        """filter_data for the duckdb engine: compile the criteria to a WHERE clause"""
+        where, params = self._where_duckdb(roles, industries, salary_range, exp_level, position, employment)
+        select = ', '.join(f'"{col}"' for col in columns) if columns else '* EXCLUDE (category_list)'
+        filtered = self._query(f'SELECT {select} FROM jobs {where}', params)
+
+        if 'exp_category' in filtered.columns:
+            filtered['exp_category'] = pd.Categorical(filtered['exp_category'], categories=EXP_LABELS, ordered=True)
+        return filtered
+
+    def _where_duckdb(self, roles, industries, salary_range, exp_level, position, employment):
+        """WHERE clause (empty without criteria) and its parameters for the filter_data criteria"""
+        conditions, params = [], []
         if roles:
-            filtered = filtered[filtered['title'].isin(roles)]
+            conditions.append('list_contains(?, role)')
+            params.append(self.title_roles.resolve(roles))
         if industries:
-            filtered = filtered[filtered['main_category'].str.contains('|'.join(industries), case=False, na=False)]
+            conditions.append('list_has_any(list_transform(category_list, c -> lower(c)), ?)')
+            params.append([industry.lower() for industry in industries])
         if salary_range:
-            filtered = filtered[
-                (filtered['average_salary'] >= salary_range[0]) &
-                (filtered['average_salary'] <= salary_range[1])
-            ]
+            conditions.append('average_salary BETWEEN ? AND ?')
+            params.extend([salary_range[0], salary_range[1]])
         if exp_level:
-            filtered = filtered[filtered['exp_category'].isin(exp_level)]
+            conditions.append('list_contains(?, exp_category)')
+            params.append(list(exp_level))
         if position:
-            filtered = filtered[filtered['positionLevels'].isin(position)]
-
-        return filtered
+            conditions.append('list_contains(?, positionLevels)')
+            params.append(list(position))
+        if employment:
+            conditions.append('list_contains(?, employmentTypes)')
+            params.append(list(employment))
+        return (f"WHERE {' AND '.join(conditions)}" if conditions else ''), params
@@ -0,0 +1,257 @@
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger('sg_jobs.duckdb')
+
+DEFAULT_POOL_SIZE = 8
+# Seconds between checks for a newer database generation
+DEFAULT_CHECK_INTERVAL_S = 1.0
+# Generation files kept when publishing, the new one included; older ones may still be read by slow readers
+DEFAULT_KEEP_GENERATIONS = 3
+
+
+def connect_read_only(path, threads=None, memory_limit=None):
+    """A read-only DuckDB connection to `path`, limited to `threads` threads and `memory_limit` (e.g. '2GB')
+
+    Read-only connections take no write lock, so any number of processes can
+    hold one on the same file. Within a process DuckDB shares one database
+    instance per file, so the limits apply to every connection to it and all
+    of them must pass the same ones.
+    """
+    # Deferred: only the duckdb engine and .duckdb sources need duckdb
+    import duckdb
+    config = {}
+    if threads:
+        config['threads'] = int(threads)
+    if memory_limit:
+        config['memory_limit'] = str(memory_limit)
+    return duckdb.connect(database=path, read_only=True, config=config)
+
+
+def current_generation(path):
+    """The database file `path` points to now (`path` itself unless it is a symlink)"""
+    return os.path.realpath(path)
+
+
+def _generation_pattern(path):
+    root, ext = os.path.splitext(os.path.basename(path))
+    return re.compile(rf'{re.escape(root)}\.(\d+){re.escape(ext)}')
+
+
+def new_generation_path(path):
+    """An unused file name, next to `path`, for the next generation of the database at `path`"""
+    root, ext = os.path.splitext(path)
+    while True:
+        candidate = f'{root}.{time.time_ns()}{ext}'
+        if not os.path.exists(candidate):
+            return candidate
+
+
+def list_generations(path):
+    """Generation files of the database at `path`, oldest first"""
+    directory = os.path.dirname(path) or '.'
+    pattern = _generation_pattern(path)
+    found = [(int(match.group(1)), name) for name in os.listdir(directory)
+             for match in [pattern.fullmatch(name)] if match]
+    return [os.path.join(directory, name) for _, name in sorted(found)]
+
+
+def publish_generation(path, generation, keep=DEFAULT_KEEP_GENERATIONS):
+    """Point `path` at the finished database file `generation` atomically; returns the generations deleted
+
+    `path` becomes a symlink to `generation` (a plain database file at `path`
+    is replaced the first time), swapped with a rename so readers see either
+    the old or the new file, never a partial one. Processes that have a
+    generation open keep reading it; DuckDBPool readers move to the new one at
+    their next check. All but the last `keep` generations are then deleted
+    (on POSIX, readers still on a deleted one keep reading it until they
+    switch).
+    """
+    link = f'{generation}.link'
+    os.symlink(os.path.basename(generation), link)
+    try:
+        os.replace(link, path)
+    except BaseException:
+        os.remove(link)
+        raise
+    current = current_generation(path)
+    deleted = []
+    for old in list_generations(path)[:-keep if keep > 0 else None]:
+        if os.path.realpath(old) == current:
+            continue
+        for leftover in (old, f'{old}.wal'):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        deleted.append(old)
+    return deleted
+
+
+class _Generation:
+    """One database file's connection and the cursors handed out over it"""
+
+    def __init__(self, target, conn):
+        self.target = target
+        self.conn = conn
+        self.idle = []
+        self.leased = 0
+        self.retired = False
+
+
+class DuckDBPool:
+    """Read-only cursors over a DuckDB database file, shared by the threads of one process
+
+    One read-only connection is opened per database file with the `threads`
+    and `memory_limit` budget, which DuckDB applies to the whole database
+    instance, so it bounds the process however many queries run. cursor()
+    checks out one of up to `size` cursors over it; further concurrent
+    queries wait for one to come back. Cursors are reused across queries.
+
+    Hot swap: scripts/migrate_to_duckdb.py writes each refresh to a new
+    generation file and publishes it by pointing `path` (a symlink) at it
+    (publish_generation). At most every `check_interval_s` seconds a checkout
+    resolves `path` again; when it points to another file the pool opens it,
+    new checkouts get cursors over it while queries already running finish on
+    the old one (closed once its last cursor comes back), and the `on_swap`
+    callbacks are called with the new file.
+    """
+
+    def __init__(self, path, size=DEFAULT_POOL_SIZE, threads=None, memory_limit=None,
+                 check_interval_s=DEFAULT_CHECK_INTERVAL_S):
+        self.path = path
+        self.size = size
+        self.threads = threads
+        self.memory_limit = memory_limit
+        self.check_interval_s = check_interval_s
+        self.on_swap = []
+        self.swaps = 0
+        self.waits = 0
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._leased = 0
+        self._next_check = time.monotonic() + check_interval_s
+        self._current = None
+        if path is not None:
+            target = current_generation(path)
+            self._current = _Generation(target, connect_read_only(target, threads, memory_limit))
+
+    @classmethod
+    def over(cls, conn, size=DEFAULT_POOL_SIZE):
+        """A pool of cursors over an open connection (e.g. an in-memory database), which is never swapped"""
+        pool = cls(None, size=size)
+        pool._current = _Generation(None, conn)
+        return pool
+
+    @property
+    def generation(self):
+        """The database file new checkouts read (None for a pool over a connection)"""
+        current = self._current
+        return current.target if current is not None else None
+
+    def refresh(self, force=False):
+        """Switch to the file `path` points to if it changed; returns True if the pool switched
+
+        Checks at most every check_interval_s seconds unless `force`. If the
+        new file can't be opened the pool stays on the current one and tries
+        again at the next check.
+        """
+        if self.path is None or self._current is None:
+            return False
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return False
+        self._next_check = now + self.check_interval_s
+        target = current_generation(self.path)
+        if target == self.generation:
+            return False
+        try:
+            # Opened outside the lock; checkouts carry on over the current file meanwhile
+            conn = connect_read_only(target, self.threads, self.memory_limit)
+        except Exception as error:
+            logger.warning('cannot open database generation %s, staying on %s: %s', target, self.generation, error)
+            return False
+        with self._lock:
+            if self._current is None or self._current.target == target:
+                conn.close()
+                return False
+            old, self._current = self._current, _Generation(target, conn)
+            self._retire(old)
+            self.swaps += 1
+            self._available.notify_all()
+        logger.info('switched to database generation %s', target)
+        for callback in list(self.on_swap):
+            callback(target)
+        return True
+
+    @contextmanager
+    def cursor(self):
+        """Check out a cursor over the current generation for the duration of the with block"""
+        self.refresh()
+        with self._lock:
+            waited = False
+            while True:
+                generation = self._current
+                if generation is None:
+                    raise RuntimeError('the DuckDB pool is closed')
+                if generation.idle or self._leased < self.size:
+                    break
+                if not waited:
+                    self.waits += 1
+                    waited = True
+                self._available.wait()
+            cursor = generation.idle.pop() if generation.idle else generation.conn.cursor()
+            generation.leased += 1
+            self._leased += 1
+        reusable = False
+        try:
+            yield cursor
+            reusable = True
+        finally:
+            # A cursor whose query failed is closed rather than handed to the next query
+            self._release(generation, cursor, reusable)
+
+    def _release(self, generation, cursor, reusable):
+        with self._lock:
+            generation.leased -= 1
+            self._leased -= 1
+            if reusable and not generation.retired:
+                generation.idle.append(cursor)
+            else:
+                cursor.close()
+            if generation.retired and generation.leased == 0:
+                generation.conn.close()
+            self._available.notify()
+
+    def _retire(self, generation):
+        generation.retired = True
+        for cursor in generation.idle:
+            cursor.close()
+        generation.idle.clear()
+        if generation.leased == 0:
+            generation.conn.close()
+
+    def close(self):
+        """Close the connection (the current one once its cursors come back); later checkouts fail"""
+        with self._lock:
+            if self._current is not None:
+                self._retire(self._current)
+                self._current = None
+            self._available.notify_all()
+
+    def stats(self):
+        """Current generation, cursors leased and idle, swaps and checkouts that had to wait"""
+        with self._lock:
+            current = self._current
+            return {
+                'generation': current.target if current is not None else None,
+                'size': self.size,
+                'leased': self._leased,
+                'idle': len(current.idle) if current is not None else 0,
+                'swaps': self.swaps,
+                'waits': self.waits,
+                'threads': self.threads,
+                'memory_limit': self.memory_limit,
+            }
@@ -0,0 +1,69 @@
+# Optional pyarrow support (Parquet and Arrow IPC exports); its writers are imported on first export
+try:
+    import pyarrow
+except Exception:
+    pyarrow = None
+
+# Export formats and their file extension
+EXPORT_FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+EXPORT_MIME_TYPES = {'parquet': 'application/vnd.apache.parquet', 'arrow': 'application/vnd.apache.arrow.file'}
+# Codecs each format can compress with ('none': uncompressed), the first being the default
+COMPRESSIONS = {'parquet': ('snappy', 'zstd', 'gzip', 'lz4', 'none'), 'arrow': ('none', 'lz4', 'zstd')}
+# Rows converted and written at a time; memory held by an export is about one batch of them
+DEFAULT_BATCH_ROWS = 64 * 1024
+
+
+def check_export(format, compression=None):
+    """The codec to write `format` with (compression, or the format's default); ValueError if either is unknown"""
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {tuple(EXPORT_FORMATS)}, got {format!r}")
+    codecs = COMPRESSIONS[format]
+    compression = codecs[0] if compression is None else str(compression).lower()
+    if compression not in codecs:
+        raise ValueError(f"{format} compression must be one of {codecs}, got {compression!r}")
+    return compression
+
+
+def frame_batches(df, rows, columns, batch_rows=DEFAULT_BATCH_ROWS):
+    """Schema and record batches of the `columns` of `df` at row positions `rows`, batch_rows rows at a time
+
+    Only one batch of rows is copied out of the frame at a time. The schema
+    comes from the frame's dtypes, so every batch has the same one
+    (categoricals stay dictionary-encoded with all their categories).
+    """
+    if pyarrow is None:
+        raise ImportError('pyarrow package is required to export data')
+    positions = df.columns.get_indexer(list(columns))
+    schema = pyarrow.Schema.from_pandas(df.iloc[:0, positions], preserve_index=False)
+
+    def batches():
+        for start in range(0, len(rows), batch_rows):
+            yield pyarrow.RecordBatch.from_pandas(df.iloc[rows[start:start + batch_rows], positions], schema=schema,
+                                                  preserve_index=False)
+
+    return schema, batches()
+
+
+def write_batches(schema, batches, sink, format='parquet', compression=None):
+    """Write record batches to `sink` (a path or a binary file object) as Parquet or an Arrow IPC file
+
+    Batches are written as they come, each as a Parquet row group or an IPC
+    record batch, so nothing but the batch being written is held. Returns
+    the number of rows written.
+    """
+    if pyarrow is None:
+        raise ImportError('pyarrow package is required to export data')
+    from pyarrow import ipc, parquet
+    compression = check_export(format, compression)
+    codec = None if compression == 'none' else compression
+    if format == 'parquet':
+        writer = parquet.ParquetWriter(sink, schema, compression=codec or 'none')
+    else:
+        writer = ipc.new_file(sink, schema, options=ipc.IpcWriteOptions(compression=codec))
+    rows = 0
+    with writer:
+        for batch in batches:
+            if batch.num_rows:
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    return rows
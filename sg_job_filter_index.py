@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+
+
+class FilterIndex:
+    """Precomputed index answering the dashboard filters without scanning the frame.
+
+    - positionLevels, employmentTypes, exp_category and categories get one packed
+      bitmap (np.packbits, 1 bit per row) per value
+    - role (the canonical role of the title), which has too many values for
+      bitmaps, gets sorted row-id lists
+    - average_salary gets a sorted order so ranges resolve with two binary searches
+
+    A filter combination ORs the bitmaps of the selected values within a
+    dimension and ANDs the dimensions together.
+    """
+
+    # filter_data argument -> frame column for the bitmap dimensions
+    BITMAP_COLUMNS = {
+        'position': 'positionLevels',
+        'employment': 'employmentTypes',
+        'exp_level': 'exp_category',
+    }
+
+    def __init__(self, df, job_categories):
+        self.n_rows = len(df)
+        self.bitmaps = {}
+        for dim, col in self.BITMAP_COLUMNS.items():
+            codes, values = pd.factorize(df[col], use_na_sentinel=True)
+            self.bitmaps[dim] = self._bitmaps_from_codes(codes, values)
+
+        # Industries are matched case-insensitively, as the old regex filter did
+        categories = job_categories['category']
+        self.bitmaps['industries'] = self._bitmaps_from_codes(
+            categories.cat.codes.to_numpy(),
+            [str(value).lower() for value in categories.cat.categories],
+            rows=job_categories['job_row'].to_numpy()
+        )
+
+        role_codes, roles = pd.factorize(df['role'], use_na_sentinel=True)
+        self._role_order, self._role_bounds = self._group_rows(role_codes, len(roles))
+        self._role_ids = {role: i for i, role in enumerate(roles)}
+
+        salary = df['average_salary'].to_numpy(dtype=float)
+        self._salary_order = np.argsort(salary, kind='stable')  # NaN sorts last
+        self._salary_sorted = salary[self._salary_order]
+
+    def extend(self, df, job_categories):
+        """The index over the indexed rows followed by the rows of `df` (job_categories' job_row relative to it)
+
+        Only `df` is indexed; its part is joined on: bitmaps are concatenated,
+        and the role row lists and salary order merged in linear time.
+        """
+        added = FilterIndex(df, job_categories)
+        n_old, n_new = self.n_rows, added.n_rows
+        extended = FilterIndex.__new__(FilterIndex)
+        extended.n_rows = n_old + n_new
+
+        def bits(bitmaps, value, n):
+            bitmap = bitmaps.get(value)
+            return np.zeros(n, dtype=np.uint8) if bitmap is None else np.unpackbits(bitmap, count=n)
+
+        extended.bitmaps = {
+            dim: {
+                value: np.packbits(np.concatenate([bits(old, value, n_old), bits(added.bitmaps[dim], value, n_new)]))
+                for value in {**old, **added.bitmaps[dim]}
+            }
+            for dim, old in self.bitmaps.items()
+        }
+
+        # Each role's rows: its old rows, then its new ones (all positions past the old rows)
+        extended._role_ids = dict(self._role_ids)
+        for role in added._role_ids:
+            extended._role_ids.setdefault(role, len(extended._role_ids))
+        n_roles = len(extended._role_ids)
+        remap = np.array([extended._role_ids[role] for role in added._role_ids], dtype=np.int64)
+        old_sizes = np.zeros(n_roles, dtype=np.int64)
+        old_sizes[:len(self._role_ids)] = np.diff(self._role_bounds)
+        new_sizes = np.zeros(n_roles, dtype=np.int64)
+        new_sizes[remap] = np.diff(added._role_bounds)
+        old_bounds = np.concatenate([[0], np.cumsum(old_sizes)])
+        new_bounds = np.concatenate([[0], np.cumsum(new_sizes)])
+        extended._role_bounds = old_bounds + new_bounds
+        order = np.empty(len(self._role_order) + len(added._role_order), dtype=np.int64)
+        old_roles = np.repeat(np.arange(n_roles), old_sizes)
+        order[np.arange(len(self._role_order)) + new_bounds[old_roles]] = self._role_order
+        added_roles = np.repeat(np.arange(len(remap)), np.diff(added._role_bounds))
+        rank = np.arange(len(added._role_order)) - added._role_bounds[added_roles]
+        roles = remap[added_roles]
+        order[extended._role_bounds[roles] + old_sizes[roles] + rank] = added._role_order + n_old
+        extended._role_order = order
+
+        # New salaries go after equal old ones (NaN included), as a stable sort of all rows would put them
+        at = np.searchsorted(self._salary_sorted, added._salary_sorted, side='right')
+        extended._salary_sorted = np.insert(self._salary_sorted, at, added._salary_sorted)
+        extended._salary_order = np.insert(self._salary_order, at, added._salary_order + n_old)
+        return extended
+
+    @staticmethod
+    def _group_rows(codes, n_values):
+        """Positions of `codes` sorted by code, plus each code's [start, end) bounds"""
+        valid = np.flatnonzero(codes >= 0)
+        order = valid[np.argsort(codes[valid], kind='stable')]
+        bounds = np.searchsorted(codes[order], np.arange(n_values + 1))
+        return order, bounds
+
+    def _bitmaps_from_codes(self, codes, values, rows=None):
+        """One packed bitmap per value; `rows` maps each code to its row (default: position)"""
+        order, bounds = self._group_rows(codes, len(values))
+        rows = order if rows is None else rows[order]
+        return {
+            value: self._rows_to_bitmap(rows[bounds[code]:bounds[code + 1]])
+            for code, value in enumerate(values)
+        }
+
+    def _rows_to_bitmap(self, rows):
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[rows] = True
+        return np.packbits(mask)
+
+    def _union(self, dim, values):
+        """OR of the bitmaps of `values` in `dim`; unknown values match nothing"""
+        bitmaps = self.bitmaps[dim]
+        if dim == 'industries':
+            values = [value.lower() for value in values]
+        selected = [bitmaps[value] for value in values if value in bitmaps]
+        if not selected:
+            return np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+        return np.bitwise_or.reduce(selected)
+
+    def role_rows(self, role):
+        """Row positions with the given canonical role"""
+        role_id = self._role_ids.get(role)
+        if role_id is None:
+            return np.empty(0, dtype=np.int64)
+        return self._role_order[self._role_bounds[role_id]:self._role_bounds[role_id + 1]]
+
+    def salary_rows(self, low, high):
+        """Row positions with low <= average_salary <= high"""
+        start = np.searchsorted(self._salary_sorted, low, side='left')
+        end = np.searchsorted(self._salary_sorted, high, side='right')
+        return self._salary_order[start:end]
+
+    def salary_order(self, rows):
+        """Positions into `rows` (sorted row positions) ordered by average_salary, NaN last, without sorting"""
+        selected = np.zeros(self.n_rows, dtype=bool)
+        selected[rows] = True
+        return np.searchsorted(rows, self._salary_order[selected[self._salary_order]])
+
+    def select(self, roles=None, industries=None, salary_range=None, exp_level=None, position=None,
+               employment=None):
+        """Resolve a filter combination to sorted row positions
+
+        roles are role labels; JobDataProcessor.select_rows resolves titles to them first.
+        """
+        selection = None
+
+        def intersect(bitmap):
+            return bitmap if selection is None else np.bitwise_and(selection, bitmap)
+
+        for dim, values in (('industries', industries), ('exp_level', exp_level),
+                            ('position', position), ('employment', employment)):
+            if values:
+                selection = intersect(self._union(dim, values))
+        if roles:
+            selection = intersect(self._rows_to_bitmap(np.concatenate([self.role_rows(role) for role in roles])))
+        if salary_range:
+            selection = intersect(self._rows_to_bitmap(self.salary_rows(salary_range[0], salary_range[1])))
+
+        if selection is None:
+            return np.arange(self.n_rows)
+        return np.flatnonzero(np.unpackbits(selection, count=self.n_rows))
+
+    def memory_usage(self):
+        """Bytes held by the index"""
+        bitmap_bytes = sum(bitmap.nbytes for dim in self.bitmaps.values() for bitmap in dim.values())
+        role_bytes = self._role_order.nbytes + self._role_bounds.nbytes
+        return bitmap_bytes + role_bytes + self._salary_order.nbytes + self._salary_sorted.nbytes
@@ -0,0 +1,182 @@
+import hashlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+# Optional pyarrow support (Arrow IPC hand-off between processes)
+try:
+    import pyarrow
+    import pyarrow.ipc
+except Exception:
+    pyarrow = None
+
+QUOTE = ord('"')
+NEWLINE = ord('\n')
+# Bytes counted at a time while tracking quote parity, and searched for a record end past each split point
+SCAN_BLOCK_BYTES = 16 * 2 ** 20
+SEARCH_WINDOW_BYTES = 64 * 2 ** 10
+# Bytes before a watermark that must be unchanged for the file to count as appended to
+FINGERPRINT_BYTES = 64 * 2 ** 10
+
+
+def _record_ends(data, parity):
+    """Positions of the newlines in `data` that end a record, given the quote parity before `data`
+
+    A newline inside a quoted field has an odd number of quotes before it
+    (escaped quotes come in pairs), so only newlines after an even count end
+    a record.
+    """
+    quotes = np.bitwise_xor.accumulate((data == QUOTE).view(np.uint8)) ^ parity
+    newlines = np.flatnonzero(data == NEWLINE)
+    return newlines[quotes[newlines] == 0]
+
+
+def _quote_parity(data, start, end):
+    """Parity of the number of quotes in data[start:end]"""
+    parity = 0
+    for block_start in range(start, end, SCAN_BLOCK_BYTES):
+        block = data[block_start:min(block_start + SCAN_BLOCK_BYTES, end)]
+        parity ^= int(np.count_nonzero(block == QUOTE) & 1)
+    return parity
+
+
+def csv_partitions(path, n_partitions, max_bytes=None):
+    """Split a CSV file into byte ranges that each hold whole records
+
+    Returns the header line (bytes) and [(start, end)] ranges covering every
+    record after it: `n_partitions` of them, or more when max_bytes caps
+    their size. Each split point moves forward to the next newline outside
+    quotes, found by tracking quote parity from the start of the file, so
+    quoted fields spanning lines are never cut.
+    """
+    if os.path.getsize(path) == 0:
+        return b'', []
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    size = len(data)
+
+    def next_record_start(pos, parity):
+        """First record start at or after `pos` (quote parity `parity` before it), and the parity there"""
+        while pos < size:
+            window = np.asarray(data[pos:pos + SEARCH_WINDOW_BYTES])
+            ends = _record_ends(window, parity)
+            if len(ends):
+                end = int(ends[0]) + 1
+                return pos + end, parity ^ int(np.count_nonzero(window[:end] == QUOTE) & 1)
+            parity ^= int(np.count_nonzero(window == QUOTE) & 1)
+            pos += len(window)
+        return size, parity
+
+    body_start, parity = next_record_start(0, 0)
+    header = bytes(data[:body_start])
+    n_partitions = max(int(n_partitions), 1)
+    if max_bytes:
+        n_partitions = max(n_partitions, -(-(size - body_start) // int(max_bytes)))
+
+    boundaries = [body_start]
+    pos = body_start
+    for k in range(1, n_partitions):
+        target = body_start + (size - body_start) * k // n_partitions
+        if target <= pos:
+            continue
+        parity ^= _quote_parity(data, pos, target)
+        pos, parity = next_record_start(target, parity)
+        if pos >= size:
+            break
+        boundaries.append(pos)
+    boundaries.append(size)
+    return header, [(start, end) for start, end in zip(boundaries[:-1], boundaries[1:]) if end > start]
+
+
+def csv_row_bytes(path, sample_bytes=2 ** 20):
+    """Average bytes per record over the start of a CSV file (header included, at least 1)"""
+    with open(path, 'rb') as f:
+        sample = np.frombuffer(f.read(sample_bytes), dtype=np.uint8)
+    return max(len(sample) // max(len(_record_ends(sample, 0)), 1), 1)
+
+
+def read_csv_partition(path, header, start, end, columns=None, **read_csv_kwargs):
+    """Parse the records in bytes [start, end) of a CSV file, with its header line
+
+    columns optionally restricts them to those of the given columns the file has.
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        body = f.read(end - start)
+    if columns:
+        read_csv_kwargs['usecols'] = lambda col: col in columns
+    return pd.read_csv(io.BytesIO(header + body), **read_csv_kwargs)
+
+
+def _fingerprint(path, end):
+    """Digest of the FINGERPRINT_BYTES before byte `end` of a file"""
+    start = max(end - FINGERPRINT_BYTES, 0)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return hashlib.sha256(f.read(end - start)).hexdigest()
+
+
+def csv_watermark(path):
+    """Where a CSV file ends now, for read_csv_appended to read only the records added after it
+
+    A dict of the header line, the file size and a fingerprint of the bytes
+    before it. Assumes the file ends with a whole record.
+    """
+    size = os.path.getsize(path)
+    header = csv_partitions(path, 1)[0] if size else b''
+    return {'header': header, 'offset': size, 'fingerprint': _fingerprint(path, size)}
+
+
+def read_csv_appended(path, watermark, columns=None, **read_csv_kwargs):
+    """Parse the records appended to a CSV file since `watermark`; returns them and the watermark after them
+
+    Only whole records are read: one still being written (no record-ending
+    newline yet) is left for the next call. Returns (None, None) when the
+    file was rewritten rather than appended to, i.e. it shrank or the bytes
+    before the watermark changed. columns optionally restricts the columns,
+    as in read_csv_partition.
+    """
+    size = os.path.getsize(path)
+    start = watermark['offset']
+    if size < start or _fingerprint(path, start) != watermark['fingerprint'] or not watermark['header']:
+        return None, None
+    end = start
+    if size > start:
+        ends = _record_ends(np.fromfile(path, dtype=np.uint8, count=size - start, offset=start), 0)
+        if len(ends):
+            end = start + int(ends[-1]) + 1
+    rows = read_csv_partition(path, watermark['header'], start, end, columns=columns, **read_csv_kwargs)
+    return rows, dict(watermark, offset=end, fingerprint=_fingerprint(path, end))
+
+
+def to_ipc(frame):
+    """A frame packed for another process: an Arrow IPC stream if pyarrow can hold it, else the frame itself
+
+    Arrow ships columns as a few contiguous buffers, where pickling a frame
+    pickles every string object on its own.
+    """
+    if pyarrow is None:
+        return frame
+    try:
+        table = pyarrow.Table.from_pandas(frame, preserve_index=False)
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError, pyarrow.ArrowNotImplementedError):
+        return frame
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def from_ipc(payload):
+    """The frame packed by to_ipc"""
+    if isinstance(payload, pd.DataFrame):
+        return payload
+    frame = pyarrow.ipc.open_stream(payload).read_all().to_pandas()
+    # Arrow nulls come back as None in object columns, where pandas readers leave NaN
+    for col in frame.columns:
+        if frame[col].dtype == object:
+            values = frame[col].to_numpy(copy=True)
+            values[pd.isna(values)] = np.nan
+            frame[col] = values
+    return frame
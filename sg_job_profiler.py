@@ -0,0 +1,158 @@
+import functools
+import json
+import logging
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Spans are also emitted here as one JSON object per line when INFO is enabled
+logger = logging.getLogger('sg_jobs.profile')
+
+# Durations kept per span name for the percentile summary
+WINDOW = 1000
+
+
+def _peak_rss_mb():
+    """Process peak resident set size so far, in MB (NaN where unavailable)"""
+    if resource is None:
+        return float('nan')
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+class Span:
+    """One timed region; use through Profiler.span()"""
+
+    __slots__ = ('profiler', 'name', 'tags', 'parent', 'wall_start', 'cpu_start', 'rss_start')
+
+    def __init__(self, profiler, name, tags):
+        self.profiler = profiler
+        self.name = name
+        self.tags = tags
+
+    def __enter__(self):
+        stack = self.profiler._stack()
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self.rss_start = _peak_rss_mb()
+        self.cpu_start = time.process_time()
+        self.wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        wall = time.perf_counter() - self.wall_start
+        cpu = time.process_time() - self.cpu_start
+        rss = _peak_rss_mb()
+        self.profiler._stack().pop()
+        self.profiler._record({
+            'name': self.name,
+            'parent': self.parent,
+            'wall_ms': wall * 1000,
+            'cpu_ms': cpu * 1000,
+            'peak_rss_mb': rss,
+            'peak_rss_growth_mb': rss - self.rss_start,
+            'failed': exc_info[0] is not None,
+            **self.tags,
+        })
+        return False
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class Profiler:
+    """Always-on, low-overhead timing of named regions.
+
+    Each span records wall time, CPU time (process-wide, so it includes other
+    threads) and the process peak RSS after it, plus how much the span raised
+    that peak. Spans cost a few microseconds: no tracing, just clocks and one
+    getrusage call. Recent spans are kept in memory for summary() and
+    recent(), and each one is logged as JSON on the `sg_jobs.profile` logger
+    when INFO logging is enabled for it.
+    """
+
+    def __init__(self, enabled=True, window=WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._durations = {}
+        self._recent = deque(maxlen=window)
+
+    def span(self, name, **tags):
+        """Context manager timing the enclosed block under `name`; tags are logged with it"""
+        if not self.enabled:
+            return _NoSpan()
+        return Span(self, name, tags)
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, record):
+        record['at'] = time.time()
+        with self._lock:
+            durations = self._durations.get(record['name'])
+            if durations is None:
+                durations = self._durations[record['name']] = deque(maxlen=self.window)
+            durations.append((record['wall_ms'], record['cpu_ms'], record['peak_rss_growth_mb']))
+            self._recent.append(record)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(record, default=str))
+
+    def summary(self):
+        """Per span name: calls in the window and wall/CPU time statistics (ms), slowest p95 first"""
+        with self._lock:
+            snapshot = {name: np.array(durations) for name, durations in self._durations.items()}
+        rows = {}
+        for name, values in snapshot.items():
+            wall, cpu, growth = values[:, 0], values[:, 1], values[:, 2]
+            rows[name] = {
+                'calls': len(wall),
+                'mean_ms': wall.mean(),
+                'p50_ms': np.percentile(wall, 50),
+                'p95_ms': np.percentile(wall, 95),
+                'max_ms': wall.max(),
+                'cpu_mean_ms': cpu.mean(),
+                'peak_rss_growth_mb': np.nanmax(growth) if not np.isnan(growth).all() else np.nan,
+            }
+        summary = pd.DataFrame.from_dict(rows, orient='index', columns=[
+            'calls', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms', 'cpu_mean_ms', 'peak_rss_growth_mb'
+        ])
+        return summary.rename_axis('span').sort_values('p95_ms', ascending=False)
+
+    def recent(self, n=50):
+        """The last `n` span records, newest first"""
+        with self._lock:
+            return list(self._recent)[-n:][::-1]
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._recent.clear()
+
+
+def profiled(method):
+    """Time a JobDataProcessor method under its own name with the instance's profiler"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.profiler.span(method.__name__):
+            return method(self, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,234 @@
+import functools
+import inspect
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+# filter_data criteria; the order of their values doesn't change the result
+FILTER_ARGS = ('roles', 'industries', 'salary_range', 'exp_level', 'position', 'employment')
+UNORDERED_FILTER_ARGS = ('roles', 'industries', 'exp_level', 'position', 'employment')
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_MB = 256
+DEFAULT_TTL_S = 30 * 60
+
+
+def _freeze(value):
+    """Hashable stand-in for an argument value (lists become tuples)"""
+    if isinstance(value, (list, tuple, np.ndarray, pd.Index, pd.Series)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_freeze(item) for item in value))
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def normalize_filters(filters):
+    """Canonical form of filter_data criteria: empty criteria dropped, value lists sorted"""
+    normalized = []
+    for name in FILTER_ARGS:
+        value = filters.get(name)
+        if value is None or (not isinstance(value, str) and len(value) == 0):
+            continue
+        if name in UNORDERED_FILTER_ARGS:
+            value = tuple(sorted({str(item) for item in value}))
+        else:
+            value = tuple(float(bound) for bound in value)
+        normalized.append((name, value))
+    return tuple(normalized)
+
+
+def result_nbytes(value):
+    """Approximate bytes held by a query result"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(result_nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(result_nbytes(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """Bounded, thread-safe LRU cache of query results with a time to live.
+
+    Entries are evicted least recently used first once there are more than
+    `max_entries` of them or they hold more than `max_mb` together, and are
+    dropped on lookup once older than `ttl_s` seconds (None: never). A result
+    larger than the whole budget is returned but not kept. max_entries=0
+    turns caching off. Threads asking for a key that is being computed wait
+    for that computation instead of repeating it.
+
+    Cached results are handed to every caller asking for them, so treat them
+    as read-only.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_mb=DEFAULT_MAX_MB, ttl_s=DEFAULT_TTL_S):
+        self.max_entries = max_entries
+        self.max_bytes = max_mb * 2 ** 20
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._pending = {}
+        # Bumped by clear() so results computed from replaced data aren't stored
+        self._generation = 0
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get_or_compute(self, key, compute):
+        """The cached result for `key`, or compute() stored under it"""
+        if not self.enabled:
+            return compute()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, nbytes, stored_at = entry
+                if self.ttl_s is None or now - stored_at <= self.ttl_s:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._drop(key)
+                self.expirations += 1
+            pending = self._pending.get(key)
+            if pending is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                future = self._pending[key] = Future()
+            generation = self._generation
+        if pending is not None:
+            return pending.result()
+
+        # Computed outside the lock so slow queries don't block cache hits
+        try:
+            value = compute()
+        except BaseException as error:
+            with self._lock:
+                self._settle(key, future)
+            future.set_exception(error)
+            raise
+        nbytes = result_nbytes(value)
+        with self._lock:
+            self._settle(key, future)
+            if nbytes <= self.max_bytes and generation == self._generation:
+                self._entries[key] = (value, nbytes, time.monotonic())
+                self._bytes += nbytes
+                while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                    self._drop(next(iter(self._entries)))
+                    self.evictions += 1
+        future.set_result(value)
+        return value
+
+    def _settle(self, key, future):
+        # clear() may have dropped this computation and a new one started since
+        if self._pending.get(key) is future:
+            del self._pending[key]
+
+    def _drop(self, key):
+        _, nbytes, _ = self._entries.pop(key)
+        self._bytes -= nbytes
+
+    def clear(self):
+        """Drop every entry (the counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+            self._generation += 1
+            self._bytes = 0
+
+    def entries(self):
+        """(key, result) of every entry not expired, least recently used first"""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, value) for key, (value, _, stored_at) in self._entries.items()
+                    if self.ttl_s is None or now - stored_at <= self.ttl_s]
+
+    def preload(self, entries):
+        """Store (key, result) pairs, e.g. from another process' entries(), as if just computed"""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for key, value in entries:
+                nbytes = result_nbytes(value)
+                if nbytes > self.max_bytes:
+                    continue
+                if key in self._entries:
+                    self._drop(key)
+                self._entries[key] = (value, nbytes, now)
+                self._bytes += nbytes
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def memory_usage(self):
+        """Approximate bytes held by the cached results"""
+        return self._bytes
+
+    def stats(self):
+        """Hit/miss/eviction counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'mb': self._bytes / 2 ** 20,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else float('nan'),
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def call_key(name, signature, *args, **kwargs):
+    """Cache key of a call: `name` and the arguments bound to `signature`, defaults applied
+
+    The filter_data criteria are normalized (see normalize_filters), so
+    equivalent calls get the same key. Raises TypeError when the arguments
+    don't fit the signature.
+    """
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    arguments.pop('self', None)
+    filters = normalize_filters(arguments)
+    others = tuple(sorted((arg, _freeze(value)) for arg, value in arguments.items() if arg not in FILTER_ARGS))
+    return name, filters, others
+
+
+def cached(method):
+    """Serve a JobDataProcessor query from the instance's result cache, keyed by call_key"""
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        # A newer database generation clears the cache before it is consulted
+        self.refresh_source()
+        key = call_key(method.__name__, signature, self, *args, **kwargs)
+        # Held until the result is cached, so a result of the data append() replaces is never cached after it
+        with self.state_lock.reading():
+            return self.cache.get_or_compute(key, lambda: method(self, *args, **kwargs))
+    return wrapper
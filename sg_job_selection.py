@@ -0,0 +1,468 @@
+import numpy as np
+import pandas as pd
+
+from sg_job_cube import COUNTED, MEASURES, rollup_rows
+from sg_job_sketches import QUANTILE_MEASURES, grouped_quantiles
+
+# Columns aggregated rows are grouped by; their codes are computed once per frame
+GROUP_KEY_COLUMNS = ['title', 'role', 'postedCompany_name', 'main_category', 'positionLevels', 'employmentTypes',
+                     'exp_category']
+
+# The groupings the dashboard rolls up by. The duckdb selection computes all
+# of them (and their salary percentiles) in a single GROUPING SETS scan.
+DASHBOARD_GROUPINGS = [
+    (), ('main_category',), ('main_category', 'employmentTypes'), ('positionLevels',), ('exp_category',),
+    ('employmentTypes',)
+]
+GROUPING_COLUMNS = ['main_category', 'employmentTypes', 'positionLevels', 'exp_category']
+
+# Per-title and per-role statistics of title_stats() and role_stats(): jobs, the
+# get_top_roles columns, and the salary count/sum the skill aggregates are derived from
+ROLE_STATS = ['salary_min', 'count', 'salary_max', 'apps', 'views', 'competition', 'min_exp']
+TITLE_STATS = ['jobs'] + ROLE_STATS + ['salary_count', 'salary_sum']
+
+# Measures the duckdb selection's rollups also keep the min/max of
+EXTREMA_MEASURES = ['average_salary']
+
+# Measures histogram() bins, and the most bins a histogram is split into
+HISTOGRAM_MEASURES = EXTREMA_MEASURES
+MAX_HISTOGRAM_BINS = 200
+
+
+def group_keys(df, columns=GROUP_KEY_COLUMNS):
+    """column -> (codes, labels): each row's group code (-1 when missing) and the group labels
+
+    Categorical columns reuse their own codes; the others are factorized once
+    into the smallest integer type that holds their codes.
+    """
+    keys = {}
+    for col in columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            keys[col] = (values.cat.codes.to_numpy(), np.asarray(values.cat.categories, dtype=object))
+        else:
+            codes, labels = pd.factorize(values, use_na_sentinel=True)
+            keys[col] = (codes.astype(np.min_scalar_type(-max(len(labels), 1))), np.asarray(labels, dtype=object))
+    return keys
+
+
+def extend_group_keys(keys, df, added):
+    """group_keys of `df`, whose rows are those `keys` was computed for followed by the rows `added`
+
+    Categorical columns reuse their codes again; the others only factorize
+    the added rows, whose new labels are appended, as factorizing all of
+    `df` would have numbered them.
+    """
+    extended = {}
+    for col, (codes, labels) in keys.items():
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            extended[col] = (values.cat.codes.to_numpy(), np.asarray(values.cat.categories, dtype=object))
+            continue
+        added_codes, uniques = pd.factorize(added[col], use_na_sentinel=True)
+        uniques = np.asarray(uniques, dtype=object)
+        positions = pd.Index(labels, dtype=object).get_indexer(pd.Index(uniques, dtype=object))
+        unseen = np.flatnonzero(positions < 0)
+        positions[unseen] = len(labels) + np.arange(len(unseen))
+        labels = np.concatenate([labels, uniques[unseen]])
+        dtype = np.min_scalar_type(-max(len(labels), 1))
+        # Missing values (code -1) pick the -1 appended last
+        extended[col] = (np.concatenate([codes.astype(dtype), np.append(positions, -1)[added_codes].astype(dtype)]),
+                         labels)
+    return extended
+
+
+def histogram_bins(low, high, bins):
+    """Uniform bins covering [low, high]: (start, width, n)
+
+    The width is the smallest round number (1, 2, 2.5 or 5 times a power of
+    ten) that covers the range in `bins` (at most MAX_HISTOGRAM_BINS) bins,
+    and the bins start at a multiple of it, so there are at most bins + 1.
+    """
+    bins = min(max(int(bins), 1), MAX_HISTOGRAM_BINS)
+    span = (high - low) / bins
+    if not span > 0:
+        return float(low), 1.0, 1
+    scale = 10.0 ** np.floor(np.log10(span))
+    width = next(step * scale for step in (1, 2, 2.5, 5, 10) if step * scale >= span)
+    start = np.floor(low / width) * width
+    return float(start), float(width), max(int(np.ceil((high - start) / width)), 1)
+
+
+def histogram_frame(start, width, counts):
+    """bin_start, bin_end and count per bin"""
+    edges = start + width * np.arange(len(counts) + 1)
+    return pd.DataFrame({'bin_start': edges[:-1], 'bin_end': edges[1:], 'count': np.asarray(counts, dtype=np.int64)})
+
+
+class PandasSelection:
+    """The rows matching one filter combination on the pandas engine, and aggregates over them
+
+    Everything is computed on first use and then shared by every aggregate
+    read from the selection: the criteria resolve to rows once, rollups the
+    processor's cube doesn't cover aggregate those rows by their precomputed
+    group keys, and each measure is sorted at most once for all its
+    percentile groupings.
+    """
+
+    def __init__(self, processor, filters):
+        self.processor = processor
+        self.filters = filters
+        self._rows = None
+        self._orders = {}
+        self._weights = None
+        # Selected rows the sketches' partitions leave out (see _cut_band_rows)
+        self._cut_rows = None
+
+    @property
+    def rows(self):
+        """Sorted positions of the selected rows in `processor.df`"""
+        if self._rows is None:
+            self._rows = self.processor.select_rows(**self.filters)
+        return self._rows
+
+    def frame(self, columns=None):
+        """The selected rows, optionally restricted to `columns`"""
+        df = self.processor.df
+        if columns:
+            return df.iloc[self.rows, df.columns.get_indexer(list(columns))]
+        return df.take(self.rows)
+
+    def rollup(self, group_by=(), measures=None):
+        """JobCube.rollup of the selection, from the processor's cube when it covers the criteria and grouping"""
+        cube = self.processor.cube
+        if cube.supports(group_by, **self.filters):
+            return cube.rollup(group_by, measures=measures, **self.filters)
+        return rollup_rows(self.processor.df, self.rows, group_by, measures=measures, keys=self.processor.group_keys,
+                           salary_step=cube.salary_step)
+
+    def quantiles(self, measure, qs, group_by=None):
+        """JobSketches.quantiles of the selection, computed exactly when the sketches don't cover the criteria"""
+        sketches = self.processor.sketches
+        if sketches.supports(**self.filters):
+            columns = [measure] if group_by is None else [measure, group_by]
+            return sketches.quantiles(measure, qs, group_by=group_by, rows=self._cut_band_rows(columns),
+                                      **self.filters)
+        values = self.processor.df[measure].to_numpy(dtype=float)[self.rows]
+        if group_by is None:
+            codes, index = np.zeros(len(values), dtype=np.int8), pd.Index([0])
+        else:
+            codes, labels = self.processor.group_keys[group_by]
+            codes, index = codes[self.rows], pd.Index(labels, name=group_by)
+        result, counts = grouped_quantiles(values, codes, len(index), qs, order=self._order(measure, values))
+        stats = pd.DataFrame(result, index=index, columns=list(qs))
+        stats['count'] = counts.astype(np.int64)
+        return stats[stats['count'] > 0] if group_by else stats
+
+    def histogram(self, measure, bins):
+        """histogram_frame of the selection's `measure` values over histogram_bins"""
+        values = self.processor.df[measure].to_numpy(dtype=float)[self.rows]
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return histogram_frame(0.0, 1.0, [])
+        start, width, n = histogram_bins(values.min(), values.max(), bins)
+        # The last bin is closed on the right
+        codes = np.minimum(np.floor((values - start) / width).astype(np.int64), n - 1)
+        return histogram_frame(start, width, np.bincount(codes, minlength=n))
+
+    def _order(self, measure, values):
+        """argsort of the selection's `measure` values, shared by all groupings"""
+        if measure not in self._orders:
+            if measure == 'average_salary':
+                # The filter index keeps average_salary sorted already
+                self._orders[measure] = self.processor.filter_index.salary_order(self.rows)
+            else:
+                self._orders[measure] = np.argsort(values, kind='stable')
+        return self._orders[measure]
+
+    def top(self, column, n):
+        """Most frequent values of a GROUP_KEY_COLUMNS column, as a Series of counts
+
+        Read from the heavy-hitter sketches when they cover the criteria and
+        their counts are exact (no partition selected ran out of counters, see
+        JobSketches.top), counted over the selected rows otherwise.
+        """
+        sketches = self.processor.sketches
+        if sketches.supports(**self.filters):
+            counts, error = sketches.top(column, n, rows=self._cut_band_rows([column]), **self.filters)
+            if not error:
+                return counts
+        codes, labels = self.processor.group_keys[column]
+        codes = codes[self.rows]
+        counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+        top = np.argsort(-counts, kind='stable')[:n]
+        top = top[counts[top] > 0]
+        return pd.Series(counts[top], index=pd.Index(labels[top], name=column), name='count')
+
+    def _cut_band_rows(self, columns):
+        """Column -> values of the selected rows in the salary bands the sketches' partitions leave out, or None"""
+        if self._cut_rows is None:
+            bands = self.processor.sketches.cut_bands(self.filters.get('salary_range'))
+            self._cut_rows = self.rows[:0]
+            if bands:
+                salary = self.processor.df['average_salary'].to_numpy(dtype=float)[self.rows]
+                inside = np.zeros(len(salary), dtype=bool)
+                for start, end in bands:
+                    inside |= (salary >= start) & (salary < end)
+                self._cut_rows = self.rows[inside]
+        if not len(self._cut_rows):
+            return None
+        frame = {}
+        for col in columns:
+            if col in self.processor.group_keys:
+                codes, labels = self.processor.group_keys[col]
+                # Missing values (code -1) pick the None appended last
+                frame[col] = np.append(labels, None)[codes[self._cut_rows]]
+            else:
+                frame[col] = self.processor.df[col].to_numpy()[self._cut_rows]
+        return frame
+
+    def title_stats(self):
+        """TITLE_STATS per title present in the selection"""
+        return self._group_stats('title')
+
+    def role_stats(self):
+        """TITLE_STATS per canonical role present in the selection"""
+        return self._group_stats('role')
+
+    def _group_stats(self, column):
+        df = self.processor.df
+        codes, labels = self.processor.group_keys[column]
+        codes = codes[self.rows]
+        valid = codes >= 0
+        codes, rows = codes[valid], self.rows[valid]
+
+        def totals(col):
+            values = df[col].to_numpy(dtype=float)[rows]
+            known = ~np.isnan(values)
+            return (np.bincount(codes, weights=known, minlength=len(labels)),
+                    np.bincount(codes, weights=np.where(known, values, 0.0), minlength=len(labels)))
+
+        def mean(col):
+            n, total = totals(col)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return np.where(n > 0, total / n, np.nan)
+
+        jobs = np.bincount(codes, minlength=len(labels))
+        salary_count, salary_sum = totals('average_salary')
+        stats = pd.DataFrame({
+            'jobs': jobs,
+            'salary_min': mean('salary_minimum'),
+            'count': totals('salary_minimum')[0].astype(np.int64),
+            'salary_max': mean('salary_maximum'),
+            'apps': totals('metadata_totalNumberJobApplication')[1],
+            'views': totals('metadata_totalNumberOfView')[1],
+            'competition': mean('engagement_score'),
+            'min_exp': mean('minimumYearsExperience'),
+            'salary_count': salary_count.astype(np.int64),
+            'salary_sum': salary_sum,
+        }, index=pd.Index(labels, name=column))
+        return stats[jobs > 0]
+
+    def _row_weights(self):
+        """1 for the selected rows of `processor.df`, 0 elsewhere"""
+        if self._weights is None:
+            self._weights = np.zeros(len(self.processor.df))
+            self._weights[self.rows] = 1
+        return self._weights
+
+    def skill_counts(self):
+        """SkillIndex.skill_counts over the selected rows"""
+        return self.processor.skill_index.skill_counts(weights=self._row_weights())
+
+    def skill_stats(self, skills=None):
+        """SkillIndex.skill_stats of average_salary over the selected rows"""
+        return self.processor.skill_index.skill_stats(self.processor.df['average_salary'], skills=skills,
+                                                      weights=self._row_weights())
+
+
+class DuckDBSelection:
+    """The rows matching one filter combination on the duckdb engine, aggregated in a few scans
+
+    - one GROUPING SETS query computes every DASHBOARD_GROUPINGS rollup
+    - one query per grouping computes the `percentiles` of the QUANTILE_MEASURES
+    - one query gathers the per-title and per-role statistics and the
+      `top_companies` most posting companies
+
+    Each runs on first use. The rollups keep to the cheap, mergeable
+    aggregates (count and sum of every measure, min/max of EXTREMA_MEASURES):
+    DuckDB's cost grows with the number of aggregates more than with the
+    number of groupings. `frame()` fetches the matching rows themselves.
+    """
+
+    def __init__(self, processor, filters, percentiles=(0.5,), top_companies=10):
+        self.processor = processor
+        self.filters = filters
+        self.percentiles = sorted(set(percentiles))
+        self.top_companies = top_companies
+        self._grouped = None
+        self._quantiles = {}
+        self._titles = None
+        self._skill_index = None
+
+    def frame(self, columns=None):
+        """The selected rows, optionally restricted to `columns`"""
+        return self.processor._filter_duckdb(columns=columns, **self.filters)
+
+    def _groups(self):
+        if self._grouped is None:
+            where, params = self.processor._where_duckdb(**self.filters)
+            stats = ['COUNT(*) AS jobs'] + [f'COUNT({col}) AS {col}_count' for col in COUNTED]
+            for measure in MEASURES:
+                stats += [f'COUNT({measure}) AS {measure}_count', f'COALESCE(SUM({measure}), 0) AS {measure}_sum']
+            for measure in EXTREMA_MEASURES:
+                stats += [f'MIN({measure}) AS {measure}_min', f'MAX({measure}) AS {measure}_max']
+            sets = ', '.join(f"({', '.join(grouping)})" for grouping in DASHBOARD_GROUPINGS)
+            dims = ', '.join(GROUPING_COLUMNS)
+            self._grouped = self.processor._query(f"""
+                SELECT GROUPING({dims}) AS grouping_id, {dims}, {', '.join(stats)}
+                FROM jobs {where}
+                GROUP BY GROUPING SETS ({sets})
+            """, params)
+        return self._grouped
+
+    def rollup(self, group_by=(), measures=None):
+        """JobCube.rollup of the selection for the DASHBOARD_GROUPINGS
+
+        Has every measure's count, sum and mean, and min/max for EXTREMA_MEASURES only.
+        """
+        group_by = tuple(group_by)
+        if group_by not in DASHBOARD_GROUPINGS:
+            raise ValueError(f"group_by must be one of {DASHBOARD_GROUPINGS}, got {group_by!r}")
+        # GROUPING() sets a bit, first column highest, for every column not grouped by
+        grouping_id = sum(1 << (len(GROUPING_COLUMNS) - 1 - i)
+                          for i, col in enumerate(GROUPING_COLUMNS) if col not in group_by)
+        grouped = self._groups()
+        rows = _group_index(grouped[grouped['grouping_id'] == grouping_id], group_by)
+
+        result = rows[['jobs'] + [f'{col}_count' for col in COUNTED]].astype('int64')
+        for measure in MEASURES if measures is None else measures:
+            count = rows[f'{measure}_count'].to_numpy(dtype=np.int64)
+            total = rows[f'{measure}_sum'].to_numpy(dtype=float)
+            result[f'{measure}_count'] = count
+            result[f'{measure}_sum'] = total
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result[f'{measure}_mean'] = np.where(count > 0, total / np.maximum(count, 1), np.nan)
+            if measure in EXTREMA_MEASURES:
+                result[f'{measure}_min'] = rows[f'{measure}_min'].to_numpy(dtype=float, na_value=np.nan)
+                result[f'{measure}_max'] = rows[f'{measure}_max'].to_numpy(dtype=float, na_value=np.nan)
+        return result
+
+    def quantiles(self, measure, qs, group_by=None):
+        """JobSketches.quantiles of the selection, for qs among `percentiles`"""
+        if not set(qs) <= set(self.percentiles):
+            raise ValueError(f"qs must be among the selection's percentiles {self.percentiles}, got {list(qs)}")
+        if group_by not in self._quantiles:
+            where, params = self.processor._where_duckdb(**self.filters)
+            stats = [f'QUANTILE_DISC({m}, ?) AS {m}_quantiles, COUNT({m}) AS {m}_count' for m in QUANTILE_MEASURES]
+            rows = self.processor._query(f"""
+                SELECT {f'{group_by},' if group_by else ''} {', '.join(stats)}
+                FROM jobs {where}
+                {f'GROUP BY {group_by}' if group_by else ''}
+            """, [self.percentiles] * len(QUANTILE_MEASURES) + params)
+            self._quantiles[group_by] = _group_index(rows, (group_by,) if group_by else ())
+        rows = self._quantiles[group_by]
+
+        positions = [self.percentiles.index(q) for q in qs]
+        values = np.array([
+            [found[i] for i in positions] if isinstance(found, (list, np.ndarray)) else [np.nan] * len(qs)
+            for found in rows[f'{measure}_quantiles']
+        ], dtype=float).reshape(len(rows), len(qs))
+        stats = pd.DataFrame(values, index=rows.index if group_by else pd.Index([0]), columns=list(qs))
+        stats['count'] = rows[f'{measure}_count'].to_numpy(dtype=np.int64)
+        return stats
+
+    def histogram(self, measure, bins):
+        """histogram_frame of the selection's `measure` values over histogram_bins, counted in one query"""
+        if measure not in HISTOGRAM_MEASURES:
+            raise ValueError(f"measure must be one of {HISTOGRAM_MEASURES}, got {measure!r}")
+        totals = self.rollup(measures=[measure]).iloc[0]
+        if not totals[f'{measure}_count']:
+            return histogram_frame(0.0, 1.0, [])
+        start, width, n = histogram_bins(totals[f'{measure}_min'], totals[f'{measure}_max'], bins)
+        where, params = self.processor._where_duckdb(**self.filters)
+        rows = self.processor._query(f"""
+            SELECT LEAST(CAST(FLOOR(({measure} - ?) / ?) AS BIGINT), ?) AS bin, COUNT(*) AS count
+            FROM jobs
+            {f'{where} AND {measure} IS NOT NULL' if where else f'WHERE {measure} IS NOT NULL'}
+            GROUP BY bin
+        """, [start, width, n - 1] + params)
+        counts = np.zeros(n, dtype=np.int64)
+        counts[rows['bin'].to_numpy(dtype=np.int64)] = rows['count'].to_numpy(dtype=np.int64)
+        return histogram_frame(start, width, counts)
+
+    def _title_rows(self):
+        if self._titles is None:
+            where, params = self.processor._where_duckdb(**self.filters)
+            # GROUPING() ids: 3 per title, 5 per role, 6 per company
+            self._titles = self.processor._query(f"""
+                SELECT GROUPING(title, role, postedCompany_name) AS grouping_id, title, role, postedCompany_name,
+                    COUNT(*) AS jobs,
+                    AVG(salary_minimum) AS salary_min,
+                    COUNT(salary_minimum) AS count,
+                    AVG(salary_maximum) AS salary_max,
+                    SUM(metadata_totalNumberJobApplication) AS apps,
+                    SUM(metadata_totalNumberOfView) AS views,
+                    AVG(engagement_score) AS competition,
+                    AVG(minimumYearsExperience) AS min_exp,
+                    COUNT(average_salary) AS salary_count,
+                    COALESCE(SUM(average_salary), 0) AS salary_sum
+                FROM jobs {where}
+                GROUP BY GROUPING SETS ((title), (role), (postedCompany_name))
+                HAVING (GROUPING(title, role, postedCompany_name) = 3 AND title IS NOT NULL)
+                    OR (GROUPING(title, role, postedCompany_name) = 5 AND role IS NOT NULL)
+                    OR (GROUPING(title, role, postedCompany_name) = 6 AND postedCompany_name IS NOT NULL)
+                QUALIFY GROUPING(title, role, postedCompany_name) IN (3, 5)
+                    OR row_number() OVER (PARTITION BY GROUPING(title, role, postedCompany_name)
+                                          ORDER BY COUNT(*) DESC, postedCompany_name) <= ?
+            """, params + [self.top_companies])
+        return self._titles
+
+    def top(self, column, n):
+        """The `n` (at most `top_companies`) companies posting the most jobs, as a Series of counts"""
+        if column != 'postedCompany_name' or n > self.top_companies:
+            raise ValueError(f"the duckdb selection keeps the top {self.top_companies} postedCompany_name values")
+        rows = self._title_rows()
+        companies = rows[rows['grouping_id'] == 6].sort_values(['jobs', column], ascending=[False, True])
+        return companies.set_index(column)['jobs'].rename('count').head(n)
+
+    def title_stats(self):
+        """TITLE_STATS per title present in the selection"""
+        rows = self._title_rows()
+        return rows[rows['grouping_id'] == 3].set_index('title')[TITLE_STATS]
+
+    def role_stats(self):
+        """TITLE_STATS per canonical role present in the selection"""
+        rows = self._title_rows()
+        return rows[rows['grouping_id'] == 5].set_index('role')[TITLE_STATS]
+
+    def _title_skills(self):
+        if self._skill_index is None:
+            self._skill_index = self.processor.skill_matcher.build_index(self.title_stats().index.to_series())
+        return self._skill_index
+
+    def skill_counts(self):
+        """SkillIndex.skill_counts over the selected rows"""
+        return self._title_skills().skill_counts(weights=self.title_stats()['jobs'].to_numpy())
+
+    def skill_stats(self, skills=None):
+        """SkillIndex.skill_stats of average_salary over the selected rows"""
+        index, titles = self._title_skills(), self.title_stats()
+        return index.stats_from_totals(
+            index.skill_totals(titles['jobs'].to_numpy()),
+            index.skill_totals(titles['salary_count'].to_numpy()),
+            index.skill_totals(titles['salary_sum'].to_numpy()),
+            skills
+        )
+
+
+def _group_index(rows, group_by):
+    """Query rows indexed by their `group_by` columns, leaving out missing keys as pandas groupby does"""
+    if not group_by:
+        return rows.reset_index(drop=True)
+    if len(group_by) == 1:
+        index = pd.Index(rows[group_by[0]], name=group_by[0])
+    else:
+        index = pd.MultiIndex.from_frame(rows[list(group_by)])
+    rows = rows.set_axis(index)
+    return rows[~rows.index.to_frame().isna().any(axis=1).to_numpy()]
@@ -0,0 +1,364 @@
+"""Asynchronous HTTP/JSON API over JobDataProcessor's queries
+
+Serves the aggregates the dashboard shows to other consumers, from one
+processor shared by every connection:
+
+- POST /query  {"method": "get_top_roles", "params": {"top_n": 10, "industries": ["Engineering"]}}
+- POST /batch  {"queries": [{"method": ..., "params": ...}, ...]}
+- GET /methods, GET /health, GET /stats
+
+Identical queries in flight are computed once (coalesced), queries arriving
+within a short window are handed to a bounded thread pool together, and both
+the query and the JSON encoding of its result run on that pool, so the event
+loop only moves bytes. Uses the standard library only.
+
+Usage:
+    python scripts/serve_api.py --data data/sg_jobs.duckdb --engine duckdb [--port 8600] [--workers 4]
+"""
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import math
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+from sg_job_result_cache import FILTER_ARGS, UNORDERED_FILTER_ARGS, call_key, normalize_filters
+
+logger = logging.getLogger('sg_jobs.service')
+
+DEFAULT_PORT = 8600
+DEFAULT_WORKERS = 4
+# Queries arriving within this many seconds of the first one queued go to the pool together
+DEFAULT_BATCH_WINDOW_S = 0.002
+DEFAULT_MAX_BATCH = 64
+# Distinct queries queued or running before new ones are turned away (503)
+DEFAULT_MAX_PENDING = 1024
+# Rows filter_data returns at most
+MAX_ROWS = 10_000
+MAX_BODY_BYTES = 1 << 20
+
+# JobDataProcessor methods the service exposes (filter_data capped in rows, see _filter_rows)
+QUERY_METHODS = [
+    'get_dashboard', 'get_market_overview', 'get_filter_options', 'get_top_roles', 'get_industry_stats',
+    'get_employment_by_industry', 'get_salary_by_position', 'get_salary_by_industry', 'get_salary_by_experience',
+    'get_salary_percentiles', 'get_salary_histogram', 'get_role_benchmark', 'get_top_companies', 'get_top_titles',
+    'get_skill_keywords', 'get_trends', 'get_growth', 'get_emerging_roles', 'get_similar_jobs', 'rollup',
+    'filter_data',
+]
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class QueryError(Exception):
+    """A query the service refuses, with the HTTP status to answer it with"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _filter_rows(processor, limit=1000, roles=None, industries=None, salary_range=None, exp_level=None,
+                 position=None, employment=None, columns=None):
+    """filter_data capped at `limit` (at most MAX_ROWS) rows"""
+    limit = min(int(limit), MAX_ROWS)
+    return processor.filter_data(roles, industries, salary_range, exp_level, position, employment,
+                                 columns=columns).head(limit)
+
+
+def check_filters(name, params):
+    """Raise QueryError (400) unless the filter_data criteria in `params` are string lists and a pair of numbers"""
+    for arg in FILTER_ARGS:
+        value = params.get(arg)
+        if value is None:
+            continue
+        if arg in UNORDERED_FILTER_ARGS:
+            if not isinstance(value, (list, tuple)) or not all(isinstance(item, str) for item in value):
+                raise QueryError(400, f'{name}: {arg} must be a list of strings')
+        elif (not isinstance(value, (list, tuple)) or len(value) != 2
+              or not all(isinstance(bound, (int, float)) and not isinstance(bound, bool) for bound in value)):
+            raise QueryError(400, f'{name}: {arg} must be a pair of numbers')
+
+
+def encode(value):
+    """JSON text of a query result: frames and series as pandas' 'split' layout, NaN as null"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.to_json(orient='split', date_format='iso', default_handler=str)
+    if isinstance(value, dict):
+        return '{' + ','.join(f'{json.dumps(str(key))}:{encode(item)}' for key, item in value.items()) + '}'
+    if isinstance(value, (list, tuple)):
+        return '[' + ','.join(encode(item) for item in value) + ']'
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return 'null'
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return 'null' if pd.isna(value) else json.dumps(pd.Timestamp(value).isoformat())
+    if value is pd.NaT or value is pd.NA:
+        return 'null'
+    return json.dumps(value, default=str)
+
+
+class QueryService:
+    """Runs JobDataProcessor queries for concurrent asyncio callers
+
+    - Coalescing: a query identical to one queued or running (same method
+      and arguments once normalized, see call_key) waits for that one's
+      result instead of running again.
+    - Batching: the distinct queries queued within `batch_window_s` (or
+      `max_batch` of them) are handed to the pool as one task per filter
+      combination, so a burst costs a few thread hand-offs rather than one per
+      query, and queries sharing filters run back to back where the
+      processor's caches are warm.
+    - Bounded: at most `workers` threads run queries; past `max_pending`
+      distinct queries waiting, new ones fail with status 503.
+
+    Results are encoded to JSON on the pool too and shared by every caller
+    of a coalesced query.
+    """
+
+    def __init__(self, processor, workers=DEFAULT_WORKERS, batch_window_s=DEFAULT_BATCH_WINDOW_S,
+                 max_batch=DEFAULT_MAX_BATCH, max_pending=DEFAULT_MAX_PENDING):
+        self.processor = processor
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sg-jobs-query')
+        self.batch_window_s = batch_window_s
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self._signatures = {name: inspect.signature(self._target(name)) for name in QUERY_METHODS}
+        self._inflight = {}
+        self._queue = []
+        self._flush_handle = None
+        self.counts = Counter()
+
+    def _target(self, name):
+        if name == 'filter_data':
+            return functools.partial(_filter_rows, self.processor)
+        return getattr(self.processor, name)
+
+    def _key(self, name, params):
+        if name not in self._signatures:
+            raise QueryError(404, f"unknown method {name!r}; see GET /methods")
+        if not isinstance(params, dict):
+            raise QueryError(400, 'params must be a JSON object')
+        check_filters(name, params)
+        try:
+            return call_key(name, self._signatures[name], **params)
+        except (TypeError, ValueError) as error:
+            raise QueryError(400, f'{name}: {error}') from None
+
+    async def query(self, name, params=None):
+        """The JSON text of `name(**params)`'s result"""
+        params = params or {}
+        key = self._key(name, params)
+        self.counts['queries'] += 1
+        future = self._inflight.get(key)
+        if future is not None:
+            self.counts['coalesced'] += 1
+        else:
+            if len(self._inflight) >= self.max_pending:
+                self.counts['rejected'] += 1
+                raise QueryError(503, 'too many queries pending, retry later')
+            future = self._inflight[key] = asyncio.get_running_loop().create_future()
+            self._queue.append((key, name, params, future))
+            self._schedule_flush()
+        # Shielded: one caller giving up must not cancel the result the others wait for
+        return await asyncio.shield(future)
+
+    def _schedule_flush(self):
+        if len(self._queue) >= self.max_batch:
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window_s, self._flush)
+
+    def _flush(self):
+        self._flush_handle = None
+        queued, self._queue = self._queue, []
+        if not queued:
+            return
+        self.counts['batches'] += 1
+        groups = defaultdict(list)
+        for entry in queued:
+            groups[normalize_filters(entry[2])].append(entry)
+        loop = asyncio.get_running_loop()
+        for group in groups.values():
+            calls = [(name, params) for _, name, params, _ in group]
+            task = loop.run_in_executor(self.executor, self._run_group, calls)
+            task.add_done_callback(lambda done, group=group: self._settle(group, done))
+
+    def _run_group(self, calls):
+        """(True, JSON text) or (False, QueryError) per call, run on the pool"""
+        results = []
+        for name, params in calls:
+            try:
+                results.append((True, encode(self._target(name)(**params))))
+            except (ValueError, TypeError, KeyError) as error:
+                results.append((False, QueryError(400, f'{name}: {error}')))
+            except Exception as error:
+                results.append((False, QueryError(500, f'{name}: {type(error).__name__}: {error}')))
+        return results
+
+    def _settle(self, group, done):
+        for index, (key, _, _, future) in enumerate(group):
+            del self._inflight[key]
+            if future.done():
+                continue
+            if done.cancelled():
+                future.set_exception(QueryError(503, 'the service is shutting down'))
+                continue
+            if done.exception() is not None:
+                future.set_exception(QueryError(500, str(done.exception())))
+                continue
+            ok, outcome = done.result()[index]
+            if ok:
+                future.set_result(outcome)
+            else:
+                self.counts['failed'] += 1
+                future.set_exception(outcome)
+
+    def stats(self):
+        """Query counters, plus the processor's result cache statistics"""
+        return {**self.counts, 'inflight': len(self._inflight), 'result_cache': self.processor.cache.stats()}
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class QueryServer:
+    """Minimal HTTP/1.1 front end (keep-alive, JSON bodies) for a QueryService"""
+
+    def __init__(self, service):
+        self.service = service
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT):
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                    length = int(headers.get('content-length') or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    await self._respond(writer, 400, '{"error": "malformed request"}', keep_alive=False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, '{"error": "request body too large"}', keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                status, payload = await self._route(method, urlsplit(target).path, body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        body = payload.encode()
+        writer.write(
+            f'HTTP/1.1 {status} {STATUS_TEXT[status]}\r\nContent-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\nConnection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'
+            .encode('latin-1') + body
+        )
+        await writer.drain()
+
+    async def _route(self, method, path, body):
+        try:
+            if path == '/health':
+                return 200, '{"status": "ok"}'
+            if path == '/methods':
+                return 200, json.dumps({'methods': QUERY_METHODS, 'filters': list(FILTER_ARGS)})
+            if path == '/stats':
+                return 200, encode(self.service.stats())
+            if path not in ('/query', '/batch'):
+                raise QueryError(404, f'no route {path}')
+            if method != 'POST':
+                raise QueryError(405, f'{path} takes POST')
+            try:
+                request = json.loads(body or b'{}')
+            except ValueError:
+                raise QueryError(400, 'body must be JSON') from None
+            if path == '/query':
+                return 200, '{"result":' + await self._query(request) + '}'
+            queries = request.get('queries') if isinstance(request, dict) else None
+            if not isinstance(queries, list):
+                raise QueryError(400, 'body must have a "queries" list')
+            results = await asyncio.gather(*(self._query(query) for query in queries), return_exceptions=True)
+            return 200, '{"results":[' + ','.join(
+                '{"result":' + result + '}' if isinstance(result, str)
+                else json.dumps({'error': str(result), 'status': getattr(result, 'status', 500)})
+                for result in results
+            ) + ']}'
+        except QueryError as error:
+            return error.status, json.dumps({'error': str(error)})
+
+    async def _query(self, request):
+        if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+            raise QueryError(400, 'a query needs a "method" name and optional "params" object')
+        return await self.service.query(request['method'], request.get('params') or {})
+
+
+async def _refresh_every(service, interval_s):
+    """Take in new postings (JobDataProcessor.refresh) on the query pool every `interval_s` seconds"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval_s)
+        try:
+            added = await loop.run_in_executor(service.executor, service.processor.refresh)
+        except Exception:
+            service.counts['refresh_failed'] += 1
+            logger.exception('refresh failed')
+            continue
+        service.counts['refreshes'] += 1
+        service.counts['postings_added'] += added
+
+
+async def serve(processor, host='127.0.0.1', port=DEFAULT_PORT, refresh_s=None, **service_options):
+    """Serve `processor` over HTTP until cancelled, taking in new postings every `refresh_s` seconds if given"""
+    service = QueryService(processor, **service_options)
+    server = QueryServer(service)
+    address = await server.start(host, port)
+    logger.info('serving %s queries on http://%s:%s', processor.engine, address[0], address[1])
+    started = time.monotonic()
+    refresher = asyncio.create_task(_refresh_every(service, refresh_s)) if refresh_s else None
+    try:
+        await server.serve_forever()
+    finally:
+        if refresher is not None:
+            refresher.cancel()
+        service.close()
+        logger.info('stopped after %.0fs: %s', time.monotonic() - started, dict(service.counts))
@@ -0,0 +1,310 @@
+import numpy as np
+import pandas as pd
+
+from sg_job_titles import _tokens, title_form
+
+# Columns of the hashed title vectors
+TITLE_DIMS = 128
+HASH_KEY = '2024091520240915'
+# Words of a title outside its role (qualifiers like "(Java)" or "- AWS") count this much against the role's own
+QUALIFIER_WEIGHT = 0.5
+# How much each component counts towards a posting's similarity; those the query lacks are left out
+WEIGHTS = {'title': 0.6, 'category': 0.15, 'salary': 0.15, 'experience': 0.1}
+# Closeness halves at this difference of log salary (about 28% apart) and of years of experience
+SALARY_LOG_SCALE = 0.25
+EXPERIENCE_SCALE = 3.0
+# Titles nearest the query by hashed vector whose exact similarity is then computed; hash collisions
+# blur the vectors' similarities, so more titles are reranked than are used
+MAX_RERANKED = 1024
+# Titles whose postings are scored per query at most, and the postings they stop at: nearest title
+# first, until they cover this many
+MAX_TITLES = 256
+MAX_CANDIDATES = 20000
+# Columns a search's postings are returned with
+SIMILAR_COLUMNS = ['metadata_jobPostId', 'title', 'role', 'postedCompany_name', 'main_category',
+                   'positionLevels', 'average_salary', 'minimumYearsExperience']
+SALARY_SPREAD = [0.25, 0.5, 0.75]
+
+
+def title_tokens(title):
+    """(words, weights) a title is compared by: its role's words (title_form) 1, its other words QUALIFIER_WEIGHT"""
+    core, _ = title_form(title)
+    extra = [word for word in dict.fromkeys(_tokens(str(title).lower())[0]) if word not in core]
+    return list(core) + extra, [1.0] * len(core) + [QUALIFIER_WEIGHT] * len(extra)
+
+
+def category_tokens(category):
+    """(names, weights) a main_category value (comma-joined industry names) is compared by"""
+    names = list(dict.fromkeys(name.strip().lower() for name in str(category).split(',') if name.strip()))
+    return names, [1.0] * len(names)
+
+
+def encode_tokens(encoded):
+    """CSR form of (words, weights) pairs: indptr, 64-bit hash of every word, and their weights"""
+    lengths = np.fromiter((len(words) for words, _ in encoded), dtype=np.int64, count=len(encoded))
+    indptr = np.concatenate([[0], np.cumsum(lengths)])
+    total = int(indptr[-1])
+    weights = np.fromiter((weight for _, ws in encoded for weight in ws), dtype=np.float32, count=total)
+    if not total:
+        return indptr, np.empty(0, dtype=np.uint64), weights
+    flat = np.fromiter((word for words, _ in encoded for word in words), dtype=object, count=total)
+    word_ids, vocabulary = pd.factorize(flat)
+    return indptr, pd.util.hash_array(np.asarray(vocabulary, dtype=object), hash_key=HASH_KEY)[word_ids], weights
+
+
+def concat_tokens(first, second):
+    """Token lists of `first` followed by those of `second` (both from encode_tokens)"""
+    return (np.concatenate([first[0], first[0][-1] + second[0][1:]]), np.concatenate([first[1], second[1]]),
+            np.concatenate([first[2], second[2]]))
+
+
+def hashed_vectors(tokens, dims=TITLE_DIMS):
+    """(n, dims) float32 rows of unit length: each token adds +-weight to the column its hash picks
+
+    Signed feature hashing: no vocabulary is kept, so any text (a query, a
+    title posted later) maps into the same space, and words sharing a
+    column cancel out as often as they add up.
+    """
+    indptr, hashes, weights = tokens
+    vectors = np.zeros((len(indptr) - 1, dims), dtype=np.float32)
+    columns = (hashes % np.uint64(dims)).astype(np.int64)
+    signs = np.where(hashes >> np.uint64(63), np.float32(-1), np.float32(1))
+    np.add.at(vectors, (np.repeat(np.arange(len(indptr) - 1), np.diff(indptr)), columns), signs * weights)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+def cosine(tokens, ids, query):
+    """Exact cosine similarity of the token lists `ids` of `tokens` to the one token list of `query`"""
+    indptr, hashes, weights = tokens
+    _, query_hashes, query_weights = query
+    ids = np.asarray(ids, dtype=np.int64)
+    starts, lengths = indptr[ids], indptr[ids + 1] - indptr[ids]
+    owners = np.repeat(np.arange(len(ids)), lengths)
+    flat = np.arange(int(lengths.sum())) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    words, word_weights = hashes[flat], weights[flat]
+    norms = np.sqrt(np.bincount(owners, weights=word_weights * word_weights, minlength=len(ids)))
+    if not len(query_hashes):
+        return np.zeros(len(ids), dtype=np.float32)
+    order = np.argsort(query_hashes)
+    query_hashes, query_weights = query_hashes[order], query_weights[order]
+    found = np.minimum(np.searchsorted(query_hashes, words), len(query_hashes) - 1)
+    products = np.where(query_hashes[found] == words, word_weights * query_weights[found], 0)
+    dot = np.bincount(owners, weights=products, minlength=len(ids))
+    denominator = norms * np.sqrt(np.sum(query_weights.astype(np.float64) ** 2))
+    return np.divide(dot, denominator, out=np.zeros(len(ids)), where=denominator > 0).astype(np.float32)
+
+
+def _closeness(values, target, scale):
+    """1 at `target`, 0.5 `scale` away; 0 for missing values"""
+    return np.nan_to_num(1 / (1 + np.abs(values - np.float32(target)) / np.float32(scale)), nan=0.0)
+
+
+def _features(frame):
+    """(n, 2) float32 log average_salary and minimumYearsExperience of postings (NaN when unknown)"""
+    salary, experience = (
+        pd.to_numeric(frame[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        for col in ('average_salary', 'minimumYearsExperience')
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_salary = np.where(salary > 0, np.log(salary), np.nan)
+    return np.column_stack([log_salary, experience]).astype(np.float32)
+
+
+def _positions(index, values):
+    """Position of each of `values` in `index`, with those not in it appended: (codes, -1 for missing; new values)"""
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    uniques = np.asarray(uniques, dtype=object)
+    positions = index.get_indexer(pd.Index(uniques, dtype=object))
+    unseen = np.flatnonzero(positions < 0)
+    positions[unseen] = len(index) + np.arange(len(unseen))
+    # Missing values (code -1) pick the -1 appended last
+    return np.append(positions, -1)[codes].astype(np.int32), uniques[unseen]
+
+
+class SimilarJobs:
+    """Nearest-neighbour index of postings by title, industry, salary and experience
+
+    Every distinct title is a row of `title_vectors`, a float32 matrix of
+    its hashed words (title_tokens, hashed_vectors). A search multiplies it
+    by the query's vector to find the MAX_RERANKED nearest titles, computes
+    their exact similarity from the stored word hashes (cosine), and scores
+    only the postings of the nearest ones (MAX_CANDIDATES at most): postings
+    are grouped by title, which acts as a coarse partition of the rows. A
+    posting's similarity is the WEIGHTS-weighted mean of its title's and its
+    industries' cosine similarity to the query and the closeness of its
+    salary and experience to the query's.
+
+    Built over the rows of a frame (build), the index answers searches on its
+    own. Built over distinct titles and their posting counts only (for the
+    duckdb engine), it picks the titles whose postings to fetch
+    (nearest_titles) and scores the postings fetched (score_frame).
+    """
+
+    def __init__(self, titles, counts):
+        self.titles = pd.Index(np.asarray(titles, dtype=object), name='title')
+        # Postings per title, each title's words, and their hashed vectors
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self._title_tokens = encode_tokens([title_tokens(title) for title in self.titles])
+        self.title_vectors = hashed_vectors(self._title_tokens)
+        self.categories = pd.Index([], dtype=object, name='main_category')
+        self._category_tokens = encode_tokens([])
+        # Per row (build only): title id and category id (-1: none) and _features; rows grouped by
+        # title id through _order and _bounds
+        self.title_codes = None
+        self.category_codes = None
+        self.features = None
+        self._order = None
+        self._bounds = None
+
+    @classmethod
+    def build(cls, df):
+        """Over the rows of a processed frame (title, main_category, average_salary, minimumYearsExperience)"""
+        title_codes, titles = pd.factorize(df['title'], use_na_sentinel=True)
+        index = cls(titles, np.bincount(title_codes[title_codes >= 0], minlength=len(titles)))
+        index._add_categories(df['main_category'])
+        category_codes, _ = _positions(index.categories, df['main_category'])
+        index._set_rows(title_codes.astype(np.int32), category_codes, _features(df))
+        return index
+
+    def extend(self, df):
+        """The index over the indexed rows followed by the rows of `df`, encoding only titles not seen before"""
+        title_codes, new_titles = _positions(self.titles, df['title'])
+        extended = SimilarJobs.__new__(SimilarJobs)
+        extended.titles = self.titles.append(pd.Index(new_titles, dtype=object, name='title'))
+        extended.counts = np.bincount(title_codes[title_codes >= 0], minlength=len(extended.titles))
+        extended.counts[:len(self.counts)] += self.counts
+        added = encode_tokens([title_tokens(title) for title in new_titles])
+        extended._title_tokens = concat_tokens(self._title_tokens, added)
+        extended.title_vectors = np.concatenate([self.title_vectors, hashed_vectors(added)])
+        extended.categories, extended._category_tokens = self.categories, self._category_tokens
+        extended._add_categories(df['main_category'])
+        category_codes, _ = _positions(extended.categories, df['main_category'])
+        extended._set_rows(np.concatenate([self.title_codes, title_codes]),
+                           np.concatenate([self.category_codes, category_codes]),
+                           np.concatenate([self.features, _features(df)]))
+        return extended
+
+    def _add_categories(self, main_category):
+        _, new = _positions(self.categories, main_category)
+        self.categories = self.categories.append(pd.Index(new, dtype=object, name='main_category'))
+        self._category_tokens = concat_tokens(self._category_tokens,
+                                              encode_tokens([category_tokens(category) for category in new]))
+
+    def _set_rows(self, title_codes, category_codes, features):
+        self.title_codes, self.category_codes, self.features = title_codes, category_codes, features
+        self._order = np.argsort(title_codes, kind='stable').astype(np.int32)
+        self._bounds = np.searchsorted(title_codes[self._order], np.arange(len(self.titles) + 1)).astype(np.int64)
+
+    def nearest_titles(self, title):
+        """Ids of the titles whose postings a search for `title` scores, most similar first, and their similarity
+
+        Titles sharing no word with the query are never among them. Ties go
+        to the alphabetically first title, so the pick doesn't depend on the
+        order titles were indexed in.
+        """
+        query = encode_tokens([title_tokens(title)])
+        approximate = self.title_vectors @ hashed_vectors(query)[0]
+        candidates = np.flatnonzero(approximate > 0)
+        if len(candidates) > MAX_RERANKED:
+            kept = candidates[np.argpartition(-approximate[candidates], MAX_RERANKED - 1)[:MAX_RERANKED]]
+            # Titles as near as the last one kept are reranked too
+            candidates = np.flatnonzero(approximate >= approximate[kept].min())
+        similarity = cosine(self._title_tokens, candidates, query)
+        candidates, similarity = candidates[similarity > 0], similarity[similarity > 0]
+        order = np.lexsort((self.titles[candidates].astype(str), -similarity))[:MAX_TITLES]
+        candidates, similarity = candidates[order], similarity[order]
+        covered = int(np.searchsorted(np.cumsum(self.counts[candidates]), MAX_CANDIDATES)) + 1
+        return candidates[:covered], similarity[:covered]
+
+    @staticmethod
+    def _category_similarity(tokens, category):
+        """Similarity of each of the main_category values encoded as `tokens` to `category`, then a 0 for none"""
+        similarity = cosine(tokens, np.arange(len(tokens[0]) - 1), encode_tokens([category_tokens(category)]))
+        return np.append(similarity, np.float32(0))
+
+    @staticmethod
+    def score(title_similarity, category_similarity, features, salary=None, experience=None):
+        """Similarity of postings to a query from their title's and industries' similarity and _features"""
+        components = [(WEIGHTS['title'], title_similarity)]
+        if category_similarity is not None:
+            components.append((WEIGHTS['category'], category_similarity))
+        if salary is not None and salary > 0:
+            components.append((WEIGHTS['salary'], _closeness(features[:, 0], np.log(salary), SALARY_LOG_SCALE)))
+        if experience is not None:
+            components.append((WEIGHTS['experience'], _closeness(features[:, 1], experience, EXPERIENCE_SCALE)))
+        total = sum(weight for weight, _ in components)
+        return (sum(np.float32(weight) * values for weight, values in components) / np.float32(total)).astype(
+            np.float32)
+
+    def search(self, title, top_n=10, category=None, salary=None, experience=None, rows=None, exclude=None):
+        """(row positions, similarity) of the top_n postings most similar to the query, most similar first
+
+        rows optionally restricts the postings to these sorted row positions
+        (e.g. a filter selection), and exclude drops one (the posting a query
+        was taken from). Ties go to the earlier row.
+        """
+        nearest, similarity = self.nearest_titles(title)
+        if not len(nearest):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        candidates = np.concatenate([self._order[self._bounds[t]:self._bounds[t + 1]] for t in nearest.tolist()])
+        if rows is not None:
+            found = np.minimum(np.searchsorted(rows, candidates), max(len(rows) - 1, 0))
+            candidates = candidates[rows[found] == candidates] if len(rows) else candidates[:0]
+        if exclude is not None:
+            candidates = candidates[candidates != exclude]
+        title_similarity = np.zeros(len(self.titles), dtype=np.float32)
+        title_similarity[nearest] = similarity
+        category_similarity = None
+        if category is not None:
+            category_similarity = self._category_similarity(self._category_tokens, category)[
+                self.category_codes[candidates]]
+        scores = self.score(title_similarity[self.title_codes[candidates]], category_similarity,
+                            self.features[candidates], salary, experience)
+        top = top_positions(scores, candidates, top_n)
+        return candidates[top].astype(np.int64), scores[top]
+
+    def score_frame(self, frame, nearest, similarity, category=None, salary=None, experience=None):
+        """Similarity of the postings in `frame` to a query, as search() scores them
+
+        frame holds the postings of the `nearest` titles (with their
+        `similarity`, both from nearest_titles) as SIMILAR_COLUMNS.
+        """
+        title_codes = pd.Index(self.titles[nearest]).get_indexer(pd.Index(frame['title'], dtype=object))
+        title_similarity = np.append(similarity, np.float32(0))[title_codes]
+        category_similarity = None
+        if category is not None:
+            codes, categories = pd.factorize(frame['main_category'], use_na_sentinel=True)
+            tokens = encode_tokens([category_tokens(value) for value in categories])
+            category_similarity = self._category_similarity(tokens, category)[codes]
+        return self.score(title_similarity, category_similarity, _features(frame), salary, experience)
+
+    def memory_usage(self):
+        """Approximate bytes held"""
+        arrays = [self.counts, self.title_vectors, *self._title_tokens, *self._category_tokens]
+        if self.title_codes is not None:
+            arrays += [self.title_codes, self.category_codes, self.features, self._order, self._bounds]
+        return int(self.titles.memory_usage(deep=True) + self.categories.memory_usage(deep=True)
+                   + sum(array.nbytes for array in arrays))
+
+
+def top_positions(scores, rows, top_n):
+    """Positions of the top_n scores, highest first, ties by `rows` (ascending)"""
+    if len(scores) > top_n:
+        kept = np.argpartition(-scores, top_n - 1)[:top_n]
+        # Scores equal to the lowest one kept compete by row below
+        kept = np.flatnonzero(scores >= scores[kept].min())
+    else:
+        kept = np.arange(len(scores))
+    return kept[np.lexsort((rows[kept], -scores[kept]))][:top_n]
+
+
+def salary_spread(salaries):
+    """count, min, p25, median, p75 and max of the known salaries among `salaries`"""
+    known = pd.Series(salaries, dtype='float64').dropna()
+    if not len(known):
+        return {'count': 0, 'min': None, 'p25': None, 'median': None, 'p75': None, 'max': None}
+    p25, median, p75 = known.quantile(SALARY_SPREAD).tolist()
+    return {'count': int(len(known)), 'min': float(known.min()), 'p25': p25, 'median': median, 'p75': p75,
+            'max': float(known.max())}
@@ -0,0 +1,438 @@
+import numpy as np
+import pandas as pd
+
+from sg_job_cube import salary_bands
+
+# Rows are partitioned like the cube's filter dimensions (minus main_category,
+# whose combinations would leave most partitions a handful of rows each)
+PARTITION_DIMENSIONS = ['positionLevels', 'employmentTypes', 'exp_category', 'salary_band']
+# Width of the salary bands partitioning the rows. Five times the cube's step,
+# so there are few partitions (about 2,300 over 1M postings); the rows of a
+# selection in the one or two bands its salary range cuts through are read
+# exactly instead.
+SKETCH_SALARY_STEP = 2500
+QUANTILE_MEASURES = ['average_salary', 'salary_minimum', 'salary_maximum']
+HEAVY_HITTER_COLUMNS = ['postedCompany_name', 'title']
+
+# KLL accuracy parameter: items kept per partition grow (and rank error shrinks) linearly in k
+DEFAULT_K = 200
+# Counters kept per partition and column by the heavy-hitter summaries
+DEFAULT_CAPACITY = 50
+# Rows counted exactly at a time before they are merged into the Space-Saving
+# counters, which bounds the memory building them takes
+STREAM_BATCH_ROWS = 1 << 18
+
+
+def kll_rank_error(k):
+    """Normalized rank error of a KLL sketch with parameter k (99% confidence, empirical fit from DataSketches)"""
+    return 2.296 / k ** 0.9723
+
+
+def quantiles(values, qs, weights=None):
+    """Smallest value whose cumulative weight reaches q of the total, for each q (NaN ignored)
+
+    With unit weights this is numpy's 'inverted_cdf' quantile and DuckDB's
+    QUANTILE_DISC, so sketched and exact answers share one definition.
+    """
+    values = np.asarray(values, dtype=float)
+    weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=float)
+    known = ~np.isnan(values)
+    values, weights = values[known], weights[known]
+    qs = np.asarray(qs, dtype=float)
+    if len(values) == 0:
+        return np.full(len(qs), np.nan)
+    order = np.argsort(values, kind='stable')
+    cumulative = np.cumsum(weights[order])
+    positions = np.searchsorted(cumulative, qs * cumulative[-1] - 1e-9, side='left')
+    return values[order][np.minimum(positions, len(values) - 1)]
+
+
+def grouped_quantiles(values, codes, n_groups, qs, weights=None, order=None):
+    """`quantiles` of `values` per group, where codes (0..n_groups-1, -1 for none) assign the groups
+
+    order optionally gives argsort(values) when the caller already has it, so
+    one sort of a measure serves any number of groupings. Returns the
+    (n_groups x len(qs)) quantiles, NaN for empty groups, and each group's
+    total weight.
+    """
+    values = np.asarray(values, dtype=float)
+    codes = np.asarray(codes)
+    weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=float)
+    qs = np.asarray(qs, dtype=float)
+    order = np.argsort(values, kind='stable') if order is None else np.asarray(order)
+    order = order[~np.isnan(values[order]) & (codes[order] >= 0)]
+    # A stable sort by group keeps every group sorted by value
+    order = order[np.argsort(codes[order], kind='stable')]
+    values, weights, codes = values[order], weights[order], codes[order]
+    if len(values) == 0:
+        return np.full((n_groups, len(qs)), np.nan), np.zeros(n_groups)
+
+    cumulative = np.cumsum(weights)
+    ends = np.searchsorted(codes, np.arange(n_groups), side='right')
+    starts = np.concatenate([[0], ends[:-1]])
+    before = np.where(starts > 0, cumulative[np.maximum(starts - 1, 0)], 0)
+    totals = np.where(ends > starts, cumulative[ends - 1] - before, 0)
+    targets = before[:, None] + qs[None, :] * totals[:, None]
+    positions = np.searchsorted(cumulative, targets - 1e-9, side='left')
+    result = values[np.clip(positions, 0, np.maximum(ends - 1, 0)[:, None])]
+    result[totals == 0] = np.nan
+    return result, totals
+
+
+def kll_compress(values, levels, k, rng):
+    """Compact one partition's (values, levels) KLL state until every level fits its capacity
+
+    Level h holds items standing for 2**h rows each. A full level is sorted and
+    every other item (random offset) is promoted to the next level, halving its
+    size while keeping ranks within the KLL error bound.
+    """
+    by_level = [values[levels == h] for h in range(int(levels.max()) + 1 if len(levels) else 1)]
+    while True:
+        depth = len(by_level)
+        capacities = [max(2, int(np.ceil(k * (2 / 3) ** (depth - 1 - h)))) for h in range(depth)]
+        full = next((h for h in range(depth) if len(by_level[h]) > capacities[h]), None)
+        if full is None:
+            break
+        items = np.sort(by_level[full])
+        kept = items[len(items) - len(items) % 2:]
+        items = items[:len(items) - len(kept)]
+        if full + 1 == depth:
+            by_level.append(items[:0])
+        by_level[full + 1] = np.concatenate([by_level[full + 1], items[rng.integers(2)::2]])
+        by_level[full] = kept
+    return (
+        np.concatenate(by_level),
+        np.concatenate([np.full(len(items), h, dtype=np.int8) for h, items in enumerate(by_level)])
+    )
+
+
+class JobSketches:
+    """Mergeable quantile and heavy-hitter sketches over partitions of the jobs.
+
+    - every QUANTILE_MEASURES column gets a KLL sketch per partition. Its answers
+      are observed values, which suits salaries clustering at round figures
+    - every HEAVY_HITTER_COLUMNS column keeps `capacity` Space-Saving counters
+      per partition (space_saving), plus a `floor`: the most any value without
+      a counter may have occurred there. A count is off from the true one by
+      at most the floors of the partitions summed over
+
+    A filter slice selects partitions and merges their sketches: KLL states
+    merge by concatenation, counters by adding up. Rows of the slice outside
+    the selected partitions (see cut_bands) can be handed in and are counted
+    exactly. Two JobSketches built over separate rows merge into one with
+    merge().
+    """
+
+    def __init__(self, partitions, quantile_entries, heavy_hitters, k=DEFAULT_K, capacity=DEFAULT_CAPACITY,
+                 salary_step=SKETCH_SALARY_STEP, seed=0):
+        # One row per partition with its PARTITION_DIMENSIONS labels
+        self.partitions = partitions.reset_index(drop=True)
+        # measure -> (values, levels, partition), sorted by value
+        self.quantile_entries = quantile_entries
+        # column -> (labels, items, counts, partition, floors)
+        self.heavy_hitters = heavy_hitters
+        self.k = k
+        self.capacity = capacity
+        self.salary_step = salary_step
+        self.seed = seed
+
+        self._codes = {}
+        self._labels = {}
+        for dim in PARTITION_DIMENSIONS:
+            codes, labels = pd.factorize(self.partitions[dim], use_na_sentinel=False)
+            self._codes[dim] = codes
+            self._labels[dim] = pd.Index(np.asarray(labels, dtype=object))
+        # Looks up the values of rows handed to top()
+        self._items = {col: pd.Index(labels) for col, (labels, *_) in heavy_hitters.items()}
+
+    @classmethod
+    def build(cls, df, k=DEFAULT_K, capacity=DEFAULT_CAPACITY, salary_step=SKETCH_SALARY_STEP, seed=0):
+        """Sketch a processed frame"""
+        keys = pd.DataFrame({
+            'positionLevels': df['positionLevels'].to_numpy(),
+            'employmentTypes': df['employmentTypes'].to_numpy(),
+            'exp_category': df['exp_category'].to_numpy(),
+            'salary_band': salary_bands(df['average_salary'], salary_step),
+        })
+        partition_ids, partitions = _partition_rows(keys)
+        rng = np.random.default_rng(seed)
+        quantile_entries = {
+            measure: _sketch_quantiles(df[measure].to_numpy(dtype=float), partition_ids, len(partitions), k, rng)
+            for measure in QUANTILE_MEASURES
+        }
+        heavy_hitters = {}
+        for col in HEAVY_HITTER_COLUMNS:
+            codes, labels = pd.factorize(df[col], use_na_sentinel=True)
+            valid = codes >= 0
+            counters = space_saving(partition_ids[valid], codes[valid], len(partitions), capacity)
+            heavy_hitters[col] = _used_labels(np.asarray(labels, dtype=object), *counters)
+        return cls(partitions, quantile_entries, heavy_hitters, k, capacity, salary_step, seed)
+
+    def merge(self, other):
+        """Combine with sketches built over other rows"""
+        if (other.k, other.capacity, other.salary_step) != (self.k, self.capacity, self.salary_step):
+            raise ValueError('cannot merge sketches with different k, capacity or salary step')
+        combined = pd.concat([self.partitions, other.partitions], ignore_index=True)
+        remap, partitions = _partition_rows(combined)
+        n_self = len(self.partitions)
+        rng = np.random.default_rng(self.seed)
+
+        quantile_entries = {}
+        for measure in QUANTILE_MEASURES:
+            values_a, levels_a, part_a = self.quantile_entries[measure]
+            values_b, levels_b, part_b = other.quantile_entries[measure]
+            quantile_entries[measure] = _compress_partitions(
+                np.concatenate([values_a, values_b]),
+                np.concatenate([levels_a, levels_b]),
+                np.concatenate([remap[part_a], remap[n_self + part_b]]),
+                len(partitions), self.k, rng
+            )
+
+        heavy_hitters = {}
+        for col in HEAVY_HITTER_COLUMNS:
+            labels_a, items_a, counts_a, part_a, floors_a = self.heavy_hitters[col]
+            labels_b, items_b, counts_b, part_b, floors_b = other.heavy_hitters[col]
+            label_codes, labels = pd.factorize(np.concatenate([labels_a, labels_b]), use_na_sentinel=False)
+            counters_a = (label_codes[items_a], counts_a, remap[part_a], _remap_floors(floors_a, remap[:n_self],
+                                                                                         len(partitions)))
+            counters_b = (label_codes[len(labels_a) + items_b], counts_b, remap[n_self + part_b],
+                          _remap_floors(floors_b, remap[n_self:], len(partitions)))
+            counters = merge_counters(counters_a, counters_b, self.capacity)
+            heavy_hitters[col] = _used_labels(np.asarray(labels, dtype=object), *counters)
+        return JobSketches(partitions, quantile_entries, heavy_hitters, self.k, self.capacity,
+                           self.salary_step, self.seed)
+
+    def supports(self, roles=None, industries=None, **filters):
+        """Whether these filter_data criteria select partitions (plus the rows of cut_bands)"""
+        return not (roles or industries)
+
+    def cut_bands(self, salary_range=None):
+        """[start, end) salary bands `salary_range` only partly covers
+
+        Their partitions are left out of the filter slice; the rows of the
+        slice with an average_salary in them are what quantiles() and top()
+        take as `rows`. The band holding the upper bound is always one of them.
+        """
+        if not salary_range:
+            return []
+        low, high = (float(bound) for bound in salary_range)
+        starts = [np.floor(high / self.salary_step) * self.salary_step]
+        if low % self.salary_step:
+            starts.insert(0, np.floor(low / self.salary_step) * self.salary_step)
+        return [(start, start + self.salary_step) for start in dict.fromkeys(starts)]
+
+    def _partition_mask(self, exp_level=None, position=None, employment=None, salary_range=None, **unused):
+        mask = np.ones(len(self.partitions), dtype=bool)
+        for dim, values in (('exp_category', exp_level), ('positionLevels', position),
+                            ('employmentTypes', employment)):
+            if values:
+                values = set(values)
+                lookup = np.fromiter((label in values for label in self._labels[dim]), dtype=bool,
+                                     count=len(self._labels[dim]))
+                mask &= lookup[self._codes[dim]]
+        if salary_range:
+            # Bands wholly within the range; missing salaries (NaN) are in none
+            low, high = (float(bound) for bound in salary_range)
+            bands = self.partitions['salary_band'].to_numpy(dtype=float)
+            mask &= (bands >= low) & (bands + self.salary_step <= high)
+        return mask
+
+    def quantiles(self, measure, qs, group_by=None, rows=None, **filters):
+        """Quantiles `qs` of `measure` over the filter slice, optionally per `group_by` dimension
+
+        rows optionally maps `measure` and `group_by` to the values of the
+        slice's rows in cut_bands, which join the sketched entries with a
+        weight of one. Returns a frame with one column per q and
+        `count` (the rows with a value), indexed by the group labels (a single
+        unnamed row without group_by), or None when the criteria aren't
+        supported.
+        """
+        if not self.supports(**filters):
+            return None
+        values, levels, part = self.quantile_entries[measure]
+        selected = self._partition_mask(**filters)[part]
+        values, weights, part = values[selected], np.left_shift(1, levels[selected].astype(np.int64)), part[selected]
+        labels = self._labels[group_by] if group_by is not None else None
+        codes = self._codes[group_by][part] if group_by is not None else np.zeros(len(values), dtype=np.int64)
+        if rows is not None:
+            row_values = np.asarray(rows[measure], dtype=float)
+            row_codes = (np.zeros(len(row_values), dtype=np.int64) if group_by is None
+                         else _positions(labels, rows[group_by]))
+            # Entries are kept sorted by value, so the rows' sorted values are inserted in place
+            order = np.argsort(row_values, kind='stable')
+            at = np.searchsorted(values, row_values[order], side='right')
+            values = np.insert(values, at, row_values[order])
+            weights = np.insert(weights, at, 1)
+            codes = np.insert(codes, at, row_codes[order])
+        known = codes >= 0
+        if not known.all():
+            values, weights, codes = values[known], weights[known], codes[known]
+
+        if group_by is None:
+            index = pd.Index([0])
+        else:
+            codes, groups = pd.factorize(codes, sort=True)
+            index = labels[groups].rename(group_by)
+        stats, counts = grouped_quantiles(values, codes, len(index), qs, weights=weights,
+                                          order=np.arange(len(values)))
+        result = pd.DataFrame(stats, index=index, columns=list(qs))
+        result['count'] = np.asarray(counts, dtype=np.int64)
+        if group_by is not None:
+            # Like pandas groupby, leave out the group of missing labels
+            result = result[result.index.notna()]
+        return result
+
+    def top(self, column, n=10, rows=None, **filters):
+        """Most frequent values of `column` over the filter slice
+
+        rows optionally maps `column` to the values of the slice's rows in
+        cut_bands, which are counted exactly. Returns (counts, error): a
+        Series of the top `n` estimated counts and the most any count may be
+        off by, or None when the criteria aren't supported.
+        """
+        if not self.supports(**filters):
+            return None
+        labels, items, counts, part, floors = self.heavy_hitters[column]
+        mask = self._partition_mask(**filters)
+        selected = mask[part]
+        totals = np.bincount(items[selected], weights=counts[selected], minlength=len(labels))
+        if rows is not None:
+            row_codes, row_labels = pd.factorize(np.asarray(rows[column], dtype=object), use_na_sentinel=True)
+            positions = self._items[column].get_indexer(pd.Index(np.asarray(row_labels, dtype=object)))
+            unseen = np.flatnonzero(positions < 0)
+            positions[unseen] = len(labels) + np.arange(len(unseen))
+            labels = np.concatenate([labels, np.asarray(row_labels, dtype=object)[unseen]])
+            totals = np.concatenate([totals, np.zeros(len(unseen))])
+            totals += np.bincount(positions[row_codes[row_codes >= 0]], minlength=len(totals))
+        top = np.argsort(-totals, kind='stable')[:n]
+        top = top[totals[top] > 0]
+        return pd.Series(totals[top].astype(np.int64), index=pd.Index(labels[top], name=column),
+                         name='count'), int(floors[mask].sum())
+
+    def memory_usage(self):
+        """Bytes held by the sketches"""
+        nbytes = int(self.partitions.memory_usage(deep=True).sum())
+        for arrays in self.quantile_entries.values():
+            nbytes += sum(array.nbytes for array in arrays)
+        for labels, *arrays in self.heavy_hitters.values():
+            nbytes += sum(array.nbytes for array in arrays) + int(pd.Series(labels).memory_usage(deep=True))
+        return nbytes
+
+
+def _positions(index, values):
+    """Position of each of `values` in `index`, -1 when missing or absent; each distinct value is looked up once"""
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object), use_na_sentinel=True)
+    return np.append(index.get_indexer(pd.Index(uniques, dtype=object)), -1)[codes]
+
+
+def _partition_rows(keys):
+    """Partition id per row of `keys` (PARTITION_DIMENSIONS columns) and the partition label table"""
+    codes = [pd.factorize(keys[dim], use_na_sentinel=False) for dim in PARTITION_DIMENSIONS]
+    firsts, partition_ids = np.unique(
+        np.ravel_multi_index([c for c, _ in codes], [max(len(u), 1) for _, u in codes]),
+        return_index=True, return_inverse=True
+    )[1:]
+    partitions = pd.DataFrame({dim: keys[dim].to_numpy()[firsts] for dim in PARTITION_DIMENSIONS})
+    return partition_ids.ravel(), partitions
+
+
+def _sketch_quantiles(values, partition_ids, n_partitions, k, rng):
+    """KLL states of `values` per partition, as flat (values, levels, partition) arrays"""
+    known = ~np.isnan(values)
+    return _compress_partitions(values[known], np.zeros(int(known.sum()), dtype=np.int8), partition_ids[known],
+                                n_partitions, k, rng)
+
+
+def _compress_partitions(values, levels, part, n_partitions, k, rng):
+    """Compact the partitions holding more than k entries; returns the entries sorted by value"""
+    order = np.argsort(part, kind='stable')
+    values, levels, part = values[order], levels[order], part[order]
+    bounds = np.searchsorted(part, np.arange(n_partitions + 1))
+    sizes = np.diff(bounds)
+    large = np.flatnonzero(sizes > k)
+    if len(large) == 0:
+        return _by_value(values, levels, part)
+
+    keep = np.repeat(sizes <= k, sizes)
+    pieces = [(values[keep], levels[keep], part[keep])]
+    for p in large:
+        start, end = bounds[p], bounds[p + 1]
+        compacted, compacted_levels = kll_compress(values[start:end], levels[start:end], k, rng)
+        pieces.append((compacted, compacted_levels, np.full(len(compacted), p, dtype=part.dtype)))
+    return _by_value(*(np.concatenate(arrays) for arrays in zip(*pieces)))
+
+
+def _by_value(values, levels, part):
+    order = np.argsort(values, kind='stable')
+    return values[order], levels[order], part[order]
+
+
+def space_saving(part, items, n_partitions, capacity, batch_rows=STREAM_BATCH_ROWS):
+    """Space-Saving counters of a stream of (partition, item code) pairs, at most `capacity` per partition
+
+    The stream is taken `batch_rows` pairs at a time: a batch's exact counts
+    are a summary with no error, merged into the counters so far with
+    merge_counters (the weighted form of the Space-Saving update). Returns
+    (items, counts, partition, floors) as merge_counters does.
+    """
+    counters = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64),
+                np.zeros(n_partitions, dtype=np.int64))
+    for start in range(0, len(part), batch_rows):
+        batch_part = part[start:start + batch_rows].astype(np.int64)
+        batch_items = items[start:start + batch_rows].astype(np.int64)
+        n_items = int(batch_items.max()) + 1
+        pairs, counts = np.unique(batch_part * n_items + batch_items, return_counts=True)
+        batch = (pairs % n_items, counts.astype(np.int64), pairs // n_items, np.zeros(n_partitions, dtype=np.int64))
+        counters = merge_counters(counters, batch, capacity)
+    return counters
+
+
+def merge_counters(a, b, capacity):
+    """Merge two sets of Space-Saving counters over the same partitions and item codes
+
+    Each is (items, counts, partition, floors), floors being per partition
+    the most an item without a counter there may have occurred (0 until a
+    counter is dropped). An item counted in only one set is credited with the
+    other's floor, counts of items in both add up, and each partition keeps
+    its `capacity` largest counters; the largest count dropped raises its
+    floor. Counts then overstate the true ones by at most the floor (Cafaro
+    et al.'s parallel Space-Saving merge). Returns the counters sorted by
+    partition.
+    """
+    items_a, counts_a, part_a, floors_a = a
+    items_b, counts_b, part_b, floors_b = b
+    n_items = int(max(items_a.max(initial=-1), items_b.max(initial=-1))) + 1
+    keys, inverse = np.unique(
+        np.concatenate([part_a.astype(np.int64) * n_items + items_a, part_b.astype(np.int64) * n_items + items_b]),
+        return_inverse=True
+    )
+    inverse = inverse.ravel()
+    part, items = keys // n_items, keys % n_items
+    in_a = np.zeros(len(keys), dtype=bool)
+    in_a[inverse[:len(items_a)]] = True
+    in_b = np.zeros(len(keys), dtype=bool)
+    in_b[inverse[len(items_a):]] = True
+    counts = np.bincount(inverse, weights=np.concatenate([counts_a, counts_b]), minlength=len(keys)).astype(np.int64)
+    counts += np.where(in_a, 0, floors_a[part]) + np.where(in_b, 0, floors_b[part])
+
+    order = np.lexsort((-counts, part))
+    part, items, counts = part[order], items[order], counts[order]
+    rank = np.arange(len(part)) - np.searchsorted(part, part)
+    dropped = np.zeros(len(floors_a), dtype=np.int64)
+    first_dropped = rank == capacity
+    dropped[part[first_dropped]] = counts[first_dropped]
+    kept = rank < capacity
+    return items[kept], counts[kept], part[kept], np.maximum(floors_a + floors_b, dropped)
+
+
+def _remap_floors(floors, partitions, n_partitions):
+    """Per-partition floors moved to new partition ids"""
+    remapped = np.zeros(n_partitions, dtype=np.int64)
+    np.add.at(remapped, partitions, floors)
+    return remapped
+
+
+def _used_labels(labels, items, counts, part, floors):
+    """heavy_hitters entry of a column: only the labels some counter holds, with the item codes renumbered"""
+    used, items = np.unique(items, return_inverse=True)
+    return labels[used], items.ravel(), counts, part, floors
@@ -0,0 +1,204 @@
+import numpy as np
+import pandas as pd
+from collections import deque
+
+# Common tech and skill keywords
+TECH_KEYWORDS = {
+    'Python', 'Java', 'JavaScript', 'SQL', 'C#', 'C++', 'PHP', 'React', 'Node.js',
+    'AWS', 'Azure', 'GCP', 'Docker', 'Kubernetes', 'Git', 'Linux', 'Windows',
+    'Data Science', 'Machine Learning', 'AI', 'Analytics', 'BI', 'SAP', 'Salesforce',
+    'Oracle', 'MySQL', 'MongoDB', '.NET', 'Angular', 'Vue', 'Django', 'Flask',
+    'Tableau', 'Power BI', 'Excel', 'VBA', 'R', 'Scala', 'Golang', 'Rust',
+    'DevOps', 'Cloud', 'Cybersecurity', 'Security', 'Network', 'System Admin',
+    'Manager', 'Lead', 'Engineer', 'Developer', 'Analyst', 'Consultant',
+    'Accountant', 'Auditor', 'Finance', 'Marketing', 'Sales', 'HR', 'Recruiter',
+    'Project Manager', 'Product Manager', 'Business Analyst', 'QA', 'Testing'
+}
+# Texts whose matches a SkillMatcher remembers; the oldest is forgotten past this
+MAX_MEMO_TEXTS = 64 * 1024
+
+
+class SkillMatcher:
+    """Aho-Corasick automaton matching a whole skill dictionary in one pass per text.
+
+    Matching is substring-based and case-insensitive by default, like the
+    original `keyword.lower() in title.lower()` scan. With word_boundary=True a
+    skill only counts when it is not glued to letters or digits on either side.
+    Results are memoized per text (the last MAX_MEMO_TEXTS distinct texts), so
+    repeated titles are matched once while free-text searches can't grow the
+    memo without bound.
+    """
+
+    def __init__(self, skills=None, case_sensitive=False, word_boundary=False):
+        self.skills = sorted(TECH_KEYWORDS if skills is None else set(skills))
+        self.case_sensitive = case_sensitive
+        self.word_boundary = word_boundary
+        self._memo = {}
+        self._build()
+
+    def _normalize(self, text):
+        return text if self.case_sensitive else text.lower()
+
+    def _build(self):
+        """Build the trie, failure links and merged outputs"""
+        goto = [{}]
+        outputs = [[]]
+        for skill_id, skill in enumerate(self.skills):
+            state = 0
+            pattern = self._normalize(skill)
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    outputs.append([])
+                state = nxt
+            outputs[state].append((skill_id, len(pattern)))
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                link = fail[state]
+                while link and ch not in goto[link]:
+                    link = fail[link]
+                fail[nxt] = goto[link].get(ch, 0)
+                outputs[nxt] = outputs[nxt] + outputs[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = outputs
+
+    def match(self, text):
+        """Return the sorted ids (positions in self.skills) of skills found in `text`"""
+        cached = self._memo.get(text)
+        if cached is not None:
+            return cached
+
+        normalized = self._normalize(text)
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found = set()
+        state = 0
+        for end, ch in enumerate(normalized):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for skill_id, length in outputs[state]:
+                if self.word_boundary and not self._at_boundary(normalized, end - length + 1, end + 1):
+                    continue
+                found.add(skill_id)
+
+        matched = tuple(sorted(found))
+        if len(self._memo) >= MAX_MEMO_TEXTS:
+            del self._memo[next(iter(self._memo))]
+        self._memo[text] = matched
+        return matched
+
+    @staticmethod
+    def _at_boundary(text, start, end):
+        before_ok = start == 0 or not text[start - 1].isalnum()
+        after_ok = end == len(text) or not text[end].isalnum()
+        return before_ok and after_ok
+
+    def build_index(self, titles):
+        """Build a SkillIndex over a Series of titles"""
+        return SkillIndex(self, titles)
+
+
+class SkillIndex:
+    """Sparse title x skill match index.
+
+    Titles are factorized so each distinct title is matched once; the matches
+    are stored CSR-style (indptr/indices over distinct titles) and rows map to
+    their title through `title_codes` (-1 for missing titles).
+    """
+
+    def __init__(self, matcher, titles):
+        self.matcher = matcher
+        codes, uniques = pd.factorize(titles, use_na_sentinel=True)
+        self.title_codes = codes
+        self.titles = pd.Index(np.asarray(uniques, dtype=object))
+        self.indptr, self.indices, self._entry_title = self._match(self.titles.tolist())
+
+    def _match(self, titles, first_title=0):
+        """CSR indptr and indices of the skills each of `titles` mentions, and the title id of every match"""
+        matches = [self.matcher.match(title) for title in titles]
+        lengths = np.fromiter((len(m) for m in matches), dtype=np.int64, count=len(matches))
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        indices = np.fromiter((skill_id for m in matches for skill_id in m), dtype=np.int32, count=int(indptr[-1]))
+        # Distinct-title id of every stored match
+        return indptr, indices, np.repeat(np.arange(first_title, first_title + len(matches)), lengths)
+
+    def extend(self, titles):
+        """The index over the indexed rows followed by `titles`, matching only the titles not seen before"""
+        codes, uniques = pd.factorize(titles, use_na_sentinel=True)
+        positions = self.titles.get_indexer(pd.Index(np.asarray(uniques, dtype=object)))
+        unseen = np.flatnonzero(positions < 0)
+        positions[unseen] = len(self.titles) + np.arange(len(unseen))
+        new_titles = np.asarray(uniques, dtype=object)[unseen]
+
+        extended = SkillIndex.__new__(SkillIndex)
+        extended.matcher = self.matcher
+        # Missing titles (code -1) pick the -1 appended last
+        extended.title_codes = np.concatenate([self.title_codes, np.append(positions, -1)[codes]])
+        extended.titles = self.titles.append(pd.Index(new_titles))
+        indptr, indices, entry_title = extended._match(new_titles.tolist(), first_title=len(self.titles))
+        extended.indptr = np.concatenate([self.indptr, self.indptr[-1] + indptr[1:]])
+        extended.indices = np.concatenate([self.indices, indices])
+        extended._entry_title = np.concatenate([self._entry_title, entry_title])
+        return extended
+
+    @property
+    def skills(self):
+        return self.matcher.skills
+
+    def _per_title(self, weights=None):
+        """Sum `weights` (default: 1 per row) by distinct title"""
+        valid = self.title_codes >= 0
+        return np.bincount(
+            self.title_codes[valid],
+            weights=None if weights is None else weights[valid],
+            minlength=len(self.indptr) - 1
+        )
+
+    def skill_totals(self, weights=None):
+        """Sum of `weights` (default: 1 per row) over the rows whose title mentions each skill, in `skills` order"""
+        per_title = self._per_title(None if weights is None else np.asarray(weights, dtype=float))
+        return np.bincount(self.indices, weights=per_title[self._entry_title], minlength=len(self.skills))
+
+    def skill_counts(self, weights=None):
+        """Number of rows whose title mentions each skill, as a Series sorted by count
+
+        weights optionally gives each row a multiplicity (e.g. pre-aggregated
+        title counts, or 0/1 to count a selection of the rows).
+        """
+        counts = pd.Series(self.skill_totals(weights).astype(np.int64), index=self.skills)
+        return counts[counts > 0].sort_values(ascending=False, kind='stable')
+
+    def skill_stats(self, values, skills=None, weights=None):
+        """Per-skill row count and mean of `values` (NaN ignored), aligned with the indexed rows
+
+        weights optionally gives each row a multiplicity, as in skill_counts.
+        """
+        values = np.asarray(values, dtype=float)
+        weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=float)
+        known = ~np.isnan(values)
+        return self.stats_from_totals(
+            self.skill_totals(weights),
+            self.skill_totals(known * weights),
+            self.skill_totals(np.where(known, values, 0.0) * weights),
+            skills
+        )
+
+    def stats_from_totals(self, counts, value_counts, value_sums, skills=None):
+        """skill_stats frame from per-skill row counts, counts of rows with a value and value sums"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(value_counts > 0, value_sums / value_counts, np.nan)
+
+        stats = pd.DataFrame({'count': np.asarray(counts).astype(np.int64), 'mean': means}, index=self.skills)
+        if skills is not None:
+            stats = stats.reindex(list(skills))
+        return stats
@@ -0,0 +1,111 @@
+import hashlib
+import os
+import pickle
+
+import pandas as pd
+
+# Optional pyarrow support (Parquet snapshots)
+try:
+    import pyarrow
+except Exception:
+    pyarrow = None
+
+# Bump when the processed frame changes shape or meaning without a code change
+# in the hashed pipeline files (e.g. a dependency upgrade that alters parsing).
+PIPELINE_VERSION = 1
+
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def file_digest(path):
+    """sha256 of a file's bytes, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def snapshot_key(data_source, code_files=(), **options):
+    """Content address of a processed dataset.
+
+    Combines the source file's bytes, PIPELINE_VERSION, the bytes of the files
+    implementing the pipeline and any processing options, so a new data dump,
+    a code change or a different option each produce a different key.
+    """
+    digest = hashlib.sha256()
+    digest.update(file_digest(data_source).encode())
+    digest.update(f'pipeline-v{PIPELINE_VERSION}'.encode())
+    for path in code_files:
+        digest.update(file_digest(path).encode())
+    for name in sorted(options):
+        digest.update(f'{name}={options[name]!r}'.encode())
+    return digest.hexdigest()[:24]
+
+
+def derived_key(key, code_files=()):
+    """Content address of structures derived from the snapshot under `key` by the code in `code_files`"""
+    digest = hashlib.sha256(key.encode())
+    for path in code_files:
+        digest.update(file_digest(path).encode())
+    return digest.hexdigest()[:24]
+
+
+def _snapshot_paths(cache_dir, key):
+    return (
+        os.path.join(cache_dir, f'{key}.jobs.parquet'),
+        os.path.join(cache_dir, f'{key}.categories.parquet'),
+    )
+
+
+def load_snapshot(cache_dir, key):
+    """Return (df, job_categories) stored under `key`, or None if there is no snapshot"""
+    if pyarrow is None:
+        raise ImportError('pyarrow package is required to read dataset snapshots')
+    jobs_path, categories_path = _snapshot_paths(cache_dir, key)
+    if not (os.path.exists(jobs_path) and os.path.exists(categories_path)):
+        return None
+    return pd.read_parquet(jobs_path), pd.read_parquet(categories_path)
+
+
+def save_snapshot(cache_dir, key, df, job_categories):
+    """Persist a processed frame and its category table as Parquet under `key`"""
+    if pyarrow is None:
+        raise ImportError('pyarrow package is required to write dataset snapshots')
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write to temporary names and rename, so a crash never leaves a half-written snapshot
+    for path, frame in zip(_snapshot_paths(cache_dir, key), (df, job_categories)):
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+
+def _state_path(cache_dir, key):
+    return os.path.join(cache_dir, f'{key}.state.pkl')
+
+
+def load_state(cache_dir, key):
+    """Return the objects stored under `key` by save_state, or None if there are none or they can't be read
+
+    The state is a pickle, so only point cache_dir at a directory no one
+    else can write to.
+    """
+    path = _state_path(cache_dir, key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        # Unreadable (e.g. written by other library versions): rebuilt and saved again by the caller
+        return None
+
+
+def save_state(cache_dir, key, state):
+    """Persist picklable objects derived from a snapshot (indexes, query results) under `key`"""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _state_path(cache_dir, key)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
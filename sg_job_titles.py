@@ -0,0 +1,304 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Near-duplicate titles: token sets at least this similar (Jaccard) share a role
+SIMILARITY_THRESHOLD = 0.7
+# MinHash signature of BANDS x ROWS values; two token sets become candidates when a band
+# matches, likely above ~(1 / BANDS) ** (1 / ROWS) similarity (about 0.55)
+MINHASH_BANDS = 12
+MINHASH_ROWS = 4
+MINHASH_PRIME = (1 << 31) - 1
+MINHASH_SEED = 20240601
+# Leaders a title is compared against per bucket; buckets of common words fill up with unrelated ones
+MAX_BUCKET_LEADERS = 16
+
+# Spelled out before comparing
+ABBREVIATIONS = {
+    'sr': 'senior', 'snr': 'senior', 'jr': 'junior', 'jnr': 'junior', 'mgr': 'manager', 'asst': 'assistant',
+    'exec': 'executive', 'engr': 'engineer', 'eng': 'engineer', 'admin': 'administrative', 'ops': 'operations',
+    'acct': 'account', 'dept': 'department', 'svc': 'service', 'tech': 'technical',
+}
+STOPWORDS = {'a', 'an', 'and', 'the', 'of', 'for', 'in', 'to', 'with', 'at', 'on', '&'}
+# Hiring terms rather than part of the role
+NOISE_TOKENS = {
+    'immediate', 'immediately', 'urgent', 'urgently', 'hiring', 'contract', 'temp', 'temporary', 'permanent',
+    'perm', 'renewable', 'convertible', 'year', 'years', 'yr', 'yrs', 'month', 'months', 'mth', 'mths',
+    'hybrid', 'wfh', 'new',
+}
+# Kept when they appear in a qualifier ("Software Engineer - Senior")
+SENIORITY_TOKENS = {'senior', 'junior', 'lead', 'principal', 'head', 'chief', 'intern', 'trainee', 'graduate'}
+
+_BRACKETS = re.compile(r'\(([^)]*)\)|\[([^\]]*)\]')
+# " - AWS", " | Finance", " / Excel": separators need spaces around them, so "C/C++" stays one part
+_SEPARATORS = re.compile(r'\s+[-–—|/]\s+')
+_EMPLOYMENT = re.compile(r'\b(?:part|full)[\s-]*time\b')
+_TOKENS = re.compile(r'[a-z0-9+#.]+')
+
+
+def _tokens(text):
+    """Lowercase words of `text` with abbreviations spelled out, and whether any was"""
+    words, expanded = [], False
+    for word in _TOKENS.findall(_EMPLOYMENT.sub(' ', text)):
+        word = word.strip('.')
+        if not word or word in STOPWORDS or word in NOISE_TOKENS or word.isdigit():
+            continue
+        if word in ABBREVIATIONS:
+            word, expanded = ABBREVIATIONS[word], True
+        words.append(word)
+    return words, expanded
+
+
+def title_form(title):
+    """(token set, plain) of a title: the words compared when clustering, and whether nothing was dropped
+
+    Qualifiers in brackets or after a spaced separator (" - AWS", " / Excel")
+    are dropped when the rest names a role of two or more words, apart from
+    seniority words; a one-word role keeps them ("Manager - HR"). Stopwords,
+    hiring terms, numbers and word order don't count. plain is False when
+    anything was dropped or spelled out, so the plainest title in a cluster
+    can label it.
+    """
+    text = str(title).lower()
+    qualifiers = [inner or inner2 for inner, inner2 in _BRACKETS.findall(text)]
+    parts = _SEPARATORS.split(_BRACKETS.sub(' ', text))
+    core, expanded = _tokens(parts[0])
+    qualifiers += parts[1:]
+    extra = []
+    for qualifier in qualifiers:
+        words, qualifier_expanded = _tokens(qualifier)
+        expanded = expanded or qualifier_expanded
+        extra += words if len(core) < 2 else [word for word in words if word in SENIORITY_TOKENS]
+    tokens = frozenset(core + extra)
+    if not tokens:
+        # Nothing but noise: the title stays a role of its own
+        return frozenset([text.strip()]), False
+    return tokens, not (qualifiers or expanded)
+
+
+def _minhash(token_sets):
+    """(n_sets, MINHASH_BANDS * MINHASH_ROWS) MinHash signatures of non-empty token sets"""
+    lengths = np.fromiter((len(tokens) for tokens in token_sets), dtype=np.int64, count=len(token_sets))
+    flat = np.fromiter((token for tokens in token_sets for token in tokens), dtype=object, count=int(lengths.sum()))
+    token_ids, vocabulary = pd.factorize(flat)
+    hashes = pd.util.hash_array(np.asarray(vocabulary, dtype=object)) % np.uint64(MINHASH_PRIME)
+    hashes = hashes[token_ids]
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    rng = np.random.default_rng(MINHASH_SEED)
+    n_hashes = MINHASH_BANDS * MINHASH_ROWS
+    a = rng.integers(1, MINHASH_PRIME, size=n_hashes, dtype=np.uint64)
+    b = rng.integers(0, MINHASH_PRIME, size=n_hashes, dtype=np.uint64)
+    signatures = np.empty((len(token_sets), n_hashes), dtype=np.uint64)
+    for k in range(n_hashes):
+        signatures[:, k] = np.minimum.reduceat((a[k] * hashes + b[k]) % np.uint64(MINHASH_PRIME), starts)
+    return signatures
+
+
+def _band_keys(signatures):
+    """(n_sets, MINHASH_BANDS) bucket keys: sets sharing a key agree on a whole band
+
+    Keys are hashes of the band's values (and the band number), so they are
+    comparable across calls, e.g. between TitleRoles.extend's titles and labels.
+    """
+    keys = np.empty((len(signatures), MINHASH_BANDS), dtype=np.uint64)
+    for band in range(MINHASH_BANDS):
+        rows = signatures[:, band * MINHASH_ROWS:(band + 1) * MINHASH_ROWS]
+        key = np.full(len(signatures), band, dtype=np.uint64)
+        for col in range(MINHASH_ROWS):
+            key = key * np.uint64(1000003) ^ rows[:, col]
+        keys[:, band] = key
+    return keys
+
+
+def cluster_forms(token_sets, weights, threshold=SIMILARITY_THRESHOLD):
+    """Cluster id of each token set: near-duplicates (Jaccard >= threshold) share one
+
+    Leader clustering over LSH blocking, in near-linear time: sets are taken
+    heaviest first, and each joins the most similar existing leader among
+    those sharing one of its MinHash band buckets, or becomes a leader. Only
+    leaders are compared against (at most MAX_BUCKET_LEADERS per bucket, the
+    heaviest), so clusters don't chain away from their leader and buckets of
+    very common words stay cheap. Cluster ids are numbered heaviest leader first.
+    """
+    n = len(token_sets)
+    clusters = np.empty(n, dtype=np.int32)
+    if n == 0:
+        return clusters
+    buckets = _band_keys(_minhash(token_sets)).tolist()
+    order = np.argsort(-np.asarray(weights, dtype=float), kind='stable')
+    leaders, bucket_leaders = [], {}
+    for i in order.tolist():
+        tokens = token_sets[i]
+        best, best_similarity = -1, threshold
+        compared = set()
+        for bucket in buckets[i]:
+            for leader in bucket_leaders.get(bucket, ()):
+                if leader in compared:
+                    continue
+                compared.add(leader)
+                other = leaders[leader]
+                common = len(tokens & other)
+                similarity = common / (len(tokens) + len(other) - common)
+                if similarity > best_similarity or (similarity == best_similarity and (best < 0 or leader < best)):
+                    best, best_similarity = leader, similarity
+        if best < 0:
+            best = len(leaders)
+            leaders.append(tokens)
+            for bucket in buckets[i]:
+                members = bucket_leaders.setdefault(bucket, [])
+                if len(members) < MAX_BUCKET_LEADERS:
+                    members.append(best)
+        clusters[i] = best
+    return clusters
+
+
+def _sorted_keys(keys, owners):
+    """Band keys sorted, with the role ids owning them (ascending within a key)"""
+    order = np.lexsort((owners, keys))
+    return keys[order], owners[order]
+
+
+class TitleRoles:
+    """The canonical role of every distinct job title
+
+    Titles are reduced to their token sets (title_form), so "Sr. Software
+    Engineer", "Senior Software Engineer (Java)" and "Software Engineer -
+    Senior" coincide, and token sets that are near-duplicates of each other
+    are clustered (cluster_forms). Each role is labelled by its plainest,
+    most posted title. Role ids run from the role whose leading title is
+    most posted.
+    """
+
+    def __init__(self, titles, roles, labels):
+        self.titles = pd.Index(titles, dtype=object, name='title')
+        # Role id of each title, and the label of each role id
+        self.roles = np.asarray(roles, dtype=np.int32)
+        self.labels = np.asarray(labels, dtype=object)
+        # Labels' MinHash band keys (sorted) and their role ids, and labels' token sets, built as extend needs them
+        self._label_keys = None
+        self._label_forms = {}
+
+    @classmethod
+    def build(cls, titles, counts, threshold=SIMILARITY_THRESHOLD):
+        """Cluster distinct `titles` posted `counts` times each"""
+        titles = np.asarray(titles, dtype=object)
+        counts = np.asarray(counts, dtype=np.int64)
+        forms = [title_form(title) for title in titles]
+        form_ids, unique_forms = pd.factorize(pd.Series([tokens for tokens, _ in forms], dtype=object))
+        form_weights = np.bincount(form_ids, weights=counts, minlength=len(unique_forms))
+        roles = cluster_forms(list(unique_forms), form_weights, threshold)[form_ids]
+        # Label: plain titles first, then the most posted, then alphabetical
+        plain = np.array([is_plain for _, is_plain in forms], dtype=bool)
+        order = np.lexsort((titles.astype(str), -counts, ~plain, roles))
+        first = order[np.flatnonzero(np.r_[True, roles[order][1:] != roles[order][:-1]])]
+        labels = np.empty(int(roles.max()) + 1 if len(roles) else 0, dtype=object)
+        labels[roles[first]] = titles[first]
+        return cls(titles, roles, labels)
+
+    @classmethod
+    def from_pairs(cls, titles, roles):
+        """From each distinct title and its role label, e.g. as stored next to the postings"""
+        role_ids, labels = pd.factorize(pd.Series(roles, dtype=object))
+        return cls(titles, role_ids, np.asarray(labels, dtype=object))
+
+    def extend(self, titles, counts, threshold=SIMILARITY_THRESHOLD):
+        """These roles plus roles for those of `titles` (posted `counts` times each) not clustered yet
+
+        For postings added after the build: known titles keep their role and
+        no label changes, so roles already stored stay valid. A new title
+        joins the role whose label's token set is most similar to its own (at
+        least `threshold`; candidates come from the labels' MinHash band
+        keys), and the rest are clustered among themselves into new roles.
+        Since earlier titles' roles are kept, the result can differ slightly
+        from building over all the titles at once.
+        """
+        titles = np.asarray(titles, dtype=object)
+        counts = np.asarray(counts, dtype=np.int64)
+        new = self.titles.get_indexer(pd.Index(titles, dtype=object)) < 0
+        titles, counts = titles[new], counts[new]
+        if not len(titles):
+            return self
+        roles = self._match_labels([title_form(title)[0] for title in titles], threshold)
+        labels, label_keys = self.labels, self._label_keys
+        unmatched = np.flatnonzero(roles < 0)
+        if len(unmatched):
+            added = TitleRoles.build(titles[unmatched], counts[unmatched], threshold)
+            roles[unmatched] = added.roles + len(labels)
+            labels = np.concatenate([labels, added.labels])
+            label_keys = _sorted_keys(
+                np.concatenate([label_keys[0], _band_keys(_minhash(added._label_token_sets())).ravel()]),
+                np.concatenate([label_keys[1], np.repeat(np.arange(len(self.labels), len(labels), dtype=np.int32),
+                                                         MINHASH_BANDS)])
+            )
+        extended = TitleRoles(np.concatenate([np.asarray(self.titles, dtype=object), titles]),
+                              np.concatenate([self.roles, roles]), labels)
+        extended._label_keys = label_keys
+        extended._label_forms = self._label_forms
+        return extended
+
+    def _label_token_sets(self):
+        return [title_form(label)[0] for label in self.labels]
+
+    def _match_labels(self, token_sets, threshold):
+        """Role id of the label most similar to each token set (at least `threshold`), or -1"""
+        if self._label_keys is None:
+            owners = np.repeat(np.arange(len(self.labels), dtype=np.int32), MINHASH_BANDS)
+            keys = (_band_keys(_minhash(self._label_token_sets())).ravel() if len(self.labels)
+                    else np.empty(0, dtype=np.uint64))
+            self._label_keys = _sorted_keys(keys, owners)
+        keys, owners = self._label_keys
+        roles = np.full(len(token_sets), -1, dtype=np.int32)
+        if not len(keys):
+            return roles
+        query = _band_keys(_minhash(token_sets))
+        starts = np.searchsorted(keys, query, side='left')
+        # Lowest role ids (the most posted when built) first within a key, as cluster_forms keeps
+        # the heaviest leaders per bucket
+        ends = np.minimum(np.searchsorted(keys, query, side='right'), starts + MAX_BUCKET_LEADERS)
+        for i, tokens in enumerate(token_sets):
+            candidates = set()
+            for start, end in zip(starts[i].tolist(), ends[i].tolist()):
+                candidates.update(owners[start:end].tolist())
+            best, best_similarity = -1, threshold
+            for role in sorted(candidates):
+                other = self._label_forms.get(role)
+                if other is None:
+                    other = self._label_forms[role] = title_form(self.labels[role])[0]
+                common = len(tokens & other)
+                similarity = common / (len(tokens) + len(other) - common)
+                if similarity > best_similarity or (similarity == best_similarity and best < 0):
+                    best, best_similarity = role, similarity
+            roles[i] = best
+        return roles
+
+    def codes(self, titles):
+        """Role id of each of `titles` (-1 for titles not clustered)"""
+        positions = self.titles.get_indexer(pd.Index(titles, dtype=object))
+        return np.where(positions >= 0, self.roles[positions], -1).astype(np.int32)
+
+    def resolve(self, names):
+        """Role labels of `names`, each a role label or a title clustered under one (unknown names kept)"""
+        positions = self.titles.get_indexer(pd.Index(list(names), dtype=object))
+        return list(dict.fromkeys(
+            self.labels[self.roles[position]] if position >= 0 else name for position, name in zip(positions, names)
+        ))
+
+    def members(self, role):
+        """Titles clustered under the role labelled `role`"""
+        role_id = np.flatnonzero(self.labels == role)
+        if not len(role_id):
+            return []
+        return list(self.titles[self.roles == role_id[0]])
+
+    def frame(self):
+        """title and role label per distinct title"""
+        return pd.DataFrame({'title': np.asarray(self.titles, dtype=object), 'role': self.labels[self.roles]})
+
+    def __len__(self):
+        return len(self.labels)
+
+    def memory_usage(self):
+        """Approximate bytes held"""
+        return int(self.titles.memory_usage(deep=True) + self.roles.nbytes
+                   + pd.Series(self.labels, dtype=object).memory_usage(deep=True, index=False))
@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+
+DATE_COLUMN = 'metadata_newPostingDate'
+# Dimensions trends are tracked per (None: all postings together)
+TREND_DIMENSIONS = [None, 'title', 'role', 'main_category']
+# Period lengths: days, and weeks starting on Monday
+FREQUENCIES = ['D', 'W']
+# Summed per cell: postings, and the sums the reported measures derive from
+CELL_STATS = ['postings', 'vacancies', 'applications', 'salary_count', 'salary_sum']
+# Frame columns build() reads
+COLUMNS = [DATE_COLUMN, 'title', 'role', 'main_category', 'numberOfVacancies', 'metadata_totalNumberJobApplication',
+           'average_salary']
+
+DEFAULT_WINDOW_DAYS = 28
+
+
+def _periods(dates, freq):
+    """Start of the day or week (Monday) holding each date"""
+    days = pd.DatetimeIndex(dates).normalize()
+    if freq == 'W':
+        days = days - pd.to_timedelta(days.weekday, unit='D')
+    return days
+
+
+def _group_cells(cells, keys):
+    """Sum cells sharing `keys`, sorted by them"""
+    return cells.groupby(keys, sort=True, observed=True)[CELL_STATS].sum().reset_index()
+
+
+def _merge_sorted(old, new, keys):
+    """Cells of `old` and `new` combined, both sorted by `keys` (period first)
+
+    Only old cells from the first new period on are regrouped, so adding a
+    day's postings costs about the cells of the days after it, not the history.
+    """
+    if not len(old):
+        return new
+    if not len(new):
+        return old
+    split = int(np.searchsorted(old['period'].to_numpy(), new['period'].to_numpy().min(), side='left'))
+    tail = _group_cells(pd.concat([old.iloc[split:], new], ignore_index=True), keys)
+    return pd.concat([old.iloc[:split], tail], ignore_index=True)
+
+
+class TrendRollups:
+    """Posting, vacancy, application and salary totals per day and per week, overall and per title/role/category
+
+    The cells only hold sums, so they merge: update() adds new postings by
+    aggregating just those and merging them into the cells, and every trend
+    query reads the cells of the periods it covers (found by binary search on
+    the sorted periods), however long the history is.
+    """
+
+    def __init__(self, daily):
+        """Build from daily cells: `period` (day), title, role, main_category and CELL_STATS"""
+        self.cells = {}
+        for freq in FREQUENCIES:
+            base = daily if freq == 'D' else daily.assign(period=_periods(daily['period'], 'W'))
+            for dimension in TREND_DIMENSIONS:
+                keys = ['period'] if dimension is None else ['period', dimension]
+                self.cells[(dimension, freq)] = _group_cells(base, keys)
+
+    @staticmethod
+    def daily_cells(df):
+        """Daily cells (one per row, not yet grouped) of the postings in a processed frame"""
+        known = df[DATE_COLUMN].notna().to_numpy()
+        salary = df['average_salary'].to_numpy(dtype=float)[known]
+        return pd.DataFrame({
+            'period': _periods(df[DATE_COLUMN].to_numpy()[known], 'D'),
+            'title': df['title'].to_numpy(dtype=object)[known],
+            'role': df['role'].to_numpy(dtype=object)[known],
+            'main_category': df['main_category'].to_numpy(dtype=object)[known],
+            'postings': np.ones(int(known.sum()), dtype=np.int64),
+            'vacancies': np.nan_to_num(df['numberOfVacancies'].to_numpy(dtype=float)[known]),
+            'applications': np.nan_to_num(df['metadata_totalNumberJobApplication'].to_numpy(dtype=float)[known]),
+            'salary_count': (~np.isnan(salary)).astype(np.int64),
+            'salary_sum': np.nan_to_num(salary),
+        })
+
+    @classmethod
+    def build(cls, df):
+        """Roll up the postings of a processed frame (rows without a posting date are left out)"""
+        return cls(cls.daily_cells(df))
+
+    def update(self, df):
+        """Add the postings of a processed frame, aggregating only those"""
+        self.merge(TrendRollups.build(df))
+
+    def merge(self, other):
+        """Add the cells of rollups built over other postings"""
+        for (dimension, freq), cells in other.cells.items():
+            keys = ['period'] if dimension is None else ['period', dimension]
+            self.cells[(dimension, freq)] = _merge_sorted(self.cells[(dimension, freq)], cells, keys)
+
+    @property
+    def last_period(self):
+        """The latest posting day rolled up (NaT when there are none)"""
+        days = self.cells[(None, 'D')]['period']
+        return days.iloc[-1] if len(days) else pd.NaT
+
+    def _slice(self, dimension, freq, start=None, end=None):
+        """Cells with start <= period <= end"""
+        cells = self.cells[(dimension, freq)]
+        periods = cells['period'].to_numpy()
+        low = 0 if start is None else int(np.searchsorted(periods, np.datetime64(pd.Timestamp(start)), side='left'))
+        high = len(cells) if end is None else int(np.searchsorted(periods, np.datetime64(pd.Timestamp(end)),
+                                                                   side='right'))
+        return cells.iloc[low:high]
+
+    def series(self, dimension=None, freq='W', keys=None, start=None, end=None):
+        """Postings, vacancies, applications and avg_salary per period from start to end
+
+        Indexed by period, and by `dimension` value too when given (optionally
+        only those in `keys`). Periods without postings are left out.
+        """
+        if dimension not in TREND_DIMENSIONS:
+            raise ValueError(f"dimension must be one of {TREND_DIMENSIONS}, got {dimension!r}")
+        if freq not in FREQUENCIES:
+            raise ValueError(f"freq must be one of {FREQUENCIES}, got {freq!r}")
+        cells = self._slice(dimension, freq, start, end)
+        if dimension is not None and keys is not None:
+            cells = cells[cells[dimension].isin(list(keys))]
+        return _with_means(cells.set_index(['period'] if dimension is None else ['period', dimension]))
+
+    def window_totals(self, dimension, start, end):
+        """CELL_STATS summed per `dimension` value over the days start..end"""
+        cells = self._slice(dimension, 'D', start, end)
+        return cells.groupby(dimension, sort=False, observed=True)[CELL_STATS].sum()
+
+    def growth(self, dimension='role', window_days=DEFAULT_WINDOW_DAYS, end=None):
+        """Activity per `dimension` value in the last `window_days` days up to `end` against the window before
+
+        end defaults to the latest posting day. Returns postings, vacancies,
+        applications and avg_salary over the current window, previous_postings,
+        previous_vacancies, and postings_growth / vacancies_growth as the
+        relative change (NaN when the previous window had none).
+        """
+        if dimension is None:
+            raise ValueError('growth needs a dimension to compare values of')
+        end = self.last_period if end is None else pd.Timestamp(end).normalize()
+        if pd.isna(end):
+            return _empty_growth(dimension)
+        window = pd.Timedelta(days=int(window_days))
+        current = self.window_totals(dimension, end - window + pd.Timedelta(days=1), end)
+        previous = self.window_totals(dimension, end - 2 * window + pd.Timedelta(days=1), end - window)
+        totals = current.join(previous[['postings', 'vacancies']].add_prefix('previous_'), how='outer').fillna(0)
+        totals = _with_means(totals)
+        totals['previous_postings'] = totals['previous_postings'].astype(np.int64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for measure in ('postings', 'vacancies'):
+                before = totals[f'previous_{measure}'].to_numpy(dtype=float)
+                totals[f'{measure}_growth'] = np.where(
+                    before > 0, (totals[measure].to_numpy(dtype=float) - before) / np.maximum(before, 1), np.nan
+                )
+        return totals.sort_index()
+
+    def emerging(self, dimension='role', window_days=DEFAULT_WINDOW_DAYS, min_postings=5, top_n=10, end=None):
+        """The `dimension` values gaining postings fastest (see growth), most emerging first
+
+        Values with fewer than `min_postings` postings in the current window
+        are left out. They are ranked by `score`, the gain in postings over
+        the previous window's postings plus min_postings, which keeps values
+        that grew from a handful of postings from outranking established ones
+        growing steadily, while new values still rank.
+        """
+        totals = self.growth(dimension, window_days, end)
+        totals = totals[totals['postings'] >= min_postings].copy()
+        totals['score'] = (totals['postings'] - totals['previous_postings']) / (
+            totals['previous_postings'] + max(min_postings, 1)
+        )
+        totals = totals[totals['score'] > 0]
+        return totals.sort_values(['score', 'postings'], ascending=False, kind='stable').head(top_n)
+
+    def memory_usage(self):
+        """Bytes held by the cells"""
+        return int(sum(cells.memory_usage(deep=True).sum() for cells in self.cells.values()))
+
+
+def _with_means(cells):
+    """Cells with avg_salary in place of the salary count and sum"""
+    count = cells['salary_count'].to_numpy(dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_salary = np.where(count > 0, cells['salary_sum'].to_numpy(dtype=float) / np.maximum(count, 1), np.nan)
+    cells = cells.drop(columns=['salary_count', 'salary_sum'])
+    cells['postings'] = cells['postings'].astype(np.int64)
+    cells['avg_salary'] = avg_salary
+    return cells
+
+
+def _empty_growth(dimension):
+    columns = ['postings', 'vacancies', 'applications', 'previous_postings', 'previous_vacancies', 'avg_salary',
+               'postings_growth', 'vacancies_growth']
+    return pd.DataFrame(columns=columns, index=pd.Index([], name=dimension), dtype=float)
@@ -0,0 +1,106 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Make the project modules and scripts importable however pytest is started
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+from sg_job_data_processor import JobDataProcessor
+
+# Postings in the test CSV
+JOB_ROWS = 3000
+
+CATEGORIES = [
+    'Information Technology', 'Engineering', 'Accounting / Auditing / Taxation', 'Banking and Finance',
+    'Healthcare / Pharmaceutical', 'Sales / Retail', 'Admin / Secretarial', 'Logistics / Supply Chain',
+]
+# Empty strings are cleaned to 'Unknown'
+POSITIONS = ['Executive', 'Senior Executive', 'Manager', 'Professional', 'Non-executive', 'Fresh/entry level', '']
+EMPLOYMENT_TYPES = ['Permanent', 'Full Time', 'Contract', 'Part Time', '']
+TITLE_ROLES = [
+    'Software Engineer', 'Data Analyst', 'Data Scientist', 'Accountant', 'Auditor', 'Sales Executive',
+    'Project Manager', 'Business Analyst', 'Admin Assistant', 'Registered Nurse', 'DevOps Engineer',
+    'Network Engineer', 'Java Developer', 'Python Developer', 'Financial Analyst', 'Warehouse Assistant',
+]
+TITLE_PREFIXES = ['', '', 'Senior ', 'Junior ', 'Lead ']
+TITLE_SUFFIXES = ['', '', ' (SQL)', ' - AWS', ' (Tableau)', ' / Excel']
+
+
+def synthetic_jobs(rows, start=0, seed=0):
+    """`rows` raw postings shaped like SGJobData.csv, numbered from `start`"""
+    rng = np.random.default_rng(seed)
+    titles = np.array([prefix + role + suffix for role in TITLE_ROLES
+                       for prefix in TITLE_PREFIXES for suffix in TITLE_SUFFIXES])
+    companies = np.array([f'{word} {kind} PTE. LTD.' for word in ('Asia', 'Lion', 'Orchid', 'Summit', 'Zenith')
+                          for kind in ('TECHNOLOGIES', 'SOLUTIONS', 'HOLDINGS', 'SERVICES', 'TRADING')])
+    # Long-tailed popularity, so some titles and companies are frequent
+    title_p = 1 / np.arange(1, len(titles) + 1)
+    company_p = 1 / np.arange(1, len(companies) + 1)
+
+    n_categories = rng.choice([0, 1, 1, 1, 2, 3], rows)
+    categories = [json.dumps([{'id': int(c) + 1, 'category': CATEGORIES[c]}
+                              for c in rng.choice(len(CATEGORIES), size=k, replace=False)])
+                  for k in n_categories]
+    salary_min = np.round(rng.lognormal(8.2, 0.5, rows), -2)
+    salary_max = np.round(salary_min * rng.uniform(1.1, 1.6, rows), -2)
+    average = (salary_min + salary_max) / 2
+    missing = rng.random(rows) < 0.02
+    salary_min[missing], salary_max[missing], average[missing] = np.nan, np.nan, np.nan
+    # Some postings leave average_salary to be derived from the bounds
+    average[rng.random(rows) < 0.05] = np.nan
+    experience = rng.integers(0, 15, rows).astype(float)
+    experience[rng.random(rows) < 0.05] = np.nan
+    posted = np.datetime64('2023-01-01') + rng.integers(0, 365, rows).astype('timedelta64[D]')
+    views = rng.integers(0, 500, rows)
+    ids = np.arange(start, start + rows)
+
+    return pd.DataFrame({
+        'categories': categories,
+        'employmentTypes': rng.choice(EMPLOYMENT_TYPES, rows, p=[0.45, 0.3, 0.15, 0.07, 0.03]),
+        'metadata_expiryDate': (posted + np.timedelta64(30, 'D')).astype(str),
+        'metadata_isPostedOnBehalf': rng.random(rows) < 0.15,
+        'metadata_jobPostId': [f'MCF-TEST-{i:07d}' for i in ids],
+        'metadata_newPostingDate': posted.astype(str),
+        'metadata_originalPostingDate': posted.astype(str),
+        'metadata_repostCount': rng.choice([0, 0, 1, 2], rows),
+        'metadata_totalNumberJobApplication': rng.binomial(views, 0.1),
+        'metadata_totalNumberOfView': views,
+        'minimumYearsExperience': experience,
+        'numberOfVacancies': rng.choice([1, 1, 1, 2, 5], rows),
+        'occupationId': '',
+        'positionLevels': rng.choice(POSITIONS, rows, p=[0.25, 0.15, 0.15, 0.15, 0.15, 0.1, 0.05]),
+        'postedCompany_name': companies[rng.choice(len(companies), rows, p=company_p / company_p.sum())],
+        'salary_maximum': salary_max,
+        'salary_minimum': salary_min,
+        'salary_type': 'Monthly',
+        'status_id': rng.choice(['0', '1'], rows),
+        'status_jobStatus': rng.choice(['Open', 'Closed'], rows),
+        'title': titles[rng.choice(len(titles), rows, p=title_p / title_p.sum())],
+        'average_salary': average,
+    })
+
+
+@pytest.fixture(scope='session')
+def jobs_frame():
+    """The raw postings the test CSV holds"""
+    return synthetic_jobs(JOB_ROWS)
+
+
+@pytest.fixture(scope='session')
+def jobs_csv(tmp_path_factory, jobs_frame):
+    """Path of a CSV of jobs_frame"""
+    path = tmp_path_factory.mktemp('data') / 'jobs.csv'
+    jobs_frame.to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture(scope='session')
+def processor(jobs_csv):
+    """A pandas-engine JobDataProcessor over jobs_csv"""
+    return JobDataProcessor(jobs_csv)
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sg_job_cube import MEASURES, SALARY_STEP, rollup_rows
+
+STATS = ['count', 'sum', 'mean', 'std', 'min', 'max']
+
+FILTERS = [
+    {},
+    {'salary_range': (3000, 6000)},
+    {'industries': ['Information Technology']},
+    {'exp_level': ['Mid (2-5y)'], 'position': ['Executive', 'Manager']},
+    {'employment': ['Permanent'], 'salary_range': (2500, 9000)},
+]
+GROUPINGS = [(), ('positionLevels',), ('exp_category', 'employmentTypes'), ('salary_bucket',)]
+
+
+def groupby_rollup(rows, group_by):
+    """What JobCube.rollup should return for `rows`, aggregated with pandas groupby"""
+    rows = rows.assign(salary_bucket=np.floor(rows['average_salary'] / SALARY_STEP) * SALARY_STEP)
+    # Grouped by label, not category order, like the cube
+    rows = rows.astype({col: object for col in group_by if isinstance(rows[col].dtype, pd.CategoricalDtype)})
+    grouped = rows.groupby(list(group_by) if group_by else np.zeros(len(rows), dtype=int))
+    expected = pd.DataFrame({'jobs': grouped.size(), 'title_count': grouped['title'].count()})
+    for measure in MEASURES:
+        stats = grouped[measure].agg(STATS)
+        for stat in STATS:
+            expected[f'{measure}_{stat}'] = stats[stat]
+    return expected
+
+
+def assert_rollup_equal(result, expected):
+    pd.testing.assert_frame_equal(result.sort_index(), expected.sort_index(), check_dtype=False,
+                                  check_index_type=False, check_names=False, rtol=1e-9)
+
+
+# The industry cells carry no salary, so grouping them by salary_bucket falls back to the rows
+@pytest.mark.parametrize('filters, group_by', [(filters, group_by) for filters in FILTERS for group_by in GROUPINGS
+                                              if not ('industries' in filters and 'salary_bucket' in group_by)])
+def test_cube_rollup_equals_groupby(processor, filters, group_by):
+    assert processor.cube.supports(group_by, **filters)
+    expected = groupby_rollup(processor.filter_data(**filters), group_by)
+    assert_rollup_equal(processor.cube.rollup(group_by, **filters), expected)
+
+
+@pytest.mark.parametrize('filters', [
+    {'industries': ['Information Technology'], 'salary_range': (3000, 6000)},
+    {'industries': ['Information Technology', 'Engineering']},
+    {'industries': ['Information Technology']},
+    {'salary_range': (3250, 6100)},
+    {'roles': ['Data Analyst', 'Accountant'], 'industries': ['Information Technology']},
+])
+@pytest.mark.parametrize('group_by', GROUPINGS + [('main_category',)])
+def test_processor_rollup_equals_groupby(processor, filters, group_by):
+    """Criteria the cube leaves to rollup_rows, and the industry cells' combinations with them"""
+    expected = groupby_rollup(processor.filter_data(**filters), group_by)
+    assert_rollup_equal(processor.rollup(group_by, **filters), expected)
+
+
+def test_rollup_rows_equals_groupby(processor):
+    rows = np.arange(0, len(processor.df), 3)
+    for group_by in GROUPINGS:
+        expected = groupby_rollup(processor.df.iloc[rows], group_by)
+        assert_rollup_equal(rollup_rows(processor.df, rows, group_by), expected)
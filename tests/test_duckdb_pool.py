@@ -0,0 +1,74 @@
+import os
+
+import duckdb
+import pytest
+
+import migrate_to_duckdb
+from sg_job_data_processor import JobDataProcessor
+from sg_job_duckdb_pool import DuckDBPool, list_generations, new_generation_path, publish_generation
+
+# Postings in the first migration; the rest come with the second
+MIGRATED_ROWS = 2000
+
+
+def write_generation(path, value, keep=3):
+    """Publish a new generation of the database at `path` holding `value`"""
+    generation = new_generation_path(path)
+    conn = duckdb.connect(generation)
+    conn.execute('CREATE TABLE t AS SELECT ? AS value', [value])
+    conn.close()
+    publish_generation(path, generation, keep=keep)
+    return generation
+
+
+def read(pool):
+    with pool.cursor() as cursor:
+        return cursor.execute('SELECT value FROM t').fetchone()[0]
+
+
+def test_pool_switches_generations(tmp_path):
+    path = str(tmp_path / 'jobs.duckdb')
+    first = write_generation(path, 1)
+    pool = DuckDBPool(path, check_interval_s=3600)
+    swapped = []
+    pool.on_swap.append(swapped.append)
+    assert pool.generation == first and read(pool) == 1
+
+    with pool.cursor() as running:
+        second = write_generation(path, 2)
+        # Not due for a check yet
+        assert not pool.refresh() and read(pool) == 1
+        assert pool.refresh(force=True)
+        assert pool.generation == second and read(pool) == 2
+        # A query already running keeps its generation
+        assert running.execute('SELECT value FROM t').fetchone()[0] == 1
+    assert swapped == [second]
+    assert pool.stats()['swaps'] == 1 and pool.stats()['leased'] == 0
+    assert not pool.refresh(force=True)
+
+    third = write_generation(path, 3, keep=2)
+    assert list_generations(path) == [second, third] and not os.path.exists(first)
+    assert pool.refresh(force=True) and read(pool) == 3
+    pool.close()
+    with pytest.raises(RuntimeError):
+        read(pool)
+
+
+def test_processor_follows_migrations(tmp_path, jobs_frame):
+    db = str(tmp_path / 'jobs.duckdb')
+    first, rest = tmp_path / 'first.csv', tmp_path / 'rest.csv'
+    jobs_frame[:MIGRATED_ROWS].to_csv(first, index=False)
+    jobs_frame[MIGRATED_ROWS:].to_csv(rest, index=False)
+    migrate_to_duckdb.main(['--csv', str(first), '--db', db])
+    # Checked for new generations before every query
+    pool = DuckDBPool(db, check_interval_s=0)
+    processor = JobDataProcessor(db, engine='duckdb', pool=pool)
+    try:
+        assert processor.get_market_overview()['total_jobs'] == MIGRATED_ROWS
+        migrate_to_duckdb.main(['--csv', str(rest), '--db', db, '--mode', 'append'])
+        # The cached overview of the previous generation was dropped
+        assert processor.get_market_overview()['total_jobs'] == len(jobs_frame)
+        assert not processor.refresh_source()
+    finally:
+        processor.close()
+        pool.close()
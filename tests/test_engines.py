@@ -0,0 +1,97 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sg_job_data_processor import JobDataProcessor
+
+FILTERS = [
+    {},
+    {'industries': ['Information Technology']},
+    {'industries': ['Engineering', 'Banking and Finance'], 'salary_range': (3000, 6000)},
+    {'exp_level': ['Mid (2-5y)', 'Senior (5-10y)'], 'position': ['Executive', 'Manager']},
+    {'employment': ['Permanent'], 'roles': ['Data Analyst', 'Senior Software Engineer']},
+    {'industries': ['Nothing Like This']},
+]
+QUERIES = [
+    ('get_top_roles', {'top_n': 10}),
+    ('get_industry_stats', {}),
+    ('get_salary_by_position', {}),
+    ('get_skill_keywords', {'top_n': 15}),
+    ('get_market_overview', {}),
+    ('get_filter_options', {}),
+    ('get_employment_by_industry', {}),
+    ('get_salary_by_industry', {'top_n': 10}),
+    ('get_salary_percentiles', {'group_by': 'exp_category'}),
+    ('get_salary_percentiles', {'industries': ['Engineering']}),
+    ('get_top_companies', {'top_n': 5}),
+    ('get_salary_histogram', {'bins': 30}),
+    ('get_salary_histogram', {'bins': 12, 'industries': ['Engineering']}),
+    ('get_trends', {'dimension': 'main_category'}),
+    ('get_emerging_roles', {'min_postings': 1}),
+    ('get_similar_jobs', {'title': 'Data Engineer (SQL)', 'salary': 5000, 'industries': ['Engineering']}),
+    ('get_similar_jobs', {'job_id': 'MCF-TEST-0000010'}),
+]
+# What filter_data's rows are compared on; the raw columns come back typed differently per engine
+FILTER_COLUMNS = ['metadata_jobPostId', 'title', 'average_salary', 'salary_minimum', 'main_category',
+                  'positionLevels', 'employmentTypes', 'exp_category', 'engagement_score']
+
+
+@pytest.fixture(scope='module')
+def duckdb_processor(jobs_csv):
+    processor = JobDataProcessor(jobs_csv, engine='duckdb')
+    yield processor
+    processor.close()
+
+
+def assert_same(pandas_result, duckdb_result, name):
+    """Results of the two engines agree, up to dtypes, float rounding and the order of ties"""
+    if isinstance(pandas_result, pd.DataFrame):
+        pd.testing.assert_frame_equal(pandas_result.sort_index(), duckdb_result.sort_index(), check_dtype=False,
+                                      check_index_type=False, check_column_type=False, check_names=False,
+                                      check_categorical=False, obj=name)
+    elif isinstance(pandas_result, pd.Series):
+        pd.testing.assert_series_equal(pandas_result.sort_index(), duckdb_result.sort_index(), check_dtype=False,
+                                       check_index_type=False, check_names=False, check_categorical=False,
+                                       obj=name)
+    elif isinstance(pandas_result, dict):
+        assert list(pandas_result) == list(duckdb_result), name
+        for key in pandas_result:
+            assert_same(pandas_result[key], duckdb_result[key], f'{name}[{key!r}]')
+    elif isinstance(pandas_result, (list, tuple)):
+        assert list(pandas_result) == list(duckdb_result), name
+    elif isinstance(pandas_result, (float, np.floating)) and math.isnan(pandas_result):
+        assert math.isnan(duckdb_result), name
+    elif isinstance(pandas_result, (float, np.floating)):
+        assert duckdb_result == pytest.approx(pandas_result, rel=1e-9), name
+    else:
+        assert pandas_result == duckdb_result, name
+
+
+@pytest.mark.parametrize('method, args', QUERIES, ids=[method for method, _ in QUERIES])
+def test_queries_agree(processor, duckdb_processor, method, args):
+    assert_same(getattr(processor, method)(**args), getattr(duckdb_processor, method)(**args), method)
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_filter_data_agrees(processor, duckdb_processor, filters):
+    expected = processor.filter_data(**filters)
+    result = duckdb_processor.filter_data(**filters, columns=FILTER_COLUMNS)
+    assert len(result) == len(expected)
+    assert_same(expected[FILTER_COLUMNS].sort_values('metadata_jobPostId').reset_index(drop=True),
+                result.sort_values('metadata_jobPostId').reset_index(drop=True), 'filter_data')
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_dashboard_agrees(processor, duckdb_processor, filters):
+    expected = processor.get_dashboard(**filters, columns=['metadata_jobPostId'])
+    result = duckdb_processor.get_dashboard(**filters, columns=['metadata_jobPostId'])
+    assert list(result) == list(expected)
+    assert sorted(result.pop('jobs')['metadata_jobPostId']) == sorted(expected.pop('jobs')['metadata_jobPostId'])
+    # Companies tied on count may be picked in either order
+    counts = processor.filter_data(**filters)['postedCompany_name'].value_counts()
+    assert list(result.pop('top_companies')) == list(expected.pop('top_companies'))
+    top = [dashboard['overview'].pop('top_company') for dashboard in (expected, result)]
+    assert counts.get(top[0], 0) == counts.get(top[1], 0)
+    assert_same(expected, result, 'get_dashboard')
@@ -0,0 +1,71 @@
+import io
+
+import pandas as pd
+import pytest
+from pyarrow import ipc, parquet
+
+from sg_job_data_processor import JobDataProcessor
+
+FILTERS = [{}, {'industries': ['Engineering'], 'salary_range': (3000, 6000)}, {'roles': ['No Such Title']}]
+COLUMNS = ['metadata_jobPostId', 'title', 'role', 'average_salary', 'exp_category']
+BATCH_ROWS = 250
+
+
+def read(path, format):
+    if format == 'parquet':
+        return parquet.read_table(path)
+    with ipc.open_file(path) as reader:
+        return reader.read_all()
+
+
+@pytest.fixture(scope='module')
+def duckdb_processor(jobs_csv):
+    processor = JobDataProcessor(jobs_csv, engine='duckdb')
+    yield processor
+    processor.close()
+
+
+@pytest.mark.parametrize('format, compression', [('parquet', None), ('parquet', 'zstd'), ('arrow', None),
+                                                 ('arrow', 'lz4')])
+@pytest.mark.parametrize('filters', FILTERS)
+def test_round_trip(tmp_path, processor, format, compression, filters):
+    path = tmp_path / f'jobs.{format}'
+    written = processor.export(str(path), format, compression=compression, batch_rows=BATCH_ROWS, **filters)
+    expected = processor.filter_data(**filters).reset_index(drop=True)
+    assert written == len(expected)
+    # An export of no rows has no batch to carry the categoricals' categories
+    pd.testing.assert_frame_equal(read(path, format).to_pandas(), expected, check_categorical=False)
+
+
+@pytest.mark.parametrize('format', ['parquet', 'arrow'])
+def test_column_projection_and_batches(processor, format):
+    sink = io.BytesIO()
+    filters = {'position': ['Executive', 'Manager']}
+    written = processor.export(sink, format, columns=COLUMNS, batch_rows=BATCH_ROWS, **filters)
+    table = read(io.BytesIO(sink.getvalue()), format)
+    assert table.column_names == COLUMNS
+    assert written == table.num_rows == len(processor.filter_data(**filters))
+    if format == 'parquet':
+        assert parquet.ParquetFile(io.BytesIO(sink.getvalue())).num_row_groups == -(-written // BATCH_ROWS)
+    else:
+        assert ipc.open_file(io.BytesIO(sink.getvalue())).num_record_batches == -(-written // BATCH_ROWS)
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_duckdb_export_matches_pandas(tmp_path, processor, duckdb_processor, filters):
+    path = tmp_path / 'jobs.parquet'
+    written = duckdb_processor.export(str(path), columns=COLUMNS, batch_rows=BATCH_ROWS, **filters)
+    exported = parquet.read_table(path).to_pandas()
+    expected = processor.filter_data(**filters)
+    assert written == len(expected)
+    assert sorted(exported['metadata_jobPostId']) == sorted(expected['metadata_jobPostId'])
+
+
+def test_unknown_column_or_format(tmp_path, processor, duckdb_processor):
+    for engine in (processor, duckdb_processor):
+        with pytest.raises(KeyError):
+            engine.export(str(tmp_path / 'jobs.parquet'), columns=['title', 'no_such_column'])
+    with pytest.raises(ValueError):
+        processor.export(str(tmp_path / 'jobs.csv'), 'csv')
+    with pytest.raises(ValueError):
+        processor.export(str(tmp_path / 'jobs.arrow'), 'arrow', compression='snappy')
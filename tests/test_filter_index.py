@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+FILTERS = [
+    {},
+    {'industries': ['Information Technology']},
+    # Rows listing several categories match any of them, once
+    {'industries': ['information technology', 'Engineering', 'Banking and Finance']},
+    # Both bounds are salaries some postings have
+    {'salary_range': (3000, 4500)},
+    {'salary_range': (4500, 4500)},
+    {'exp_level': ['Entry Level', 'Expert (10y+)'], 'position': ['Unknown', 'Manager']},
+    {'employment': ['Contract', 'Unknown'], 'industries': ['Sales / Retail'], 'salary_range': (2000, 8000)},
+    {'roles': ['Data Analyst', 'Senior Software Engineer - AWS'], 'employment': ['Permanent']},
+    {'industries': ['Engineering'], 'exp_level': ['Mid (2-5y)'], 'position': ['Executive'],
+     'employment': ['Full Time'], 'salary_range': (2500, 9000)},
+    # An empty list filters nothing
+    {'position': ['Manager'], 'employment': []},
+    # Empty selections
+    {'industries': ['Nothing Like This']},
+    {'roles': ['No Such Title']},
+    {'salary_range': (1, 10)},
+    {'exp_level': ['Entry Level'], 'salary_range': (100000, 200000)},
+]
+
+
+def mask_rows(df, roles=None, industries=None, salary_range=None, exp_level=None, position=None,
+              employment=None):
+    """Row positions matching the criteria (roles as role labels), from a boolean mask over the frame"""
+    mask = np.ones(len(df), dtype=bool)
+    if roles:
+        mask &= df['role'].isin(roles).to_numpy()
+    if industries:
+        wanted = {industry.lower() for industry in industries}
+        listed = df['main_category'].str.lower().str.split(', ')
+        mask &= listed.map(lambda categories: bool(wanted.intersection(categories))).to_numpy(dtype=bool)
+    if salary_range:
+        salary = df['average_salary']
+        mask &= ((salary >= salary_range[0]) & (salary <= salary_range[1])).to_numpy()
+    if exp_level:
+        mask &= df['exp_category'].isin(exp_level).to_numpy()
+    if position:
+        mask &= df['positionLevels'].isin(position).to_numpy()
+    if employment:
+        mask &= df['employmentTypes'].isin(employment).to_numpy()
+    return np.flatnonzero(mask)
+
+
+def test_filters_cover_the_edge_cases(processor):
+    salary = processor.df['average_salary']
+    assert (salary == 3000).any() and (salary == 4500).any()
+    assert processor.df['main_category'].str.contains(', ').any()
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_select_equals_boolean_mask(processor, filters):
+    # Titles select every posting of their role
+    resolved = dict(filters, roles=processor.title_roles.resolve(filters['roles'])) if 'roles' in filters else filters
+    expected = mask_rows(processor.df, **resolved)
+    rows = processor.filter_index.select(**resolved)
+    assert np.array_equal(rows, expected)
+    pd.testing.assert_frame_equal(processor.filter_data(**filters), processor.df.iloc[expected])
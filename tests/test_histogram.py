@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from sg_job_selection import MAX_HISTOGRAM_BINS, histogram_bins
+
+ROUND_STEPS = (1, 2, 2.5, 5)
+
+
+@pytest.mark.parametrize('low, high, bins', [
+    (1234, 9876, 50), (0, 1, 10), (3000, 6000, 30), (850, 850.5, 7), (1000, 1e6, 10_000),
+])
+def test_bins_are_round_and_cover_the_range(low, high, bins):
+    start, width, n = histogram_bins(low, high, bins)
+    bins = min(bins, MAX_HISTOGRAM_BINS)
+    mantissa = width / 10.0 ** np.floor(np.log10(width))
+    assert any(mantissa == pytest.approx(step) for step in ROUND_STEPS)
+    assert start / width == pytest.approx(round(start / width))
+    assert start <= low and start + n * width >= high
+    assert width * bins >= high - low
+    assert n <= bins + 1
+
+
+def test_equal_bounds_make_one_bin():
+    assert histogram_bins(4500, 4500, 20) == (4500, 1.0, 1)
+
+
+@pytest.mark.parametrize('filters', [
+    {}, {'industries': ['Engineering']}, {'position': ['Manager'], 'salary_range': (2000, 9000)},
+])
+def test_histogram_equals_np_histogram(processor, filters):
+    histogram = processor.get_salary_histogram(bins=30, **filters)
+    values = processor.filter_data(**filters)['average_salary'].dropna()
+    edges = np.append(histogram['bin_start'].to_numpy(), histogram['bin_end'].iloc[-1])
+    assert histogram['bin_start'].iloc[0] <= values.min() and edges[-1] >= values.max()
+    # np.histogram's bins are half-open too, except the last
+    assert histogram['count'].tolist() == np.histogram(values, bins=edges)[0].tolist()
+
+
+def test_the_maximum_lands_in_the_last_bin(processor):
+    values = processor.filter_data(salary_range=(3000, 6000))['average_salary']
+    assert values.min() == 3000 and values.max() == 6000
+    histogram = processor.get_salary_histogram(bins=30, salary_range=(3000, 6000))
+    # 100-wide bins from 3000 to 6000: the maximum is the last bin's end
+    assert len(histogram) == 30
+    assert histogram['bin_end'].iloc[-1] == 6000
+    assert histogram['count'].iloc[-1] == values.between(5900, 6000).sum()
+    assert histogram['count'].sum() == len(values)
@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+
+from sg_job_data_processor import DERIVED_COLUMNS, PROCESSED_COLUMNS, JobDataProcessor
+
+FILTERS = [
+    {},
+    {'industries': ['Information Technology', 'engineering'], 'salary_range': (3000, 6000)},
+    {'exp_level': ['Mid (2-5y)'], 'position': ['Executive', 'Manager'], 'employment': ['Permanent']},
+    {'roles': ['Data Analyst', 'Accountant']},
+]
+QUERIES = [('get_top_roles', {}), ('get_industry_stats', {}), ('get_salary_by_experience', {}),
+           ('get_skill_keywords', {}), ('get_dashboard', {'industries': ['Engineering']})]
+
+
+def not_read(*args, **kwargs):
+    raise AssertionError('the source was read rather than restored from the snapshot')
+
+
+def assert_same(result, expected):
+    if isinstance(expected, pd.DataFrame):
+        pd.testing.assert_frame_equal(result, expected)
+    elif isinstance(expected, pd.Series):
+        pd.testing.assert_series_equal(result, expected)
+    elif isinstance(expected, dict):
+        assert list(result) == list(expected)
+        for key in expected:
+            assert_same(result[key], expected[key])
+    else:
+        assert result == pytest.approx(expected, nan_ok=True)
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_overview_before_derivation(jobs_csv, processor, filters):
+    lazy = JobDataProcessor(jobs_csv, lazy=True)
+    overview = lazy.get_market_overview(**filters)
+    assert lazy.filter_index is None
+    if not filters:
+        assert set(lazy._deferred) == set(DERIVED_COLUMNS)
+    assert_same(overview, processor.get_market_overview(**filters))
+
+
+def test_results_after_derivation_equal_eager_load(jobs_csv, processor):
+    lazy = JobDataProcessor(jobs_csv, lazy=True)
+    for method, args in QUERIES:
+        assert_same(getattr(lazy, method)(**args), getattr(processor, method)(**args))
+    assert lazy.filter_index is not None and not lazy._deferred
+    pd.testing.assert_frame_equal(lazy.df[PROCESSED_COLUMNS], processor.df[PROCESSED_COLUMNS])
+
+
+def test_snapshot_restore_defers_the_indexes(tmp_path, jobs_csv, processor, monkeypatch):
+    cache_dir = str(tmp_path / 'cache')
+    # The snapshot is written once lazy mode has finished its deferred work
+    JobDataProcessor(jobs_csv, lazy=True, cache_dir=cache_dir).ensure_indexes()
+
+    monkeypatch.setattr(JobDataProcessor, '_read_source', not_read)
+    restored = JobDataProcessor(jobs_csv, lazy=True, cache_dir=cache_dir)
+    assert restored.filter_index is None
+    assert_same(restored.get_market_overview(), processor.get_market_overview())
+    assert restored.filter_index is None
+    assert_same(restored.get_top_roles(), processor.get_top_roles())
+    assert restored.filter_index is not None
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from pandas.testing import assert_frame_equal
+
+from sg_job_data_processor import PARTITIONS_PER_WORKER, JobDataProcessor
+from sg_job_partitions import QUOTE, csv_partitions
+
+WORKERS = 2
+# Every MULTILINE_EVERY-th title of the CSV below spans two lines
+MULTILINE_EVERY = 3
+
+
+@pytest.fixture(scope='module')
+def multiline_frame(jobs_frame):
+    """jobs_frame with every MULTILINE_EVERY-th title broken over two lines, quotes included"""
+    jobs = jobs_frame.copy()
+    multiline = jobs.index % MULTILINE_EVERY == 0
+    jobs.loc[multiline, 'title'] = jobs.loc[multiline, 'title'] + '\n"Night shift", rotating'
+    return jobs
+
+
+@pytest.fixture(scope='module')
+def multiline_csv(tmp_path_factory, multiline_frame):
+    path = tmp_path_factory.mktemp('data') / 'multiline_jobs.csv'
+    multiline_frame.to_csv(path, index=False)
+    return str(path)
+
+
+def test_split_points_fall_inside_quoted_fields(multiline_csv):
+    """The CSV has even byte splits inside quoted fields, so the partitioned loads below cover that case"""
+    data = np.fromfile(multiline_csv, dtype=np.uint8)
+    n_partitions = WORKERS * PARTITIONS_PER_WORKER
+    header, ranges = csv_partitions(multiline_csv, n_partitions)
+    body_start = len(header)
+    targets = [body_start + (len(data) - body_start) * k // n_partitions for k in range(1, n_partitions)]
+    inside_quotes = np.bitwise_xor.accumulate((data == QUOTE).view(np.uint8))
+    assert any(inside_quotes[target - 1] for target in targets)
+    assert len(ranges) == n_partitions
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_partitioned_load_equals_serial(multiline_csv, multiline_frame, compact):
+    serial = JobDataProcessor(multiline_csv, compact=compact)
+    partitioned = JobDataProcessor(multiline_csv, compact=compact, pipeline_workers=WORKERS)
+
+    assert len(serial.df) == len(multiline_frame)
+    assert serial.df['title'].str.contains('\n').sum() == multiline_frame['title'].str.contains('\n').sum()
+    assert_frame_equal(partitioned.df, serial.df)
+    assert_frame_equal(partitioned.job_categories, serial.job_categories)
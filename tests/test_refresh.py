@@ -0,0 +1,82 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sg_job_data_processor import JobDataProcessor
+from sg_job_result_cache import ResultCache
+
+# Postings loaded first; the rest arrive afterwards
+LOADED_ROWS = 2000
+FILTERS = [{}, {'industries': ['Information Technology']}, {'salary_range': (3000, 6000)},
+           {'exp_level': ['Mid (2-5y)'], 'position': ['Executive']}]
+
+
+def assert_same_data(grown, full):
+    """grown holds what full loaded at once; roles aside, which extending keeps as first assigned"""
+    pd.testing.assert_frame_equal(grown.df.drop(columns='role'), full.df.drop(columns='role'))
+    pd.testing.assert_frame_equal(grown.job_categories, full.job_categories)
+    for filters in FILTERS:
+        assert np.array_equal(grown.filter_index.select(**filters), full.filter_index.select(**filters))
+        for group_by in [(), ('positionLevels',), ('main_category',), ('salary_bucket',)]:
+            # Groups come in the order of the cube's cells, which merging changes
+            pd.testing.assert_frame_equal(grown.rollup(group_by, **filters).sort_index(),
+                                          full.rollup(group_by, **filters).sort_index())
+        pd.testing.assert_frame_equal(grown.get_industry_stats(**filters), full.get_industry_stats(**filters))
+        pd.testing.assert_series_equal(grown.get_top_companies(**filters), full.get_top_companies(**filters))
+    pd.testing.assert_frame_equal(grown.get_trends(), full.get_trends())
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_refresh_equals_full_reload(tmp_path, jobs_frame, compact):
+    path = tmp_path / 'jobs.csv'
+    jobs_frame[:LOADED_ROWS].to_csv(path, index=False)
+    processor = JobDataProcessor(str(path), compact=compact)
+    assert processor.refresh() == 0
+
+    jobs_frame[LOADED_ROWS:].to_csv(path, mode='a', header=False, index=False)
+    assert processor.refresh() == len(jobs_frame) - LOADED_ROWS
+    assert processor.refresh() == 0
+    assert_same_data(processor, JobDataProcessor(str(path), compact=compact))
+
+
+def test_append_equals_full_load(jobs_frame):
+    processor = JobDataProcessor(jobs_frame[:LOADED_ROWS])
+    assert processor.append(jobs_frame[LOADED_ROWS:]) == len(jobs_frame) - LOADED_ROWS
+    assert_same_data(processor, JobDataProcessor(jobs_frame))
+
+
+def test_queries_during_appends_see_one_state(jobs_frame):
+    processor = JobDataProcessor(jobs_frame[:LOADED_ROWS], cache=ResultCache(max_entries=0))
+    chunks = np.array_split(np.arange(LOADED_ROWS, len(jobs_frame)), 8)
+    loaded = {LOADED_ROWS + sum(len(chunk) for chunk in chunks[:i]) for i in range(len(chunks) + 1)}
+    done = threading.Event()
+    seen, errors = [], []
+
+    def query():
+        while not done.is_set():
+            try:
+                # The overview counts from the cube, the jobs are rows of the frame
+                everything = processor.get_dashboard(columns=['metadata_jobPostId'])
+                engineering = processor.get_dashboard(columns=['metadata_jobPostId'], industries=['Engineering'])
+            except Exception as error:
+                errors.append(error)
+                return
+            seen.append((everything['overview']['total_jobs'], len(everything['jobs']),
+                         engineering['overview']['total_jobs'], len(engineering['jobs'])))
+
+    readers = [threading.Thread(target=query) for _ in range(3)]
+    for reader in readers:
+        reader.start()
+    try:
+        for chunk in chunks:
+            processor.append(jobs_frame.take(chunk))
+    finally:
+        done.set()
+        for reader in readers:
+            reader.join()
+    assert not errors and seen
+    for total, jobs, engineering_total, engineering_jobs in seen:
+        assert total == jobs and total in loaded
+        assert engineering_total == engineering_jobs
@@ -0,0 +1,159 @@
+import threading
+import time
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sg_job_result_cache
+from sg_job_data_processor import JobDataProcessor
+from sg_job_result_cache import ResultCache
+
+THREADS = 8
+# Postings loaded first; the rest arrive afterwards
+LOADED_ROWS = 2000
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A settable stand-in for the cache's time.monotonic"""
+    now = [0.0]
+    monkeypatch.setattr(sg_job_result_cache, 'time', types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+@pytest.fixture(scope='module')
+def cached_processor(jobs_csv):
+    return JobDataProcessor(jobs_csv, cache=ResultCache())
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.001)
+
+
+def test_least_recently_used_is_evicted():
+    cache = ResultCache(max_entries=2)
+    for key in ['a', 'b', 'a', 'c']:
+        cache.get_or_compute(key, lambda: key * 3)
+    assert cache.get_or_compute('b', lambda: 'recomputed') == 'recomputed'
+    assert cache.get_or_compute('a', lambda: 'recomputed') == 'recomputed'
+    assert cache.stats()['evictions'] == 3
+    assert len(cache) == 2
+
+
+def test_entries_expire(clock):
+    cache = ResultCache(ttl_s=10)
+    cache.get_or_compute('a', lambda: 1)
+    clock[0] = 10
+    assert cache.get_or_compute('a', lambda: 2) == 1
+    clock[0] = 10.5
+    assert cache.get_or_compute('a', lambda: 3) == 3
+    assert cache.stats()['expirations'] == 1
+
+
+def test_byte_budget():
+    cache = ResultCache(max_mb=1)
+    third = np.zeros(2 ** 20 // 3 // 8)
+    for key in range(4):
+        cache.get_or_compute(key, lambda: third.copy())
+    assert len(cache) == 3
+    assert cache.memory_usage() <= 2 ** 20
+    assert 0 not in cache._entries
+    # Larger than the whole budget: returned, not kept
+    huge = np.zeros(2 ** 20 // 8 + 1)
+    assert cache.get_or_compute('huge', lambda: huge) is huge
+    assert 'huge' not in cache._entries
+    assert len(cache) == 3
+
+
+def test_zero_entries_disables_caching():
+    cache = ResultCache(max_entries=0)
+    calls = []
+    for _ in range(3):
+        cache.get_or_compute('a', lambda: calls.append(1))
+    assert len(calls) == 3
+    assert len(cache) == 0
+
+
+def test_concurrent_identical_calls_are_computed_once():
+    cache = ResultCache()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return object()
+
+    results = [None] * THREADS
+
+    def call(i):
+        results[i] = cache.get_or_compute('a', compute)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    # Every thread but the computing one waits on its result
+    wait_for(lambda: cache.hits == THREADS - 1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_results_computed_before_clear_are_not_kept():
+    cache = ResultCache()
+    started, release = threading.Event(), threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(5)
+        return 'stale'
+
+    thread = threading.Thread(target=cache.get_or_compute, args=('a', compute))
+    thread.start()
+    started.wait(5)
+    cache.clear()
+    release.set()
+    thread.join()
+    assert len(cache) == 0
+    assert cache.get_or_compute('a', lambda: 'fresh') == 'fresh'
+
+
+def test_equivalent_calls_share_an_entry(cached_processor):
+    first = cached_processor.get_top_roles(industries=['Engineering', 'Information Technology'])
+    hits = cached_processor.cache.hits
+    assert cached_processor.get_top_roles(20, [], ['Information Technology', 'Engineering']) is first
+    assert cached_processor.cache.hits == hits + 1
+
+
+def test_rebuilding_the_indexes_clears_the_cache(cached_processor):
+    first = cached_processor.get_dashboard(industries=['Engineering'])
+    assert cached_processor.get_dashboard(industries=['Engineering']) is first
+    cached_processor.build_indexes()
+    assert len(cached_processor.cache) == 0
+    assert cached_processor.get_dashboard(industries=['Engineering']) is not first
+
+
+@pytest.mark.parametrize('update', ['append', 'refresh'])
+def test_new_postings_invalidate_cached_results(tmp_path, jobs_frame, update):
+    path = tmp_path / 'jobs.csv'
+    jobs_frame[:LOADED_ROWS].to_csv(path, index=False)
+    processor = JobDataProcessor(str(path))
+    stale = processor.get_dashboard(industries=['Engineering'])
+    assert processor.get_dashboard(industries=['Engineering']) is stale
+
+    if update == 'append':
+        processor.append(jobs_frame[LOADED_ROWS:])
+    else:
+        jobs_frame[LOADED_ROWS:].to_csv(path, mode='a', header=False, index=False)
+        processor.refresh()
+    fresh = processor.get_dashboard(industries=['Engineering'])
+    expected = JobDataProcessor(jobs_frame).get_dashboard(industries=['Engineering'])
+    assert stale['overview']['total_jobs'] < fresh['overview']['total_jobs'] == expected['overview']['total_jobs']
+    pd.testing.assert_frame_equal(fresh['industry_stats'], expected['industry_stats'])
@@ -0,0 +1,64 @@
+import threading
+import time
+
+import pytest
+
+from sg_job_rwlock import ReadWriteLock
+
+
+def test_writer_waits_for_readers_and_holds_off_new_ones():
+    lock = ReadWriteLock()
+    events = []
+    reading, writer_waiting = threading.Event(), threading.Event()
+
+    def read(name, started=None):
+        with lock.reading():
+            if started is not None:
+                started.set()
+                writer_waiting.wait()
+                time.sleep(0.05)
+            events.append(name)
+
+    def write():
+        writer_waiting.set()
+        with lock.writing():
+            events.append('write')
+
+    first = threading.Thread(target=read, args=('first', reading))
+    first.start()
+    reading.wait()
+    writer = threading.Thread(target=write)
+    writer.start()
+    writer_waiting.wait()
+    time.sleep(0.01)
+    # Arrives while the writer waits for the first reader
+    later = threading.Thread(target=read, args=('later',))
+    later.start()
+    for thread in (first, writer, later):
+        thread.join(5)
+    assert events == ['first', 'write', 'later']
+
+
+def test_reads_nest_while_a_writer_waits():
+    lock = ReadWriteLock()
+    writer_waiting = threading.Event()
+
+    def write():
+        writer_waiting.set()
+        with lock.writing():
+            # The writer reads too
+            with lock.reading():
+                pass
+
+    writer = threading.Thread(target=write)
+    with lock.reading():
+        writer.start()
+        writer_waiting.wait()
+        time.sleep(0.01)
+        with lock.reading():
+            pass
+        with pytest.raises(RuntimeError):
+            with lock.writing():
+                pass
+    writer.join(5)
+    assert not writer.is_alive()
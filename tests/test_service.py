@@ -0,0 +1,132 @@
+import asyncio
+import functools
+import json
+import threading
+
+from sg_job_service import QueryServer, QueryService, encode
+
+
+def test_identical_queries_in_flight_run_once(processor, monkeypatch):
+    calls = []
+    started, release = threading.Event(), threading.Event()
+    get_top_companies = processor.get_top_companies
+
+    @functools.wraps(get_top_companies)
+    def held(*args, **kwargs):
+        calls.append(kwargs)
+        started.set()
+        release.wait(timeout=10)
+        return get_top_companies(*args, **kwargs)
+
+    monkeypatch.setattr(processor, 'get_top_companies', held)
+    service = QueryService(processor, workers=2)
+
+    async def run():
+        # Queued together; the second differs only in how its defaults are spelled
+        queued = [asyncio.ensure_future(service.query('get_top_companies', {'top_n': 5})) for _ in range(4)]
+        queued.append(asyncio.ensure_future(service.query('get_top_companies', {'top_n': 5, 'industries': None})))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 10)
+        # Arrives while the first is running
+        running = asyncio.ensure_future(service.query('get_top_companies', {'top_n': 5}))
+        other = asyncio.ensure_future(service.query('get_top_companies', {'top_n': 3}))
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*queued, running), await other
+
+    try:
+        results, other = asyncio.run(run())
+    finally:
+        release.set()
+        service.close()
+    assert len(calls) == 2
+    assert len(set(results)) == 1
+    assert results[0] == encode(get_top_companies(top_n=5))
+    assert len(json.loads(other)['data']) == 3
+    assert service.counts['queries'] == 7
+    assert service.counts['coalesced'] == 5
+
+
+
+async def http(port, requests):
+    """(status, JSON body) of each (method, path, body) request, sent over one keep-alive connection"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    responses = []
+    try:
+        for method, path, body in requests:
+            payload = json.dumps(body).encode() if body is not None else b''
+            writer.write(f'{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(payload)}\r\n\r\n'
+                         .encode() + payload)
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            headers = {}
+            while (line := await reader.readline()) != b'\r\n':
+                name, _, value = line.decode().partition(':')
+                headers[name.strip().lower()] = value.strip()
+            responses.append((status, json.loads(await reader.readexactly(int(headers['content-length'])))))
+    finally:
+        writer.close()
+    return responses
+
+
+def test_http_routes(processor):
+    service = QueryService(processor, workers=2)
+    server = QueryServer(service)
+
+    async def run():
+        _, port = await server.start(port=0)
+        try:
+            return await http(port, [
+                ('GET', '/health', None),
+                ('POST', '/query', {'method': 'get_top_roles', 'params': {'top_n': 3, 'industries': ['Engineering']}}),
+                ('POST', '/batch', {'queries': [{'method': 'get_market_overview'}, {'method': 'no_such_method'}]}),
+                ('GET', '/query', None),
+                ('POST', '/query', {'method': 'get_top_roles', 'params': {'top_n': 3, 'colour': 'red'}}),
+            ])
+        finally:
+            await server.close()
+
+    try:
+        health, roles, batch, wrong_verb, bad_param = asyncio.run(run())
+    finally:
+        service.close()
+    assert health == (200, {'status': 'ok'})
+    assert roles == (200, {'result': json.loads(encode(processor.get_top_roles(top_n=3, industries=['Engineering'])))})
+    assert batch[0] == 200
+    overview, unknown = batch[1]['results']
+    assert overview['result']['total_jobs'] == len(processor.df)
+    assert unknown['status'] == 404
+    assert wrong_verb[0] == 405
+    assert bad_param[0] == 400
+
+
+def test_malformed_params_are_bad_requests(processor):
+    service = QueryService(processor, workers=2)
+    server = QueryServer(service)
+    malformed = [
+        {'salary_range': ['a', 'b']}, {'salary_range': [3000]}, {'salary_range': 3000}, {'industries': 'Engineering'},
+        {'industries': [1, 2]}, {'roles': [['Data Analyst']]}, {'top_n': 3, 'position': {'Manager': True}},
+    ]
+
+    async def run():
+        _, port = await server.start(port=0)
+        try:
+            # Sent over one connection, which survives them
+            queries = [{'method': 'get_top_roles', 'params': params} for params in malformed]
+            responses = await http(port, [('POST', '/query', query)
+                                          for query in queries + [{'method': 'get_market_overview'}]])
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'NONSENSE\r\n\r\n')
+            await writer.drain()
+            status_line = await reader.readline()
+            writer.close()
+            return responses, status_line
+        finally:
+            await server.close()
+
+    try:
+        responses, status_line = asyncio.run(run())
+    finally:
+        service.close()
+    assert [status for status, _ in responses] == [400] * len(malformed) + [200]
+    assert all('error' in body for _, body in responses[:-1])
+    assert status_line.startswith(b'HTTP/1.1 400')
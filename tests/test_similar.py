@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sg_job_data_processor import JobDataProcessor
+from sg_job_similar import SimilarJobs, cosine, encode_tokens, title_tokens
+
+QUERIES = [
+    {'title': 'senior data analyst'},
+    {'title': 'Data Engineer (SQL)', 'salary': 5000, 'experience': 3},
+    {'title': 'accountant', 'top_n': 15, 'industries': ['Banking and Finance'], 'salary_range': (2000, 8000)},
+    {'title': 'software engineer', 'position': ['Executive', 'Manager']},
+    {'job_id': 'MCF-TEST-0000010'},
+    {'job_id': 'MCF-TEST-0000500', 'top_n': 5, 'exp_level': ['Mid (2-5y)', 'Senior (5-10y)']},
+]
+
+
+def exhaustive_search(processor, title=None, job_id=None, top_n=10, salary=None, experience=None, **filters):
+    """Row positions and similarity of the top_n postings, from scoring every posting"""
+    df, index = processor.df, processor.similar_jobs
+    category = exclude = None
+    if job_id is not None:
+        exclude = int(np.flatnonzero(df['metadata_jobPostId'] == job_id)[0])
+        posting = df.iloc[exclude]
+        title, category = posting['title'], posting['main_category']
+        salary = None if np.isnan(posting['average_salary']) else posting['average_salary']
+        experience = None if np.isnan(posting['minimumYearsExperience']) else posting['minimumYearsExperience']
+    title_similarity = cosine(index._title_tokens, np.arange(len(index.titles)),
+                              encode_tokens([title_tokens(title)]))[index.title_codes]
+    category_similarity = None
+    if category is not None:
+        category_similarity = SimilarJobs._category_similarity(index._category_tokens, category)[
+            index.category_codes]
+    scores = SimilarJobs.score(title_similarity, category_similarity, index.features, salary, experience)
+
+    candidates = np.zeros(len(df), dtype=bool)
+    candidates[processor.select_rows(**filters)] = True
+    # Postings whose title shares no word with the query aren't candidates
+    candidates &= title_similarity > 0
+    if exclude is not None:
+        candidates[exclude] = False
+    rows = np.flatnonzero(candidates)
+    order = np.lexsort((rows, -scores[rows]))[:top_n]
+    return rows[order], scores[rows[order]]
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_top_k_equals_exhaustive_search(processor, query):
+    rows, scores = exhaustive_search(processor, **query)
+    similar = processor.get_similar_jobs(**query)['jobs']
+    assert similar['metadata_jobPostId'].tolist() == processor.df['metadata_jobPostId'].iloc[rows].tolist()
+    np.testing.assert_allclose(similar['similarity'], scores.round(4), atol=1e-4)
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_results_are_ranked_and_filtered(processor, query):
+    similar = processor.get_similar_jobs(**query)['jobs']
+    assert len(similar) == query.get('top_n', 10)
+    assert (np.diff(similar['similarity'].to_numpy()) <= 0).all()
+    assert query.get('job_id') not in set(similar['metadata_jobPostId'])
+    filters = {name: value for name, value in query.items()
+               if name not in ('title', 'job_id', 'top_n', 'salary', 'experience')}
+    assert set(similar['metadata_jobPostId']) <= set(processor.filter_data(**filters)['metadata_jobPostId'])
+
+
+def test_a_copied_posting_ranks_first(jobs_frame):
+    copy = jobs_frame.iloc[[10]].assign(metadata_jobPostId='MCF-TEST-COPY')
+    processor = JobDataProcessor(pd.concat([jobs_frame, copy], ignore_index=True))
+    similar = processor.get_similar_jobs(job_id='MCF-TEST-COPY')['jobs']
+    assert similar['metadata_jobPostId'].iloc[0] == jobs_frame['metadata_jobPostId'].iloc[10]
+    assert similar['similarity'].iloc[0] == 1
+    assert similar['similarity'].iloc[1] < 1
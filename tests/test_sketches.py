@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sg_job_data_processor import JobDataProcessor
+from sg_job_sketches import JobSketches, kll_rank_error
+
+# Small enough that most partitions compact and run out of counters
+K = 16
+CAPACITY = 3
+QS = [0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95]
+SKETCH_ROWS = 20_000
+
+
+def rank_error(values, answer, q):
+    """How far q is from the range of ranks `answer` takes among `values` (0 if within)"""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    below, up_to = np.mean(values < answer), np.mean(values <= answer)
+    return max(below - q, q - up_to, 0.0)
+
+
+@pytest.fixture(scope='module')
+def salaries():
+    """A frame with the columns JobSketches reads, over few partitions of many rows each"""
+    rng = np.random.default_rng(1)
+    low = np.round(rng.lognormal(8.3, 0.5, SKETCH_ROWS), -1)
+    return pd.DataFrame({
+        'positionLevels': rng.choice(['Executive', 'Manager'], SKETCH_ROWS),
+        'employmentTypes': 'Permanent',
+        'exp_category': rng.choice(['Junior (0-2y)', 'Mid (2-5y)'], SKETCH_ROWS),
+        'salary_minimum': low,
+        'salary_maximum': low * 1.5,
+        'average_salary': low * 1.25,
+        'postedCompany_name': np.char.add('company ', rng.zipf(1.5, SKETCH_ROWS).astype(str)),
+        'title': np.char.add('title ', rng.integers(0, 500, SKETCH_ROWS).astype(str)),
+    })
+
+
+@pytest.fixture(scope='module')
+def small_sketches(jobs_frame):
+    """A processor over jobs_frame whose sketches are far smaller than its partitions"""
+    return JobDataProcessor(jobs_frame, sketch_k=K, sketch_capacity=CAPACITY)
+
+
+@pytest.mark.parametrize('merged', [False, True])
+@pytest.mark.parametrize('filters', [{}, {'position': ['Manager']}, {'exp_level': ['Mid (2-5y)']}])
+def test_quantile_rank_error_within_bound(salaries, merged, filters):
+    if merged:
+        half = len(salaries) // 2
+        sketches = JobSketches.build(salaries[:half], k=K).merge(JobSketches.build(salaries[half:], k=K))
+    else:
+        sketches = JobSketches.build(salaries, k=K)
+    rows = salaries
+    if filters:
+        (dim, values), = filters.items()
+        rows = salaries[salaries[{'position': 'positionLevels', 'exp_level': 'exp_category'}[dim]].isin(values)]
+    for measure in ['average_salary', 'salary_minimum']:
+        result = sketches.quantiles(measure, QS, **filters)
+        assert result['count'].iloc[0] == len(rows)
+        for q in QS:
+            assert rank_error(rows[measure], result[q].iloc[0], q) <= kll_rank_error(K)
+        grouped = sketches.quantiles(measure, QS, group_by='positionLevels', **filters)
+        for position, stats in grouped.iterrows():
+            values = rows.loc[rows['positionLevels'] == position, measure]
+            for q in QS:
+                assert rank_error(values, stats[q], q) <= kll_rank_error(K)
+
+
+@pytest.mark.parametrize('filters', [
+    {},
+    {'salary_range': (3000, 6000)},
+    {'salary_range': (3250, 6100), 'position': ['Executive', 'Manager']},
+])
+def test_salary_percentiles_within_bound(small_sketches, filters):
+    """Salary ranges off the sketch bands add the rows of the bands they cut through"""
+    percentiles = small_sketches.get_salary_percentiles(QS, **filters)
+    values = small_sketches.filter_data(**filters)['average_salary']
+    assert percentiles['count'] == values.notna().sum()
+    for q in QS:
+        assert rank_error(values, percentiles[f'p{round(q * 100)}'], q) <= kll_rank_error(K)
+
+
+@pytest.mark.parametrize('filters', [{'industries': ['Engineering']},
+                                     {'roles': ['Data Analyst'], 'position': ['Executive', 'Manager']}])
+def test_unsketched_percentiles_are_exact(small_sketches, filters):
+    assert not small_sketches.sketches.supports(**filters)
+    percentiles = small_sketches.get_salary_percentiles(QS, **filters)
+    values = small_sketches.filter_data(**filters)['average_salary'].dropna()
+    assert percentiles['count'] == len(values)
+    for q in QS:
+        assert percentiles[f'p{round(q * 100)}'] == np.quantile(values, q, method='inverted_cdf')
+
+
+@pytest.mark.parametrize('filters', [{}, {'position': ['Executive']}, {'exp_level': ['Mid (2-5y)', 'Senior (5-10y)']}])
+@pytest.mark.parametrize('column', ['postedCompany_name', 'title'])
+def test_top_counts_within_error(small_sketches, column, filters):
+    counts, error = small_sketches.sketches.top(column, n=10, **filters)
+    exact = small_sketches.filter_data(**filters)[column].value_counts()
+    assert error > 0
+    assert len(counts) == 10
+    assert (np.abs(counts - exact.reindex(counts.index, fill_value=0)) <= error).all()
+
+
+@pytest.mark.parametrize('filters', [{}, {'position': ['Executive']}, {'salary_range': (3000, 9000)}])
+def test_top_companies_are_exact_when_the_counters_ran_out(small_sketches, filters):
+    assert small_sketches.sketches.top('postedCompany_name', n=1, **filters)[1] > 0
+    exact = small_sketches.filter_data(**filters)['postedCompany_name'].value_counts()
+    top = small_sketches.get_top_companies(top_n=10, **filters)
+    # Tied companies may come in either order
+    assert top.tolist() == exact.head(10).tolist()
+    assert (exact.reindex(top.index) == top).all()
+    overview = small_sketches.get_market_overview(**filters)
+    assert exact[overview['top_company']] == exact.iloc[0]
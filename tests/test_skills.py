@@ -0,0 +1,75 @@
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sg_job_skills
+from sg_job_skills import SkillMatcher
+
+# Overlapping, nested and punctuated skills, and skills glued to other words
+TRICKY_TITLES = [
+    'JavaScript Developer', 'Java Developer (Node.js)', 'C++ / C# Engineer', '.NET Developer', 'R&D Analyst',
+    'Senior Project Manager - Power BI', 'Business Analyst/Product Manager', 'HR Executive', 'Chrome QA',
+    'DATA SCIENCE LEAD', 'MySQL DBA', 'Golang', 'Cybersecurity Analyst', 'Sales', '', 'AI', 'Chair',
+]
+
+
+def substring_matches(skills, text, case_sensitive=False, word_boundary=False):
+    """What SkillMatcher.match should return, from one scan per skill"""
+    def fold(value):
+        return value if case_sensitive else value.lower()
+
+    if word_boundary:
+        return tuple(i for i, skill in enumerate(skills)
+                     if re.search(rf'(?<![^\W_]){re.escape(fold(skill))}(?![^\W_])', fold(text)))
+    return tuple(i for i, skill in enumerate(skills) if fold(skill) in fold(text))
+
+
+@pytest.mark.parametrize('options', [{}, {'word_boundary': True}, {'case_sensitive': True},
+                                     {'case_sensitive': True, 'word_boundary': True}])
+def test_match_equals_substring_scan(jobs_frame, options):
+    matcher = SkillMatcher(**options)
+    for title in TRICKY_TITLES + list(jobs_frame['title'].unique()):
+        assert matcher.match(title) == substring_matches(matcher.skills, title, **options), title
+
+
+def test_word_boundary():
+    matcher = SkillMatcher(['Java', 'R', 'C++', 'Node.js'], word_boundary=True)
+    found = {title: {matcher.skills[i] for i in matcher.match(title)}
+             for title in ['JavaScript Developer', 'R&D Engineer', 'Senior C++ Developer', 'Node.js/Java']}
+    assert found == {
+        'JavaScript Developer': set(),
+        'R&D Engineer': {'R'},
+        'Senior C++ Developer': {'C++'},
+        'Node.js/Java': {'Java', 'Node.js'},
+    }
+
+
+def test_memo_is_capped(monkeypatch):
+    monkeypatch.setattr(sg_job_skills, 'MAX_MEMO_TEXTS', 3)
+    matcher = SkillMatcher(['SQL'])
+    texts = ['SQL Developer', 'Accountant', 'MySQL DBA', 'Chef', 'PostgreSQL Admin']
+    assert [matcher.match(text) for text in texts] == [(0,), (), (0,), (), (0,)]
+    # The oldest texts are forgotten, and still matched when asked again
+    assert list(matcher._memo) == texts[-3:]
+    assert matcher.match('SQL Developer') == (0,)
+    assert list(matcher._memo) == texts[-2:] + ['SQL Developer']
+
+
+def test_skill_counts_and_salaries_equal_row_scan(processor):
+    titles = processor.df['title']
+    salaries = processor.df['average_salary']
+    skills = processor.skill_matcher.skills
+    expected = {}
+    for skill in skills:
+        rows = titles.str.contains(skill, case=False, regex=False, na=False)
+        if rows.any():
+            expected[skill] = (rows.sum(), salaries[rows].mean())
+
+    counts = processor.skill_index.skill_counts()
+    assert counts.to_dict() == {skill: count for skill, (count, _) in expected.items()}
+    assert (np.diff(counts.to_numpy()) <= 0).all()
+    stats = processor.get_skill_salary(processor.df)
+    expected = pd.DataFrame(expected.values(), index=list(expected), columns=['count', 'avg_salary'])
+    pd.testing.assert_frame_equal(stats.sort_index(), expected.sort_index(), check_dtype=False)
@@ -0,0 +1,132 @@
+import os
+
+import pandas as pd
+import pytest
+
+import sg_job_data_processor
+from sg_job_data_processor import JobDataProcessor
+from sg_job_snapshot import snapshot_key
+
+QUERIES = [('get_market_overview', {}), ('get_industry_stats', {}), ('get_salary_by_position', {}),
+           ('get_skill_keywords', {}), ('filter_data', {'industries': ['Engineering'], 'salary_range': (3000, 6000)})]
+
+
+def snapshots(cache_dir):
+    return [name for name in os.listdir(cache_dir) if name.endswith('.jobs.parquet')]
+
+
+def not_read(*args, **kwargs):
+    raise AssertionError('the source was read rather than restored from the snapshot')
+
+
+def assert_same_processor(restored, cold):
+    pd.testing.assert_frame_equal(restored.df, cold.df)
+    pd.testing.assert_frame_equal(restored.job_categories, cold.job_categories)
+    for method, args in QUERIES:
+        result, expected = getattr(restored, method)(**args), getattr(cold, method)(**args)
+        if isinstance(expected, pd.DataFrame):
+            pd.testing.assert_frame_equal(result, expected)
+        else:
+            assert result == expected
+
+
+def test_key_follows_source_code_and_options(tmp_path, jobs_csv):
+    source, code = tmp_path / 'jobs.csv', tmp_path / 'pipeline.py'
+    source.write_bytes(open(jobs_csv, 'rb').read())
+    code.write_text('STEP = 1\n')
+
+    def key(**options):
+        return snapshot_key(str(source), code_files=[str(code)], **options)
+
+    first = key(compact=False)
+    assert key(compact=False) == first
+    assert key(compact=True) != first
+    code.write_text('STEP = 2\n')
+    changed_code = key(compact=False)
+    assert changed_code != first
+    with open(source, 'ab') as f:
+        f.write(b'\n')
+    assert key(compact=False) not in (first, changed_code)
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_restored_processor_equals_cold_load(tmp_path, jobs_csv, monkeypatch, compact):
+    cache_dir = str(tmp_path / 'cache')
+    JobDataProcessor(jobs_csv, compact=compact, cache_dir=cache_dir)
+    assert len(snapshots(cache_dir)) == 1
+
+    with monkeypatch.context() as patch:
+        patch.setattr(JobDataProcessor, '_read_source', not_read)
+        restored = JobDataProcessor(jobs_csv, compact=compact, cache_dir=cache_dir)
+    assert_same_processor(restored, JobDataProcessor(jobs_csv, compact=compact))
+
+
+@pytest.mark.parametrize('change', ['source', 'code', 'option'])
+def test_changes_invalidate_the_snapshot(tmp_path, jobs_frame, monkeypatch, change):
+    source, code, cache_dir = tmp_path / 'jobs.csv', tmp_path / 'pipeline.py', str(tmp_path / 'cache')
+    jobs_frame.to_csv(source, index=False)
+    code.write_text('STEP = 1\n')
+    monkeypatch.setattr(sg_job_data_processor, 'PIPELINE_CODE_FILES', [str(code)])
+    JobDataProcessor(str(source), cache_dir=cache_dir)
+    assert len(snapshots(cache_dir)) == 1
+
+    compact = False
+    if change == 'source':
+        jobs_frame[:1000].to_csv(source, index=False)
+    elif change == 'code':
+        code.write_text('STEP = 2\n')
+    else:
+        compact = True
+    reloaded = JobDataProcessor(str(source), compact=compact, cache_dir=cache_dir)
+    # Processed again and saved under a new key
+    assert len(snapshots(cache_dir)) == 2
+    assert_same_processor(reloaded, JobDataProcessor(str(source), compact=compact))
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_restored_state_equals_cold_load(tmp_path, jobs_csv, monkeypatch, compact):
+    cache_dir = str(tmp_path / 'cache')
+    warm = JobDataProcessor(jobs_csv, compact=compact, cache_dir=cache_dir)
+    warm.get_dashboard(industries=['Engineering'])
+    warm.get_trends()
+    warm.save_state()
+
+    with monkeypatch.context() as patch:
+        patch.setattr(JobDataProcessor, '_read_source', not_read)
+        patch.setattr(JobDataProcessor, 'build_indexes', not_read)
+        restored = JobDataProcessor(jobs_csv, compact=compact, cache_dir=cache_dir)
+    assert len(restored.cache) == len(warm.cache)
+    cold = JobDataProcessor(jobs_csv, compact=compact)
+    assert_same_processor(restored, cold)
+    for filters in [{}, {'industries': ['Engineering'], 'position': ['Manager']}, {'salary_range': (3000, 6000)}]:
+        assert (restored.filter_index.select(**filters) == cold.filter_index.select(**filters)).all()
+        pd.testing.assert_frame_equal(restored.rollup(('exp_category',), **filters),
+                                      cold.rollup(('exp_category',), **filters))
+    dashboard = restored.get_dashboard(industries=['Engineering'])
+    expected = cold.get_dashboard(industries=['Engineering'])
+    for key in expected:
+        if isinstance(expected[key], pd.DataFrame):
+            pd.testing.assert_frame_equal(dashboard[key], expected[key])
+        elif isinstance(expected[key], pd.Series):
+            pd.testing.assert_series_equal(dashboard[key], expected[key])
+        else:
+            assert dashboard[key] == expected[key]
+    pd.testing.assert_frame_equal(restored.get_trends(), cold.get_trends())
+
+
+def test_state_follows_its_code(tmp_path, jobs_csv, monkeypatch):
+    cache_dir, code = str(tmp_path / 'cache'), tmp_path / 'index.py'
+    code.write_text('STEP = 1\n')
+    monkeypatch.setattr(sg_job_data_processor, 'STATE_CODE_FILES', [str(code)])
+    JobDataProcessor(jobs_csv, cache_dir=cache_dir)
+    code.write_text('STEP = 2\n')
+    rebuilt = []
+    build_indexes = JobDataProcessor.build_indexes
+
+    def counted(self, **options):
+        rebuilt.append(build_indexes(self, **options))
+
+    monkeypatch.setattr(JobDataProcessor, 'build_indexes', counted)
+    JobDataProcessor(jobs_csv, cache_dir=cache_dir)
+    assert len(rebuilt) == 1
+    assert len([name for name in os.listdir(cache_dir) if name.endswith('.state.pkl')]) == 2
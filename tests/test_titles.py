@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from sg_job_titles import TitleRoles
+
+VARIANTS = ['Sr. Software Engineer', 'Senior Software Engineer (Java)', 'Software Engineer - Senior',
+            'Senior Software Engineer', 'SENIOR SOFTWARE ENGINEER', 'Senior Software Engineer, Full-Time']
+# Sharing words with the variants or each other, but other roles
+UNRELATED = ['Software Engineer', 'Junior Software Engineer', 'Software Engineering Manager', 'Senior Data Engineer',
+             'Data Engineer', 'Data Analyst', 'Senior Data Analyst', 'Accountant', 'Senior Accountant']
+
+
+def partition(title_roles):
+    """The clusters as a set of title sets"""
+    frame = title_roles.frame()
+    return {frozenset(titles) for _, titles in frame.groupby('role')['title']}
+
+
+def test_variants_cluster_together_and_unrelated_titles_apart():
+    titles = VARIANTS + UNRELATED
+    counts = np.arange(len(titles)) % 4 + 1
+    roles = TitleRoles.build(titles, counts)
+    assert partition(roles) == {frozenset(VARIANTS)} | {frozenset([title]) for title in UNRELATED}
+    # Labelled by its plainest, most posted title
+    assert set(roles.resolve(VARIANTS)) == {'Senior Software Engineer'}
+    assert roles.members('Senior Software Engineer') == VARIANTS
+
+
+def test_near_duplicate_titles_cluster():
+    near = ['Senior Software Engineer Java Backend Microservices Cloud',
+            'Senior Software Engineer Java Backend Microservices']
+    roles = TitleRoles.build(near + ['Cloud Architect'], [3, 2, 1])
+    assert partition(roles) == {frozenset(near), frozenset(['Cloud Architect'])}
+
+
+def test_clusters_do_not_depend_on_title_order(jobs_frame):
+    counts = jobs_frame['title'].value_counts()
+    roles = TitleRoles.build(counts.index, counts.to_numpy())
+    shuffled = np.random.default_rng(0).permutation(len(counts))
+    again = TitleRoles.build(counts.index[shuffled], counts.to_numpy()[shuffled])
+    pd.testing.assert_frame_equal(roles.frame().sort_values('title', ignore_index=True),
+                                  again.frame().sort_values('title', ignore_index=True))
+
+
+def test_processor_groups_postings_by_role(processor):
+    variants = [title for title in processor.df['title'].unique() if title.startswith('Senior Data Analyst')]
+    assert len(variants) > 1
+    assert processor.title_roles.resolve(variants) == ['Senior Data Analyst']
+    role_rows = processor.df['role'] == 'Senior Data Analyst'
+    assert role_rows.sum() == processor.df['title'].isin(variants).sum()
+    # Counted over the postings with a salary
+    top_roles = processor.get_top_roles(top_n=100)
+    assert top_roles.loc['Senior Data Analyst', 'count'] == processor.df.loc[role_rows, 'salary_minimum'].count()
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sg_job_trends import FREQUENCIES, TREND_DIMENSIONS, TrendRollups
+
+
+@pytest.mark.parametrize('parts', [2, 5])
+def test_update_equals_full_rebuild(processor, parts):
+    """The parts are runs of rows, so they share posting days and weeks"""
+    chunks = np.array_split(np.arange(len(processor.df)), parts)
+    rollups = TrendRollups.build(processor.df.take(chunks[0]))
+    for rows in chunks[1:]:
+        rollups.update(processor.df.take(rows))
+
+    rebuilt = TrendRollups.build(processor.df)
+    assert rollups.last_period == rebuilt.last_period
+    for dimension in TREND_DIMENSIONS:
+        for freq in FREQUENCIES:
+            pd.testing.assert_frame_equal(rollups.cells[(dimension, freq)].reset_index(drop=True),
+                                          rebuilt.cells[(dimension, freq)].reset_index(drop=True),
+                                          check_dtype=False, obj=f'{dimension} {freq}')
+    pd.testing.assert_frame_equal(rollups.growth('main_category'), rebuilt.growth('main_category'))
+    pd.testing.assert_frame_equal(rollups.emerging(min_postings=1), rebuilt.emerging(min_postings=1))
+
+
+@pytest.mark.parametrize('dimension', TREND_DIMENSIONS)
+def test_weekly_series_equals_groupby(processor, dimension):
+    df = processor.df[processor.df['metadata_newPostingDate'].notna()]
+    week = pd.to_datetime(df['metadata_newPostingDate']).dt.to_period('W').dt.start_time
+    keys = [week] if dimension is None else [week, df[dimension].astype(object)]
+    expected = df.groupby(keys)['average_salary'].agg(['size', 'mean'])
+
+    series = processor.get_trends(dimension=dimension, freq='W')
+    assert series['postings'].tolist() == expected['size'].tolist()
+    np.testing.assert_allclose(series['avg_salary'], expected['mean'], rtol=1e-9)